@@ -0,0 +1,64 @@
+from collections import deque
+from typing import Generic, Iterable, Iterator, TypeVar
+
+
+T = TypeVar("T")
+
+
+class AhoCorasick(Generic[T]):
+    """Multi-pattern string matcher (Aho-Corasick automaton)
+
+    All patterns are compiled into one automaton, so scanning a text is a
+    single left-to-right pass whose cost depends on the text length and the
+    number of matches, not on how many patterns there are.
+    """
+
+    def __init__(self, patterns: Iterable[tuple[str, T]]):
+        # Node i: outgoing edges, failure link, payloads of patterns ending here
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[list[tuple[int, T]]] = [[]]
+        self.pattern_count = 0
+
+        for pattern, payload in patterns:
+            if pattern:
+                self._add(pattern, payload)
+        self._build_failure_links()
+
+    def _add(self, pattern: str, payload: T) -> None:
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[node][char] = next_node
+            node = next_node
+        self._output[node].append((len(pattern), payload))
+        self.pattern_count += 1
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                # Inherit matches that end at the failure state (suffix patterns)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def iter_matches(self, text: str) -> Iterator[tuple[int, int, T]]:
+        """Yield (start, end, payload) for every pattern occurrence in `text`"""
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, payload in output[node]:
+                yield index - length + 1, index + 1, payload
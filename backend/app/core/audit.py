@@ -0,0 +1,250 @@
+import asyncio
+import enum
+import json
+import logging
+import os
+import queue
+import threading
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime
+from typing import Any, Optional
+
+from sqlalchemy import insert, inspect
+
+from .audit_encoding import AuditChainEncoder
+from .config import settings
+from .database import SessionLocal
+
+
+logger = logging.getLogger(__name__)
+
+# Never copied into audit snapshots
+SNAPSHOT_EXCLUDE = {"password_hash", "password_ciphertext", "iv"}
+
+
+def _json_safe(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, bytes):
+        return value.decode(errors="replace")
+    return value
+
+
+def snapshot(instance) -> dict:
+    """JSON-safe column snapshot of an ORM instance for before/after audit state"""
+    return {
+        attr.key: _json_safe(getattr(instance, attr.key))
+        for attr in inspect(instance).mapper.column_attrs
+        if attr.key not in SNAPSHOT_EXCLUDE
+    }
+
+
+@dataclass
+class AuditEvent:
+    actor_id: int
+    action: str
+    entity_type: str
+    entity_id: Optional[int] = None
+    before_json: Optional[dict] = None
+    after_json: Optional[dict] = None
+    ip: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+    def to_row(self) -> dict:
+        return asdict(self)
+
+    def to_json(self) -> str:
+        return json.dumps({**asdict(self), "created_at": self.created_at.isoformat()})
+
+    @classmethod
+    def from_json(cls, line: str) -> "AuditEvent":
+        data = json.loads(line)
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+        return cls(**data)
+
+
+class AuditWriter:
+    """Buffer audit events in memory and insert them in batches off the request path
+
+    Routes call `record()`, which only enqueues. A background task flushes the
+    queue every `flush_interval` seconds (or as soon as a full batch is ready)
+    with one multi-row INSERT. If the queue is full or the database is
+    unavailable, events are appended to a local spill file and replayed on the
+    next successful flush. `stop()` drains everything before shutdown.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        max_queue_size: int = settings.audit_queue_size,
+        batch_size: int = settings.audit_batch_size,
+        flush_interval: float = settings.audit_flush_interval_seconds,
+        spill_path: str = settings.audit_spill_path,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self.encoder = AuditChainEncoder()
+        self._queue: queue.Queue[AuditEvent] = queue.Queue(maxsize=max_queue_size)
+        self._spill_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def record(self, event: AuditEvent) -> None:
+        """Enqueue an audit event (safe to call from sync routes running in threads)"""
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            logger.warning("Audit queue full; spilling event %s to disk", event.action)
+            self._spill([event])
+            return
+        if self._loop is not None and self._queue.qsize() >= self.batch_size:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task and flush every buffered event"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._loop = None
+        await asyncio.to_thread(self.flush_all)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await asyncio.to_thread(self.flush_all)
+            except Exception as e:
+                logger.error("Audit flush failed: %s", e)
+
+    def _drain(self) -> list[AuditEvent]:
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def flush_all(self) -> int:
+        """Write spilled and queued events to the database; returns rows written"""
+        with self._flush_lock:
+            written = self._replay_spill()
+            if written < 0:
+                # Database still unavailable: move the queue to disk as well
+                self._spill(self._drain_all())
+                return 0
+            while batch := self._drain():
+                if not self._insert(batch):
+                    self._spill(batch + self._drain_all())
+                    break
+                written += len(batch)
+            return written
+
+    def _drain_all(self) -> list[AuditEvent]:
+        events = []
+        while batch := self._drain():
+            events.extend(batch)
+        return events
+
+    def _insert(self, batch: list[AuditEvent]) -> bool:
+        from app.models.audit import AuditLog
+
+        db = self.session_factory()
+        try:
+            db.execute(insert(AuditLog), [self.encoder.encode(event.to_row()) for event in batch])
+            db.commit()
+            return True
+        except Exception as e:
+            db.rollback()
+            # Spilled events are re-encoded on replay; don't chain deltas onto them
+            self.encoder.reset()
+            logger.error("Audit insert of %d events failed: %s", len(batch), e)
+            return False
+        finally:
+            db.close()
+
+    def _spill(self, events: list[AuditEvent]) -> None:
+        if not events:
+            return
+        with self._spill_lock:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                f.writelines(event.to_json() + "\n" for event in events)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _replay_spill(self) -> int:
+        """Insert events from the spill file; returns rows written or -1 on failure"""
+        replaying = self.spill_path + ".replaying"
+        with self._spill_lock:
+            if os.path.exists(self.spill_path):
+                if os.path.exists(replaying):
+                    # Left over from an interrupted replay; keep both
+                    with open(self.spill_path, encoding="utf-8") as src, \
+                            open(replaying, "a", encoding="utf-8") as dst:
+                        dst.write(src.read())
+                    os.remove(self.spill_path)
+                else:
+                    os.replace(self.spill_path, replaying)
+            elif not os.path.exists(replaying):
+                return 0
+
+        with open(replaying, encoding="utf-8") as f:
+            events = [AuditEvent.from_json(line) for line in f if line.strip()]
+
+        written = 0
+        for start in range(0, len(events), self.batch_size):
+            batch = events[start:start + self.batch_size]
+            if not self._insert(batch):
+                self._spill(events[start:])
+                os.remove(replaying)
+                return -1
+            written += len(batch)
+        os.remove(replaying)
+        if written:
+            logger.info("Replayed %d spilled audit events", written)
+        return written
+
+
+# Global audit writer
+audit_writer = AuditWriter()
+
+
+def record_audit(
+    actor_id: int,
+    action: str,
+    entity_type: str,
+    entity_id: Optional[int] = None,
+    before: Optional[dict] = None,
+    after: Optional[dict] = None,
+    ip: Optional[str] = None,
+) -> None:
+    """Enqueue an audit log entry for an admin action"""
+    audit_writer.record(AuditEvent(
+        actor_id=actor_id,
+        action=action,
+        entity_type=entity_type,
+        entity_id=entity_id,
+        before_json=before,
+        after_json=after,
+        ip=ip,
+    ))
@@ -0,0 +1,242 @@
+"""Compact encoding for audit before/after snapshots
+
+Instead of two full copies of the entity per event, each audit row stores an
+RFC 6902 JSON Patch (`patch_json`) from its before state to its after state.
+Rows come in two kinds:
+
+- base rows (`before_hash` is NULL) store the full `before_json`; the after
+  state is `before_json` with the patch applied;
+- delta rows store only the patch and `before_hash`, the hash of the state
+  they were applied to, which is the after state of an earlier row for the
+  same (entity_type, entity_id).
+
+The writer emits a base row for the first event it sees for an entity, every
+`audit_snapshot_interval` events, for the first event of each calendar month
+(so a chain never crosses a monthly partition, which is archived as a whole)
+and whenever the incoming before state does not match the last after state
+it wrote (e.g. another process touched the entity in between). Rows written before this encoding (`patch_json` NULL)
+keep full before/after copies and are treated as base rows.
+"""
+import copy
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .config import settings
+
+
+_MISSING = object()
+
+
+def state_hash(state: Any) -> str:
+    canonical = json.dumps(state, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+def _escape(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def make_patch(source: Any, target: Any, path: str = "") -> list[dict]:
+    """RFC 6902 operations turning `source` into `target`
+
+    Objects are diffed key by key; any other change (including lists) is a
+    single replace of the value at that path.
+    """
+    if source == target:
+        return []
+    if not (isinstance(source, dict) and isinstance(target, dict)):
+        return [{"op": "replace", "path": path, "value": target}]
+
+    ops = []
+    for key in source.keys() - target.keys():
+        ops.append({"op": "remove", "path": f"{path}/{_escape(str(key))}"})
+    for key, value in target.items():
+        child = f"{path}/{_escape(str(key))}"
+        if key not in source:
+            ops.append({"op": "add", "path": child, "value": value})
+        else:
+            ops.extend(make_patch(source[key], value, child))
+    return ops
+
+
+def apply_patch(document: Any, ops: Iterable[dict]) -> Any:
+    """Apply RFC 6902 add/remove/replace operations, returning a new document"""
+    document = copy.deepcopy(document)
+    for op in ops:
+        path = op["path"]
+        if path == "":
+            document = None if op["op"] == "remove" else copy.deepcopy(op["value"])
+            continue
+        *parents, last = [_unescape(token) for token in path.split("/")[1:]]
+        container = document
+        for token in parents:
+            container = container[int(token)] if isinstance(container, list) else container[token]
+        if isinstance(container, list):
+            index = len(container) if last == "-" else int(last)
+            if op["op"] == "remove":
+                del container[index]
+            elif op["op"] == "add":
+                container.insert(index, copy.deepcopy(op["value"]))
+            else:
+                container[index] = copy.deepcopy(op["value"])
+        elif op["op"] == "remove":
+            del container[last]
+        else:
+            container[last] = copy.deepcopy(op["value"])
+    return document
+
+
+class AuditChainEncoder:
+    """Turn audit events into base/delta rows, tracking the last state per entity"""
+
+    def __init__(
+        self,
+        snapshot_interval: int = settings.audit_snapshot_interval,
+        cache_size: int = settings.audit_encoder_cache_size,
+    ):
+        self.snapshot_interval = snapshot_interval
+        self.cache_size = cache_size
+        # (entity_type, entity_id) -> (hash of last after state, events since base, (year, month) of base)
+        self._chains: OrderedDict[tuple, tuple[str, int, tuple[int, int]]] = OrderedDict()
+
+    def encode(self, row: dict) -> dict:
+        """Rewrite a row with full before_json/after_json into the compact form"""
+        before, after = row["before_json"], row["after_json"]
+        before_hash = state_hash(before)
+        key = (row["entity_type"], row["entity_id"])
+        month = (row["created_at"].year, row["created_at"].month)
+        chain = self._chains.get(key) if row["entity_id"] is not None else None
+
+        encoded = {**row, "after_json": None, "patch_json": make_patch(before, after)}
+        if chain and chain[0] == before_hash and chain[1] < self.snapshot_interval and chain[2] == month:
+            encoded.update(before_json=None, before_hash=before_hash)
+            since_base = chain[1] + 1
+        else:
+            encoded.update(before_hash=None)
+            since_base = 1
+
+        if row["entity_id"] is not None:
+            self._chains[key] = (state_hash(after), since_base, month)
+            self._chains.move_to_end(key)
+            if len(self._chains) > self.cache_size:
+                self._chains.popitem(last=False)
+        return encoded
+
+    def reset(self) -> None:
+        """Forget chain state (e.g. after a failed insert) so the next events are bases"""
+        self._chains.clear()
+
+
+def _decode_base(row) -> tuple[Any, Any]:
+    if row.patch_json is None:
+        return row.before_json, row.after_json
+    return row.before_json, apply_patch(row.before_json, row.patch_json)
+
+
+class AuditStateResolver:
+    """Reconstruct before/after states for audit rows, loading chains on demand
+
+    Keeps the most recent states seen per entity so that resolving rows in id
+    order (e.g. a CSV export) rarely needs to go back to the database.
+    """
+
+    STATES_PER_ENTITY = 8
+
+    def __init__(self, db: Session, max_entities: int = settings.audit_encoder_cache_size):
+        self.db = db
+        self.max_entities = max_entities
+        self._known: OrderedDict[tuple, OrderedDict[str, Any]] = OrderedDict()
+
+    def _remember(self, key: tuple, *states: Any) -> None:
+        if key[1] is None:
+            return
+        known = self._known.setdefault(key, OrderedDict())
+        self._known.move_to_end(key)
+        for state in states:
+            known[state_hash(state)] = state
+            known.move_to_end(state_hash(state))
+        while len(known) > self.STATES_PER_ENTITY:
+            known.popitem(last=False)
+        if len(self._known) > self.max_entities:
+            self._known.popitem(last=False)
+
+    def _lookup(self, key: tuple, before_hash: str) -> Any:
+        return self._known.get(key, {}).get(before_hash, _MISSING)
+
+    def resolve(self, rows: Iterable) -> dict[int, tuple[Any, Any]]:
+        """Map row id -> (before, after) for rows exposing the AuditLog columns"""
+        from app.models.audit import AuditLog
+
+        resolved: dict[int, tuple[Any, Any]] = {}
+        unresolved: dict[tuple, list] = {}
+        for row in sorted(rows, key=lambda r: r.id):
+            key = (row.entity_type, row.entity_id)
+            if row.before_hash is None:
+                before, after = _decode_base(row)
+            else:
+                before = self._lookup(key, row.before_hash)
+                if before is _MISSING:
+                    unresolved.setdefault(key, []).append(row)
+                    continue
+                after = apply_patch(before, row.patch_json)
+            resolved[row.id] = (before, after)
+            self._remember(key, before, after)
+
+        for (entity_type, entity_id), pending in unresolved.items():
+            resolved.update(self._replay_chain(AuditLog, entity_type, entity_id, pending))
+        return resolved
+
+    def _replay_chain(self, AuditLog, entity_type: str, entity_id: int, pending: list) -> dict:
+        """Replay the entity's rows from earlier base rows until every pending row resolves"""
+        key = (entity_type, entity_id)
+        pending_ids = {row.id for row in pending}
+        entity = (AuditLog.entity_type == entity_type, AuditLog.entity_id == entity_id)
+        columns = (AuditLog.id, AuditLog.before_json, AuditLog.after_json,
+                   AuditLog.patch_json, AuditLog.before_hash)
+
+        upper = pending[-1].id + 1
+        chain: list = []
+        results: dict[int, tuple[Any, Any]] = {}
+        while True:
+            base_id = self.db.execute(
+                select(AuditLog.id).where(*entity, AuditLog.before_hash.is_(None), AuditLog.id < upper)
+                .order_by(AuditLog.id.desc()).limit(1)
+            ).scalar()
+            if base_id is None:
+                break
+            chain = self.db.execute(
+                select(*columns).where(*entity, AuditLog.id >= base_id, AuditLog.id < upper)
+                .order_by(AuditLog.id)
+            ).all() + chain
+            upper = base_id
+
+            states: dict[str, Any] = {}
+            results = {}
+            for row in chain:
+                if row.before_hash is None:
+                    before, after = _decode_base(row)
+                else:
+                    before = states.get(row.before_hash, _MISSING)
+                    if before is _MISSING:
+                        continue
+                    after = apply_patch(before, row.patch_json)
+                states[state_hash(before)] = before
+                states[state_hash(after)] = after
+                if row.id in pending_ids:
+                    results[row.id] = (before, after)
+            if len(results) == len(pending_ids):
+                break
+
+        for before, after in results.values():
+            self._remember(key, before, after)
+        # Rows whose chain is broken (base row missing or corrupted)
+        return {row.id: results.get(row.id, (None, None)) for row in pending}
@@ -26,6 +26,150 @@ class Settings(BaseSettings):
         default="change_this_32_byte_key_for_production",
         description="32-byte key for AES-256 encryption"
     )
+    encryption_key_id: str = Field(default="k1", description="Id stored with rows encrypted by encryption_key")
+    encryption_previous_keys: dict[str, str] = Field(
+        default={},
+        description="Retired keys by id (JSON), kept until scripts/reencrypt_credentials.py has run"
+    )
+    reencrypt_chunk_size: int = Field(default=1000)
+    reencrypt_workers: int = Field(default=4)
+    
+    # Password hashing (Argon2id cost; see benchmarks.security_primitives)
+    argon2_time_cost: int = Field(default=3)
+    argon2_memory_cost: int = Field(default=65536, description="Memory cost in KiB")
+    argon2_parallelism: int = Field(default=4)
+    
+    # Admin
+    admin_user_count_cap: int = Field(
+        default=10000,
+        description="Exact user counts stop here; larger result sets report a planner estimate"
+    )
+    
+    # Audit log writer
+    audit_queue_size: int = Field(default=10000)
+    audit_batch_size: int = Field(default=500)
+    audit_flush_interval_seconds: float = Field(default=1.0)
+    audit_spill_path: str = Field(
+        default="audit_spill.jsonl",
+        description="Local file holding audit events while the database is unavailable"
+    )
+    
+    audit_snapshot_interval: int = Field(
+        default=20,
+        description="Store a full base snapshot at least every N audit events per entity"
+    )
+    audit_encoder_cache_size: int = Field(default=10000, description="Entities tracked for delta encoding")
+    
+    # Audit log partitions (monthly; see scripts/audit_partitions.py)
+    audit_partitions_ahead: int = Field(default=3, description="Upcoming monthly partitions to pre-create")
+    audit_retention_months: int = Field(default=24)
+    audit_archive_dir: str = Field(default="audit_archive")
+    
+    # Language monitoring (flag-only)
+    moderation_rules_path: str = Field(default="moderation_rules.json")
+    moderation_reload_interval_seconds: float = Field(
+        default=5.0,
+        description="How often to check the rules file for changes"
+    )
+    
+    # Moderation workers (Redis Stream consumer group; see scripts/moderation_worker.py)
+    moderation_stream_key: str = Field(default="moderation:messages")
+    moderation_stream_maxlen: int = Field(default=1000000, description="Approximate cap on stream length")
+    moderation_consumer_group: str = Field(default="moderation")
+    moderation_workers: int = Field(default=4, description="Worker processes started by the worker command")
+    moderation_batch_size: int = Field(default=100)
+    moderation_block_ms: int = Field(default=1000, description="How long XREADGROUP waits for new entries")
+    moderation_claim_idle_ms: int = Field(
+        default=60000,
+        description="Entries pending this long (crashed worker) are claimed by another worker"
+    )
+    moderation_max_attempts: int = Field(default=5, description="Attempts before an entry is dead-lettered")
+    moderation_retry_backoff_seconds: float = Field(default=2.0)
+    moderation_user_rate_limit: int = Field(
+        default=30,
+        description="Messages per user scanned per window; the rest are deferred to the next window"
+    )
+    moderation_user_rate_window_seconds: int = Field(default=10)
+    
+    # Rate limiting (token buckets in Redis; "N/second|minute|hour|day" or "N/<seconds>")
+    rate_limit_enabled: bool = Field(default=True)
+    rate_limit_login: str = Field(default="10/minute", description="Per client IP")
+    rate_limit_password_reset: str = Field(default="5/hour", description="Per client IP")
+    rate_limit_ws_message: str = Field(default="30/10s", description="Per user")
+    rate_limit_ws_typing: str = Field(default="20/10s", description="Per user")
+    rate_limit_lease_fraction: float = Field(
+        default=0.1,
+        description="Share of a bucket a process may lease and spend without asking Redis"
+    )
+    rate_limit_lease_ttl_seconds: float = Field(default=1.0)
+    rate_limit_local_cache_size: int = Field(default=10000, description="Buckets cached per process")
+    
+    # Profile response cache (ETag + Redis)
+    profile_cache_ttl_seconds: int = Field(default=3600)
+    profile_batch_max_ids: int = Field(default=500, description="Most ids accepted by GET /profiles?ids=")
+    
+    # Media storage (content-addressed files on local disk)
+    media_root: str = Field(default="media")
+    media_workers: int = Field(default=2, description="Processes for image decoding and resizing")
+    media_max_upload_bytes: int = Field(default=10 * 1024 * 1024)
+    media_max_image_pixels: int = Field(
+        default=40_000_000,
+        description="Images declaring more pixels are rejected before decoding"
+    )
+    screenshot_thumbnail_width: int = Field(default=320)
+    screenshot_feed_max_items: int = Field(default=200, description="Ids kept per viewer feed list")
+    screenshot_feed_fanout_limit: int = Field(
+        default=500,
+        description="Owners visible to more users than this are merged in at read time instead"
+    )
+    screenshot_feed_ttl_seconds: int = Field(default=86400, description="Feeds are rebuilt from Postgres after this")
+    avatar_sizes: list[int] = Field(default=[32, 64, 128, 256], description="Square variant sizes in pixels")
+    avatar_cache_max_bytes: int = Field(
+        default=512 * 1024 * 1024,
+        description="Disk budget for avatar variants; least recently used are evicted"
+    )
+    audio_max_bytes: int = Field(default=20 * 1024 * 1024, description="Largest audio note")
+    audio_upload_max_chunk_bytes: int = Field(default=1024 * 1024)
+    audio_upload_ttl_seconds: int = Field(default=86400, description="Unfinished uploads are deleted after this")
+    audio_upload_stale_chunk_seconds: int = Field(
+        default=60,
+        description="A chunk write idle this long is treated as abandoned and may be retried"
+    )
+    media_accel_redirect_prefix: str = Field(
+        default="",
+        description="Internal nginx location mapped to MEDIA_ROOT; when set, file bodies are sent by nginx via X-Accel-Redirect"
+    )
+    
+    # Live streams
+    stream_send_timeout_seconds: float = Field(
+        default=2.0,
+        description="Viewers that can't take a frame within this are disconnected"
+    )
+    stream_reaction_flush_ms: int = Field(default=150, description="Reaction delta frame interval")
+    stream_reaction_max_per_second: int = Field(default=10, description="Per viewer; extra reactions are dropped")
+    stream_viewer_flush_ms: int = Field(default=250, description="Viewer list delta frame interval")
+    
+    # Call signaling (WebRTC offer/answer/ICE relay; media is peer to peer)
+    call_max_peers: int = Field(default=6, description="Peers allowed in one call room")
+    call_ice_batch_ms: int = Field(default=20, description="Trickled ICE candidates are coalesced for this long")
+    call_registry_shards: int = Field(default=64, description="Room registry shards (each has its own join/leave lock)")
+    
+    # Parent dashboard rollups (hourly per-user activity)
+    activity_flush_interval_seconds: float = Field(
+        default=30.0,
+        description="How often in-memory activity counters are written to user_activity_hourly"
+    )
+    
+    # WebSocket session accounting (time online; see user_sessions)
+    session_flush_interval_seconds: float = Field(default=60.0)
+    session_merge_gap_seconds: float = Field(
+        default=30.0,
+        description="A reconnect within this long of the last disconnect continues the same session"
+    )
+    session_heartbeat_timeout_seconds: float = Field(
+        default=60.0,
+        description="An abnormally closed connection counts as gone since its last heartbeat, at most this long"
+    )
     
     # CORS
     cors_origins: list[str] = Field(default=["http://localhost:3000", "http://127.0.0.1:3000"])
@@ -34,6 +178,13 @@ class Settings(BaseSettings):
     environment: str = Field(default="development")
     debug: bool = Field(default=False)
     
+    # Query profiling (development/staging only)
+    query_profiler_enabled: bool = Field(default=False)
+    query_profiler_n_plus_one_threshold: int = Field(
+        default=5,
+        description="Log a statement as a likely N+1 once it repeats this many times in one request"
+    )
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,46 @@
+from typing import Optional
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag (RFC 9110 13.1.2)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == target for candidate in if_none_match.split(","))
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """Inclusive (start, end) of a single `bytes=` range, or None to send the whole file
+
+    Malformed headers and multi-range requests are ignored (RFC 9110 14.2
+    lets a server answer those with the full representation).
+    """
+    if not range_header:
+        return None
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = (part.strip() for part in spec.partition("-"))
+    if not sep or not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+        return None
+    if first:
+        start = int(first)
+        end = int(last) if last else size - 1
+        if start >= size:
+            raise RangeNotSatisfiable(range_header)
+        if end < start:
+            return None
+    else:
+        # Suffix range: the final N bytes
+        if int(last) == 0:
+            raise RangeNotSatisfiable(range_header)
+        start, end = max(size - int(last), 0), size - 1
+    if start >= size:
+        raise RangeNotSatisfiable(range_header)
+    return start, min(end, size - 1)
@@ -0,0 +1,65 @@
+import base64
+from typing import Optional, Union
+
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+
+from .config import settings
+
+
+def derive_fernet_key(secret: str) -> bytes:
+    """Fernet key from a configured secret (same derivation as the original single key)"""
+    return base64.urlsafe_b64encode(secret.encode()[:32].ljust(32))
+
+
+class Keyring:
+    """Named Fernet keys: encrypt with the primary, decrypt with any
+
+    Every ciphertext is stored next to the id of the key that produced it, so
+    decryption goes straight to the right key. Rows without a key id (written
+    before key ids existed) fall back to trying every key via MultiFernet.
+    """
+
+    def __init__(self, primary_id: str, secrets: dict[str, str]):
+        if primary_id not in secrets:
+            raise ValueError(f"Primary encryption key {primary_id!r} is not configured")
+        self.primary_id = primary_id
+        self._fernets = {key_id: Fernet(derive_fernet_key(secret)) for key_id, secret in secrets.items()}
+        # Primary first: MultiFernet encrypts and rotates with the first key
+        self._multi = MultiFernet(
+            [self._fernets[primary_id]] + [f for key_id, f in self._fernets.items() if key_id != primary_id]
+        )
+
+    @classmethod
+    def from_settings(cls) -> "Keyring":
+        secrets = dict(settings.encryption_previous_keys)
+        secrets[settings.encryption_key_id] = settings.encryption_key
+        return cls(settings.encryption_key_id, secrets)
+
+    @property
+    def key_ids(self) -> list[str]:
+        return list(self._fernets)
+
+    def encrypt(self, data: Union[str, bytes]) -> tuple[str, bytes]:
+        """(key id, token) using the primary key"""
+        if isinstance(data, str):
+            data = data.encode()
+        return self.primary_id, self._fernets[self.primary_id].encrypt(data)
+
+    def decrypt(self, token: Union[str, bytes], key_id: Optional[str] = None) -> bytes:
+        if isinstance(token, str):
+            token = token.encode()
+        fernet = self._fernets.get(key_id) if key_id else None
+        if fernet is not None:
+            try:
+                return fernet.decrypt(token)
+            except InvalidToken:
+                pass  # mislabeled row; fall back to trying every key
+        return self._multi.decrypt(token)
+
+    def rotate(self, token: Union[str, bytes], key_id: Optional[str] = None) -> tuple[str, bytes]:
+        """Re-encrypt a token under the primary key; (new key id, new token)"""
+        return self.encrypt(self.decrypt(token, key_id))
+
+
+# Global keyring
+keyring = Keyring.from_settings()
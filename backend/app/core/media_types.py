@@ -0,0 +1,65 @@
+import mimetypes
+import re
+from typing import Optional
+
+
+IMAGE_TYPES = {
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+}
+EXTENSIONS = {"png": "png", "jpeg": "jpg", "webp": "webp"}
+
+# Bytes needed to identify every supported format
+SNIFF_BYTES = 16
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Image format from the file's leading bytes, ignoring the client's Content-Type"""
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+AUDIO_TYPES = {
+    "ogg": "audio/ogg",
+    "webm": "audio/webm",
+    "mp4": "audio/mp4",
+    "mpeg": "audio/mpeg",
+    "wav": "audio/wav",
+}
+AUDIO_EXTENSIONS = {"ogg": "ogg", "webm": "webm", "mp4": "m4a", "mpeg": "mp3", "wav": "wav"}
+
+
+def sniff_audio_type(head: bytes) -> Optional[str]:
+    """Audio container from the file's leading bytes"""
+    if head.startswith(b"OggS"):
+        return "ogg"
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        return "webm"  # EBML header (MediaRecorder in Chrome/Firefox)
+    if head[4:8] == b"ftyp":
+        return "mp4"  # MediaRecorder in Safari
+    if head.startswith(b"ID3") or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        return "mpeg"
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return "wav"
+    return None
+
+
+# Stored names: <sha256 hex>.<ext>, optionally with a variant before the extension
+MEDIA_NAME_RE = re.compile(r"^[0-9a-f]{64}(\.[a-z0-9]+){1,2}$")
+
+
+def media_type_for(name: str, kind: Optional[str] = None) -> str:
+    if kind == "audio":
+        # .webm would otherwise be served as video/webm
+        audio_type = {ext: t for t, ext in AUDIO_EXTENSIONS.items()}.get(name.rsplit(".", 1)[-1])
+        if audio_type:
+            return AUDIO_TYPES[audio_type]
+    if name.endswith(".webp"):
+        return "image/webp"  # missing from older mimetypes tables
+    return mimetypes.guess_type(name)[0] or "application/octet-stream"
@@ -0,0 +1,106 @@
+from typing import AsyncIterator, Callable, Optional
+
+from multipart.multipart import MultipartParser, parse_options_header
+
+
+class MultipartError(ValueError):
+    pass
+
+
+class StreamingMultipart:
+    """Parse a multipart/form-data body chunk by chunk without buffering it
+
+    File parts are written straight to the sink returned by `open_file(name)`
+    as bytes arrive, so memory stays at one network chunk per upload no
+    matter how large the file is. Other fields are collected as text, up to
+    `max_fields` of them at `max_field_bytes` each. A body longer than
+    `max_body_bytes` raises OverflowError as soon as it goes past the limit,
+    whether or not the request declared its length.
+    """
+
+    def __init__(
+        self,
+        content_type: str,
+        open_file: Callable[[str], object],
+        max_field_bytes: int = 4096,
+        max_fields: int = 32,
+        max_body_bytes: Optional[int] = None,
+    ):
+        mime, options = parse_options_header(content_type)
+        if mime != b"multipart/form-data" or b"boundary" not in options:
+            raise MultipartError("Expected multipart/form-data")
+        self.open_file = open_file
+        self.max_field_bytes = max_field_bytes
+        self.max_fields = max_fields
+        self.max_body_bytes = max_body_bytes
+        self.body_bytes = 0
+        self._field_count = 0
+        self.fields: dict[str, str] = {}
+        self.files: dict[str, object] = {}
+
+        self._header_field = b""
+        self._header_value = b""
+        self._headers: dict[bytes, bytes] = {}
+        self._name: Optional[str] = None
+        self._sink = None
+        self._field_buffer = bytearray()
+        self._parser = MultipartParser(options[b"boundary"], {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    async def consume(self, stream: AsyncIterator[bytes]) -> None:
+        async for chunk in stream:
+            if chunk:
+                self.body_bytes += len(chunk)
+                if self.max_body_bytes is not None and self.body_bytes > self.max_body_bytes:
+                    raise OverflowError(f"Body exceeds {self.max_body_bytes} bytes")
+                self._parser.write(chunk)
+        self._parser.finalize()
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+        self._name = None
+        self._sink = None
+        self._field_buffer = bytearray()
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if b"name" not in options:
+            raise MultipartError("Part without a name")
+        self._name = options[b"name"].decode("latin-1")
+        if b"filename" in options:
+            self._sink = self.open_file(self._name)
+            self.files[self._name] = self._sink
+            return
+        self._field_count += 1
+        if self._field_count > self.max_fields:
+            raise MultipartError(f"More than {self.max_fields} fields")
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._sink is not None:
+            self._sink.write(data[start:end])
+            return
+        self._field_buffer += data[start:end]
+        if len(self._field_buffer) > self.max_field_bytes:
+            raise MultipartError(f"Field {self._name!r} is too large")
+
+    def _on_part_end(self) -> None:
+        if self._sink is None and self._name is not None:
+            self.fields[self._name] = self._field_buffer.decode("utf-8", errors="replace")
@@ -0,0 +1,61 @@
+import base64
+import json
+from typing import Any, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Query
+
+
+def encode_cursor(values: dict[str, Any]) -> str:
+    """Encode keyset position as an opaque URL-safe cursor"""
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        values = None
+    if not isinstance(values, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+    return values
+
+
+def escape_like(term: str) -> str:
+    """Escape LIKE wildcards in user-supplied search terms (use with escape='\\\\')"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def bounded_count(query: Query, cap: int) -> tuple[int, bool]:
+    """Count rows matching `query`, stopping after `cap`
+
+    Returns (total, is_estimate). When more than `cap` rows match, PostgreSQL's
+    planner estimate is returned instead of scanning the whole result set.
+    """
+    limited = query.order_by(None).with_entities(text("1")).limit(cap + 1).subquery()
+    session = query.session
+    count = session.execute(select(func.count()).select_from(limited)).scalar_one()
+    if count <= cap:
+        return count, False
+    return max(_planner_estimate(query) or cap, cap), True
+
+
+def _planner_estimate(query: Query) -> Optional[int]:
+    session = query.session
+    bind = session.get_bind()
+    if bind.dialect.name != "postgresql":
+        return None
+    statement = query.order_by(None).statement.compile(
+        dialect=bind.dialect, compile_kwargs={"literal_binds": True}
+    )
+    plan = session.execute(text(f"EXPLAIN (FORMAT JSON) {statement}")).scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
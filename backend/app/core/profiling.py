@@ -0,0 +1,145 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+
+
+logger = logging.getLogger(__name__)
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*(?:\?|%\([^)]*\)s|:\w+|%s)(?:\s*,\s*(?:\?|%\([^)]*\)s|:\w+|%s))*\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Normalize a SQL statement so repeated per-row queries collapse together"""
+    normalized = _LITERAL_RE.sub("?", statement)
+    normalized = _IN_LIST_RE.sub("(?)", normalized)
+    return _WHITESPACE_RE.sub(" ", normalized).strip()
+
+
+@dataclass
+class QueryStats:
+    """Queries issued while handling a single request or WebSocket event"""
+    label: str
+    count: int = 0
+    total_time: float = 0.0
+    fingerprints: Counter = field(default_factory=Counter)
+    # Enclosing stats (e.g. a test's assert_max_queries around a profiled request)
+    parent: Optional["QueryStats"] = field(default=None, repr=False)
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        self.fingerprints[fingerprint(statement)] += 1
+        if self.parent is not None:
+            self.parent.record(statement, elapsed)
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements executed at least `threshold` times (likely N+1 patterns)"""
+        return [(fp, n) for fp, n in self.fingerprints.most_common() if n >= threshold]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.total_time * 1000:.2f};desc="{self.count} queries"'
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info["query_start_time"].pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - start)
+
+
+def _handle_error(context):
+    # after_cursor_execute never runs for a failed statement: drop its start time
+    conn = context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
+
+
+def install_query_profiler(engine: Engine) -> None:
+    """Attach the cursor execute listeners to an engine (idempotent)"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+def _report(stats: QueryStats) -> None:
+    for statement, count in stats.repeated(settings.query_profiler_n_plus_one_threshold):
+        logger.warning(
+            "Possible N+1 in %s: statement executed %d times: %s",
+            stats.label, count, statement
+        )
+
+
+@contextmanager
+def profile_queries(label: str):
+    """Collect query statistics for the enclosed block (e.g. one WebSocket event)"""
+    stats = QueryStats(label=label, parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+        _report(stats)
+
+
+@contextmanager
+def assert_max_queries(n: int, engine: Optional[Engine] = None):
+    """Fail if the enclosed block issues more than `n` queries on `engine`
+
+    Installs the profiler listeners on `engine` (the application engine by
+    default), so it works whether or not QUERY_PROFILER_ENABLED is set.
+    """
+    if engine is None:
+        from .database import engine
+    install_query_profiler(engine)
+    stats = QueryStats(label="assert_max_queries", parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+    if stats.count > n:
+        details = "\n".join(f"  {count}x {fp}" for fp, count in stats.fingerprints.most_common())
+        raise AssertionError(f"Expected at most {n} queries, got {stats.count}:\n{details}")
+
+
+class QueryProfilerMiddleware:
+    """Record per-request query count/time and expose it as a Server-Timing header"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with profile_queries(f"{scope['method']} {scope['path']}") as stats:
+            async def send_with_timing(message: Message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", stats.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
@@ -0,0 +1,196 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import redis
+
+from .config import settings
+
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_POLICY_RE = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day|s)?\s*$")
+
+# Token bucket: KEYS[1] = bucket hash; ARGV = capacity, refill per second, cost, lease.
+# Refills from the elapsed server time, then grants `cost` tokens, or a larger
+# `lease` when the bucket is more than half full so the caller can spend it
+# locally. Returns {granted, retry_after_ms}.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local lease = tonumber(ARGV[4])
+local now = redis.call('TIME')
+now = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate / 1000)
+
+local granted = 0
+local retry_after = 0
+if tokens >= cost then
+    granted = cost
+    if lease > cost and tokens - lease >= capacity / 2 then
+        granted = lease
+    end
+    tokens = tokens - granted
+else
+    retry_after = math.ceil((cost - tokens) * 1000 / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity * 1000 / rate) + 1000)
+return {granted, retry_after}
+"""
+
+
+@dataclass(frozen=True)
+class RatePolicy:
+    """`capacity` requests per `period` seconds, refilled continuously"""
+    name: str
+    capacity: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    @classmethod
+    def parse(cls, name: str, spec: str) -> "RatePolicy":
+        """Parse "10/minute", "3/hour", "20/10s" or "20/10" (seconds)"""
+        match = _POLICY_RE.match(spec)
+        if not match or int(match.group(1)) <= 0:
+            raise ValueError(f"Invalid rate limit {spec!r} for {name}")
+        count, multiplier, unit = match.groups()
+        period = (int(multiplier) if multiplier else 1) * PERIODS.get(unit or "s", 1)
+        return cls(name, int(count), float(period))
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    retry_after: float = 0.0  # seconds
+
+
+def configured_policies() -> dict[str, RatePolicy]:
+    specs = {
+        "auth.login": settings.rate_limit_login,
+        "auth.password_reset": settings.rate_limit_password_reset,
+        "ws.message": settings.rate_limit_ws_message,
+        "ws.typing": settings.rate_limit_ws_typing,
+    }
+    return {name: RatePolicy.parse(name, spec) for name, spec in specs.items()}
+
+
+class _LocalBucket:
+    __slots__ = ("tokens", "expires_at", "blocked_until")
+
+    def __init__(self):
+        self.tokens = 0
+        self.expires_at = 0.0
+        self.blocked_until = 0.0
+
+
+class RateLimiter:
+    """Token-bucket rate limiter shared across processes through Redis
+
+    The bucket itself lives in Redis and is updated atomically by a Lua
+    script. Each process keeps a small local cache in front of it:
+
+    * callers well under their limit are granted a lease of several tokens
+      and spend them locally, so most requests make no Redis round trip;
+    * after a rejection the caller is blocked locally until the Redis bucket
+      would have refilled, so repeated rejections are free.
+
+    Leased tokens expire after `lease_ttl` seconds, which bounds how far a
+    burst spread over many processes can overshoot the limit. If Redis is
+    unavailable the limiter fails open.
+    """
+
+    def __init__(
+        self,
+        redis_client=None,
+        policies: Optional[dict[str, RatePolicy]] = None,
+        lease_fraction: float = settings.rate_limit_lease_fraction,
+        lease_ttl: float = settings.rate_limit_lease_ttl_seconds,
+        max_local_keys: int = settings.rate_limit_local_cache_size,
+        enabled: bool = settings.rate_limit_enabled,
+    ):
+        self.redis = redis_client or redis.from_url(str(settings.redis_url))
+        self.policies = policies if policies is not None else configured_policies()
+        self.lease_fraction = lease_fraction
+        self.lease_ttl = lease_ttl
+        self.max_local_keys = max_local_keys
+        self.enabled = enabled
+        self._script = self.redis.register_script(TOKEN_BUCKET_LUA)
+        self._local: OrderedDict[str, _LocalBucket] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _local_bucket(self, key: str) -> _LocalBucket:
+        bucket = self._local.get(key)
+        if bucket is None:
+            bucket = self._local[key] = _LocalBucket()
+            if len(self._local) > self.max_local_keys:
+                self._local.popitem(last=False)
+        else:
+            self._local.move_to_end(key)
+        return bucket
+
+    def hit(self, policy_name: str, identity) -> RateLimitResult:
+        """Consume one token for `identity` under the named policy"""
+        policy = self.policies.get(policy_name)
+        if not self.enabled or policy is None:
+            return RateLimitResult(True)
+        key = f"ratelimit:{policy.name}:{identity}"
+        now = time.monotonic()
+
+        with self._lock:
+            bucket = self._local_bucket(key)
+            if bucket.blocked_until > now:
+                return RateLimitResult(False, bucket.blocked_until - now)
+            if bucket.tokens > 0 and bucket.expires_at > now:
+                bucket.tokens -= 1
+                return RateLimitResult(True)
+
+        lease = max(1, int(policy.capacity * self.lease_fraction))
+        try:
+            granted, retry_after_ms = self._script(keys=[key], args=[policy.capacity, policy.rate, 1, lease])
+        except redis.RedisError as e:
+            logger.warning("Rate limiter unavailable, allowing %s: %s", key, e)
+            return RateLimitResult(True)
+
+        with self._lock:
+            bucket = self._local_bucket(key)
+            if not granted:
+                bucket.tokens = 0
+                bucket.blocked_until = now + retry_after_ms / 1000
+                return RateLimitResult(False, retry_after_ms / 1000)
+            bucket.tokens = int(granted) - 1
+            bucket.expires_at = now + self.lease_ttl
+        return RateLimitResult(True)
+
+
+# Inbound WebSocket frame types limited under the "ws.<type>" policies
+RATE_LIMITED_EVENTS = {"message", "typing"}
+
+
+def rate_limit_error(event: str, result: RateLimitResult) -> dict:
+    """WebSocket error frame sent instead of handling a rate-limited event"""
+    return {
+        "type": "error",
+        "code": "rate_limited",
+        "event": event,
+        "message": "Too many messages, slow down",
+        "retry_after": round(result.retry_after, 3),
+    }
+
+
+# Global rate limiter
+rate_limiter = RateLimiter()
@@ -2,19 +2,20 @@ from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from cryptography.fernet import Fernet
-import base64
 import os
 
 from .config import settings
+from .keyring import keyring
 
 
 # Password hashing
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
-
-# Encryption for sensitive data
-encryption_key = base64.urlsafe_b64encode(settings.encryption_key.encode()[:32].ljust(32))
-cipher_suite = Fernet(encryption_key)
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=settings.argon2_time_cost,
+    argon2__memory_cost=settings.argon2_memory_cost,
+    argon2__parallelism=settings.argon2_parallelism,
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -56,13 +57,11 @@ def verify_token(token: str) -> Optional[dict]:
         return None
 
 
-def encrypt_data(data: str) -> tuple[bytes, bytes]:
-    """Encrypt sensitive data with AES-256"""
-    encrypted_data = cipher_suite.encrypt(data.encode())
-    return encrypted_data
+def encrypt_data(data: str) -> tuple[str, bytes]:
+    """Encrypt sensitive data with the primary key; returns (key id, ciphertext)"""
+    return keyring.encrypt(data)
 
 
-def decrypt_data(encrypted_data: bytes) -> str:
-    """Decrypt sensitive data"""
-    decrypted_data = cipher_suite.decrypt(encrypted_data)
-    return decrypted_data.decode()
\ No newline at end of file
+def decrypt_data(encrypted_data: bytes, key_id: Optional[str] = None) -> str:
+    """Decrypt sensitive data, using the stored key id when there is one"""
+    return keyring.decrypt(encrypted_data, key_id).decode()
\ No newline at end of file
@@ -1,5 +1,6 @@
 from fastapi import WebSocket, WebSocketDisconnect, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 import json
 import redis
 import asyncio
@@ -9,6 +10,7 @@ from .database import get_db
 from .config import settings
 from .security import verify_token
 from app.models.user import User
+from app.services.session_tracker import session_tracker
 
 
 class ConnectionManager:
@@ -22,6 +24,7 @@ class ConnectionManager:
         if user_id not in self.active_connections:
             self.active_connections[user_id] = []
         self.active_connections[user_id].append(websocket)
+        session_tracker.connect(user_id)
         
         # Set user as online
         self.redis_client.setex(f"ws_online:{user_id}", 300, "online")
@@ -29,9 +32,11 @@ class ConnectionManager:
         # Subscribe to user's personal channel
         await self._subscribe_to_user_channel(user_id)
     
-    def disconnect(self, websocket: WebSocket, user_id: int):
-        if user_id in self.active_connections:
+    def disconnect(self, websocket: WebSocket, user_id: int, abnormal: bool = False):
+        # A failed send and the handler's own cleanup can both disconnect a socket
+        if websocket in self.active_connections.get(user_id, ()):
             self.active_connections[user_id].remove(websocket)
+            session_tracker.disconnect(user_id, abnormal)
             if not self.active_connections[user_id]:
                 del self.active_connections[user_id]
                 # Remove online status if no more connections
@@ -48,7 +53,7 @@ class ConnectionManager:
                 try:
                     await connection.send_json(message)
                 except:
-                    self.disconnect(connection, user_id)
+                    self.disconnect(connection, user_id, abnormal=True)
     
     async def broadcast_to_conversation(self, conversation_id: int, message: dict, db: Session):
         """Broadcast message to all users in a conversation"""
@@ -110,7 +115,8 @@ async def websocket_auth(websocket: WebSocket, db: Session):
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
             return None
         
-        user = get_user_from_token(token, db)
+        # The user lookup blocks; keep it off the event loop
+        user = await run_in_threadpool(get_user_from_token, token, db)
         if not user:
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
             return None
@@ -12,11 +12,8 @@ from app.schemas.auth import TokenData
 security = HTTPBearer()
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user from JWT token"""
+def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> int:
+    """User id from the JWT alone, for routes that can answer without loading the user"""
     token = credentials.credentials
     payload = verify_token(token)
     
@@ -35,6 +32,24 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    return user_id
+
+
+def ensure_user_exists(db: Session, user_id: int) -> None:
+    """401 like get_current_user for a valid token whose user was deleted"""
+    if db.query(User.id).filter(User.id == user_id).first() is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def get_current_user(
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get current authenticated user from JWT token"""
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(
@@ -0,0 +1,22 @@
+import math
+
+from fastapi import HTTPException, Request, status
+
+from app.core.rate_limit import rate_limiter
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(policy: str):
+    """Dependency rejecting callers over `policy` with 429 before the route runs"""
+    def check(request: Request) -> None:
+        result = rate_limiter.hit(policy, client_ip(request))
+        if not result.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please try again later",
+                headers={"Retry-After": str(max(1, math.ceil(result.retry_after)))},
+            )
+    return check
@@ -1,8 +1,18 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core.audit import audit_writer
 from app.core.config import settings
-from app.routes import auth, profile
+from app.core.database import engine
+from app.core.profiling import QueryProfilerMiddleware, install_query_profiler
+from app.routes import admin, audio_uploads, auth, calls, media, messages, parent, profile, screenshots, streams
+from app.services.activity_rollup import activity_rollup
+from app.services.call_signaling import call_signaling
+from app.services.media_store import shutdown_media_pool
+from app.services.session_tracker import session_tracker
+from app.services.stream_hub import stream_hub
+from app.services.stream_reactions import reaction_aggregator
+from app.services.stream_viewers import viewer_roster
 
 
 app = FastAPI(
@@ -20,9 +30,47 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in SQL query profiling (Server-Timing header + N+1 warnings)
+if settings.query_profiler_enabled:
+    install_query_profiler(engine)
+    app.add_middleware(QueryProfilerMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(profile.router)
+app.include_router(admin.router)
+app.include_router(parent.router)
+app.include_router(screenshots.router)
+app.include_router(media.router)
+app.include_router(audio_uploads.router)
+app.include_router(streams.router)
+app.include_router(calls.router)
+app.include_router(messages.router)
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    audit_writer.start()
+    activity_rollup.start()
+    session_tracker.start()
+    stream_hub.start()
+    reaction_aggregator.start()
+    viewer_roster.start()
+    call_signaling.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    # Flush buffered audit events before the process exits
+    await audit_writer.stop()
+    # Open sessions are closed first so their time online reaches the rollup
+    await session_tracker.stop()
+    await activity_rollup.stop()
+    await reaction_aggregator.stop()
+    await viewer_roster.stop()
+    await stream_hub.stop()
+    await call_signaling.stop()
+    shutdown_media_pool()
 
 
 @app.get("/")
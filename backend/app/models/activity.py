@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
+
+from app.core.database import Base
+
+
+class UserActivityHourly(Base):
+    """Per-user activity for one UTC hour, maintained by the activity rollup"""
+    __tablename__ = "user_activity_hourly"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    hour = Column(DateTime, primary_key=True)
+    messages_sent = Column(Integer, nullable=False, default=0)
+    conversations_active = Column(Integer, nullable=False, default=0)
+    seconds_online = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<UserActivityHourly user:{self.user_id} {self.hour:%Y-%m-%d %H}:00>"
+
+
+class UserActivityConversation(Base):
+    """Conversations already counted in `conversations_active` for a recent hour
+    
+    Lets every worker count distinct conversations exactly; rows are pruned
+    once their hour can no longer receive events.
+    """
+    __tablename__ = "user_activity_conversations"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    hour = Column(DateTime, primary_key=True)
+    conversation_id = Column(Integer, ForeignKey("conversations.id", ondelete="CASCADE"), primary_key=True)
+    
+    __table_args__ = (
+        Index("ix_user_activity_conversations_hour", "hour"),
+    )
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -6,6 +7,14 @@ from app.core.database import Base
 
 
 class AuditLog(Base):
+    """Append-only admin activity log
+
+    On PostgreSQL the table is range-partitioned by month on created_at;
+    partitions are managed by migrations and scripts/audit_partitions.py
+    rather than metadata.create_all. The mapper keys rows on `id` alone (ids
+    come from one sequence), while the database primary key is
+    (id, created_at) because it must include the partition key.
+    """
     __tablename__ = "audit_logs"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -13,13 +22,27 @@ class AuditLog(Base):
     action = Column(String, nullable=False)  # e.g., "user_created", "account_approved"
     entity_type = Column(String, nullable=False)  # e.g., "user", "conversation"
     entity_id = Column(Integer, nullable=True)  # ID of the affected entity
-    before_json = Column(JSON, nullable=True)  # State before action
-    after_json = Column(JSON, nullable=True)  # State after action
+    # Snapshots are stored compactly (see app.core.audit_encoding); use
+    # AuditStateResolver to read the before/after states of a row
+    before_json = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)  # Base rows: state before action
+    after_json = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)  # Legacy rows only
+    patch_json = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)  # RFC 6902 patch before -> after
+    before_hash = Column(String(16), nullable=True)  # Delta rows: hash of the state the patch applies to
     ip = Column(String, nullable=True)  # IP address of actor
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
     # Relationships
     actor = relationship("User")
     
+    __table_args__ = (
+        # Date-range scans (export, filters) on the append-ordered table
+        Index("ix_audit_logs_created_at_brin", "created_at", postgresql_using="brin"),
+        # Ordered keyset pagination in the admin log view
+        Index("ix_audit_logs_created_at_id", "created_at", "id"),
+        Index("ix_audit_logs_actor_id", "actor_id"),
+        # Entity history and snapshot chain replay
+        Index("ix_audit_logs_entity", "entity_type", "entity_id", "id"),
+    )
+    
     def __repr__(self):
         return f"<AuditLog {self.action} by user:{self.actor_id}>"
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -47,5 +47,10 @@ class ConversationMember(Base):
     conversation = relationship("Conversation", back_populates="members")
     user = relationship("User")
     
+    __table_args__ = (
+        # "Which conversations is this user in" (visibility checks, conversation lists)
+        Index("ix_conversation_members_user_id", "user_id", "conversation_id"),
+    )
+    
     def __repr__(self):
         return f"<ConversationMember user:{self.user_id} in conv:{self.conversation_id}>"
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -14,6 +14,8 @@ class Message(Base):
     sender_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     type = Column(Enum(MessageType), nullable=False, default=MessageType.TEXT)
     content = Column(Text, nullable=True)  # For text messages
+    # content_tsv (tsvector generated from content) exists on PostgreSQL only and
+    # is not mapped; see app.services.message_search
     media_url = Column(String, nullable=True)  # For audio/image messages
     created_at = Column(DateTime, default=datetime.utcnow)
     
@@ -21,5 +23,20 @@ class Message(Base):
     conversation = relationship("Conversation", back_populates="messages")
     sender = relationship("User")
     
+    __table_args__ = (
+        # Substring fallback for message search (requires pg_trgm)
+        Index(
+            "ix_messages_content_trgm", "content",
+            postgresql_using="gin", postgresql_ops={"content": "gin_trgm_ops"}
+        ),
+        # Newest-first keyset scans within a conversation
+        Index("ix_messages_conversation_id_id", "conversation_id", "id"),
+        # Access checks for /media/audio files (only media messages are indexed)
+        Index(
+            "ix_messages_media_url", "media_url",
+            postgresql_where=text("media_url IS NOT NULL")
+        ),
+    )
+    
     def __repr__(self):
         return f"<Message {self.id} ({self.type}) in conv:{self.conversation_id}>"
\ No newline at end of file
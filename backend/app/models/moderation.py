@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class MessageFlag(Base):
+    __tablename__ = "message_flags"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    message_id = Column(Integer, ForeignKey("messages.id", ondelete="CASCADE"), nullable=False, index=True)
+    rule = Column(String, nullable=False)  # Rule name from the moderation rules file
+    severity = Column(String, nullable=False)  # low, medium, high
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    message = relationship("Message")
+    
+    __table_args__ = (
+        # One flag per rule per message, so redelivered stream entries are idempotent
+        UniqueConstraint("message_id", "rule", name="uq_message_flags_message_id_rule"),
+    )
+    
+    def __repr__(self):
+        return f"<MessageFlag {self.rule} ({self.severity}) on message:{self.message_id}>"
\ No newline at end of file
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class Screenshot(Base):
+    __tablename__ = "screenshots"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    url = Column(String, nullable=False)
+    thumbnail_url = Column(String, nullable=False)
+    content_hash = Column(String(64), nullable=False, index=True)  # SHA-256 of the uploaded bytes
+    caption = Column(String, nullable=True)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    owner = relationship("User")
+    
+    def __repr__(self):
+        return f"<Screenshot {self.id} by user:{self.owner_id}>"
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+
+from app.core.database import Base
+
+
+class UserSession(Base):
+    """A span of time a user was connected, across all of their devices on one worker"""
+    __tablename__ = "user_sessions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    started_at = Column(DateTime, nullable=False)
+    ended_at = Column(DateTime, nullable=False)
+    peak_connections = Column(Integer, nullable=False, default=1)
+    
+    # Relationships
+    user = relationship("User")
+    
+    __table_args__ = (
+        # A user's sessions in a time range
+        Index("ix_user_sessions_user_id_started_at", "user_id", "started_at"),
+    )
+    
+    def __repr__(self):
+        return f"<UserSession user:{self.user_id} {self.started_at} - {self.ended_at}>"
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class Stream(Base):
+    __tablename__ = "streams"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    streamer_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    title = Column(String, nullable=True)
+    status = Column(String, nullable=False, default="live")  # live, ended
+    started_at = Column(DateTime, default=datetime.utcnow)
+    ended_at = Column(DateTime, nullable=True)
+    
+    # Relationships
+    streamer = relationship("User")
+    
+    def __repr__(self):
+        return f"<Stream {self.id} by user:{self.streamer_id} ({self.status})>"
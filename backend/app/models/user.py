@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -28,6 +28,23 @@ class User(Base):
     parent = relationship("User", back_populates="children", remote_side=[parent_id])
     profile = relationship("Profile", back_populates="user", uselist=False)
     
+    __table_args__ = (
+        # Substring search on email in the admin accounts tab (requires pg_trgm)
+        Index(
+            "ix_users_email_trgm", "email",
+            postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"}
+        ),
+        # Filtered keyset pagination in the admin accounts tab
+        Index("ix_users_role_approved_id", "role", "approved_by_admin", "id"),
+        # Family lookups (children of a parent, siblings)
+        Index("ix_users_parent_id", "parent_id"),
+    )
+    
+    @property
+    def display_name(self):
+        """Display name from the user's profile (used in real-time payloads)"""
+        return self.profile.display_name if self.profile else None
+    
     def __repr__(self):
         return f"<User {self.email} ({self.role})>"
 
@@ -59,6 +76,7 @@ class GameCredential(Base):
     username = Column(String, nullable=False)
     password_ciphertext = Column(String, nullable=False)  # Encrypted password
     iv = Column(String, nullable=False)  # Initialization vector for encryption
+    key_id = Column(String(32), nullable=True, index=True)  # Keyring id of the encrypting key; NULL = legacy
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
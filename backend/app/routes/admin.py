@@ -0,0 +1,155 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime
+import csv
+import io
+import json
+
+from app.core.audit_encoding import AuditStateResolver
+from app.core.database import SessionLocal, get_db
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.websocket import manager
+from app.dependencies.auth import require_admin
+from app.models.audit import AuditLog
+from app.models.user import User
+from app.schemas.audit import AuditLogFilter, AuditLogListResponse, AuditLogResponse
+from app.schemas.moderation import ModerationQueueMetrics
+from app.services.audit_partitions import prune_by_created_at
+from app.services.moderation_stream import stream_metrics
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+# before_json/after_json stay last: the export replaces them with reconstructed states
+CSV_COLUMNS = [
+    AuditLog.id, AuditLog.created_at, AuditLog.actor_id, AuditLog.action,
+    AuditLog.entity_type, AuditLog.entity_id, AuditLog.ip,
+    AuditLog.before_json, AuditLog.after_json,
+]
+# Needed to reconstruct before/after snapshots (see app.core.audit_encoding)
+ENCODING_COLUMNS = [AuditLog.patch_json, AuditLog.before_hash]
+CSV_BATCH_SIZE = 1000
+
+
+def audit_log_filter(
+    actor: Optional[int] = None,
+    entity: Optional[str] = None,
+    action: Optional[str] = None,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+) -> AuditLogFilter:
+    """Query parameters shared by the log list and CSV export"""
+    return AuditLogFilter(actor=actor, entity=entity, action=action, date_from=date_from, date_to=date_to)
+
+
+def apply_audit_filter(statement, filter: AuditLogFilter):
+    if filter.actor is not None:
+        statement = statement.where(AuditLog.actor_id == filter.actor)
+    if filter.entity:
+        statement = statement.where(AuditLog.entity_type == filter.entity)
+    if filter.action:
+        statement = statement.where(AuditLog.action == filter.action)
+    return prune_by_created_at(statement, filter.date_from, filter.date_to)
+
+
+@router.get("/logs", response_model=AuditLogListResponse)
+def list_audit_logs(
+    filter: AuditLogFilter = Depends(audit_log_filter),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    admin_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """List audit logs, newest first, with keyset pagination on (created_at, id) (admin only)"""
+    statement = apply_audit_filter(select(AuditLog), filter)
+
+    if cursor:
+        position = decode_cursor(cursor)
+        try:
+            after = (datetime.fromisoformat(position["created_at"]), int(position["id"]))
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid pagination cursor"
+            )
+        statement = prune_by_created_at(statement, before=after[0]).where(
+            tuple_(AuditLog.created_at, AuditLog.id) < tuple_(*after)
+        )
+
+    logs = db.execute(
+        statement.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit + 1)
+    ).scalars().all()
+
+    next_cursor = None
+    if len(logs) > limit:
+        logs = logs[:limit]
+        next_cursor = encode_cursor({"created_at": logs[-1].created_at.isoformat(), "id": logs[-1].id})
+
+    states = AuditStateResolver(db).resolve(logs)
+    return AuditLogListResponse(
+        logs=[
+            AuditLogResponse.model_validate(log).model_copy(
+                update={"before_json": states[log.id][0], "after_json": states[log.id][1]}
+            )
+            for log in logs
+        ],
+        next_cursor=next_cursor
+    )
+
+
+def _csv_value(value):
+    if isinstance(value, dict):
+        return json.dumps(value, separators=(",", ":"))
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return "" if value is None else value
+
+
+def stream_audit_csv(filter: AuditLogFilter):
+    """Yield CSV chunks for matching logs using a server-side cursor"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.key for column in CSV_COLUMNS])
+    yield buffer.getvalue()
+
+    # Own session: the response body outlives the request's get_db session
+    db = SessionLocal()
+    try:
+        statement = apply_audit_filter(select(*CSV_COLUMNS, *ENCODING_COLUMNS), filter).order_by(
+            AuditLog.created_at, AuditLog.id
+        )
+        resolver = AuditStateResolver(db)
+        result = db.execute(statement.execution_options(yield_per=CSV_BATCH_SIZE))
+        for rows in result.partitions():
+            states = resolver.resolve(rows)
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(
+                [_csv_value(value) for value in row[:len(CSV_COLUMNS) - 2]]
+                + [_csv_value(state) for state in states[row.id]]
+                for row in rows
+            )
+            yield buffer.getvalue()
+    finally:
+        db.close()
+
+
+@router.get("/logs/export.csv")
+def export_audit_logs(
+    filter: AuditLogFilter = Depends(audit_log_filter),
+    admin_user: User = Depends(require_admin)
+):
+    """Stream matching audit logs as CSV (admin only)"""
+    return StreamingResponse(
+        stream_audit_csv(filter),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="audit_logs.csv"'}
+    )
+
+
+@router.get("/moderation/queue", response_model=ModerationQueueMetrics)
+def moderation_queue_metrics(admin_user: User = Depends(require_admin)):
+    """Backlog and consumer-group lag of the moderation workers (admin only)"""
+    return ModerationQueueMetrics(**stream_metrics(manager.redis_client))
@@ -0,0 +1,191 @@
+from datetime import datetime
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.media_types import AUDIO_EXTENSIONS, sniff_audio_type
+from app.core.websocket import manager
+from app.dependencies.auth import get_current_user
+from app.models.chat import ConversationMember, MessageType
+from app.models.message import Message
+from app.models.user import User
+from app.schemas.audio_upload import AudioMessageResponse, AudioUploadCreate, AudioUploadStatus
+from app.services.audio_uploads import UploadSession, audio_uploads
+from app.services.chat_messages import save_message
+from app.services.media_store import media_store
+
+router = APIRouter(prefix="/audio-uploads", tags=["audio"])
+
+MEDIA_KIND = "audio"
+
+
+def _require_member(db: Session, conversation_id: int, user_id: int) -> None:
+    member = db.query(ConversationMember).filter(
+        ConversationMember.conversation_id == conversation_id,
+        ConversationMember.user_id == user_id
+    ).first()
+    if not member:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not a member of this conversation"
+        )
+
+
+def _status(session: UploadSession, offset: int) -> AudioUploadStatus:
+    return AudioUploadStatus(
+        upload_id=session.id,
+        offset=offset,
+        size=session.size,
+        max_chunk_bytes=settings.audio_upload_max_chunk_bytes,
+        expires_at=datetime.utcfromtimestamp(session.expires_at),
+    )
+
+
+def _message_response(message: Message) -> AudioMessageResponse:
+    return AudioMessageResponse(
+        message_id=message.id,
+        conversation_id=message.conversation_id,
+        media_url=message.media_url,
+        created_at=message.created_at,
+    )
+
+
+@router.post("", response_model=AudioUploadStatus, status_code=status.HTTP_201_CREATED)
+def create_audio_upload(
+    request: AudioUploadCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Start a resumable audio note upload
+
+    Then PUT the recording in order with `?offset=` (at most
+    `max_chunk_bytes` per request) and POST `/finalize`. After a dropped
+    connection, GET the upload for the offset to resume from.
+    """
+    if request.size > settings.audio_max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Audio notes are limited to {settings.audio_max_bytes} bytes"
+        )
+    _require_member(db, request.conversation_id, current_user.id)
+    session = audio_uploads.create(current_user.id, request.conversation_id, request.size)
+    return _status(session, 0)
+
+
+@router.get("/{upload_id}", response_model=AudioUploadStatus)
+def get_audio_upload(upload_id: str, current_user: User = Depends(get_current_user)):
+    """Current offset of an upload"""
+    session = audio_uploads.load(upload_id, current_user.id)
+    return _status(session, session.size if session.message_id else audio_uploads.offset(session))
+
+
+@router.put("/{upload_id}", response_model=AudioUploadStatus)
+async def put_audio_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    current_user: User = Depends(get_current_user)
+):
+    """Append the raw request body at `offset`
+
+    `offset` must equal the bytes received so far (409 with the current
+    offset otherwise). The first chunk is checked for a supported audio
+    container before anything else is accepted.
+    """
+    session = audio_uploads.load(upload_id, current_user.id)
+    if session.message_id:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload is already finalized")
+    new_offset = await audio_uploads.write_chunk(session, offset, request.stream())
+    if offset == 0 and new_offset > 0:
+        head = await run_in_threadpool(audio_uploads.head, session)
+        if len(head) >= min(16, session.size) and sniff_audio_type(head) is None:
+            audio_uploads.delete(session)
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Audio must be Ogg, WebM, MP4, MP3 or WAV"
+            )
+    return _status(session, new_offset)
+
+
+@router.delete("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+def cancel_audio_upload(upload_id: str, current_user: User = Depends(get_current_user)):
+    session = audio_uploads.load(upload_id, current_user.id)
+    audio_uploads.delete(session)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+def _store_audio(session: UploadSession) -> str:
+    """Assemble the chunks into content-addressed storage; returns the media URL"""
+    assembled = audio_uploads.assemble(session)
+    try:
+        audio_type = sniff_audio_type(assembled.head)
+        if audio_type is None:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Audio must be Ogg, WebM, MP4, MP3 or WAV"
+            )
+        name = f"{assembled.digest}.{AUDIO_EXTENSIONS[audio_type]}"
+        if not media_store.exists(MEDIA_KIND, name):
+            os.replace(assembled.path, media_store.prepare(MEDIA_KIND, name))
+        return media_store.url(MEDIA_KIND, name)
+    finally:
+        assembled.discard()
+
+
+def _create_audio_message(db: Session, session: UploadSession, sender_id: int, media_url: str) -> Message:
+    message = Message(
+        conversation_id=session.conversation_id,
+        sender_id=sender_id,
+        type=MessageType.AUDIO,
+        media_url=media_url
+    )
+    save_message(db, message, manager.redis_client)
+    audio_uploads.complete(session, message.id)
+    return message
+
+
+@router.post("/{upload_id}/finalize", response_model=AudioMessageResponse, status_code=status.HTTP_201_CREATED)
+async def finalize_audio_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Store the recording and post it to the conversation as an audio message
+
+    Safe to retry: a finalized upload returns the message it created.
+    """
+    session = audio_uploads.load(upload_id, current_user.id)
+    if session.message_id:
+        message = await run_in_threadpool(db.get, Message, session.message_id)
+        if message is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Message not found")
+        return _message_response(message)
+
+    with audio_uploads.finalizing(session):
+        received = await run_in_threadpool(audio_uploads.offset, session)
+        if received != session.size:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"message": "Upload is incomplete", "offset": received}
+            )
+        await run_in_threadpool(_require_member, db, session.conversation_id, current_user.id)
+        media_url = await run_in_threadpool(_store_audio, session)
+        message = await run_in_threadpool(_create_audio_message, db, session, current_user.id, media_url)
+
+    broadcast_msg = {
+        "type": "message",
+        "message_id": message.id,
+        "conversation_id": message.conversation_id,
+        "sender_id": current_user.id,
+        "sender_name": current_user.display_name,
+        "content": None,
+        "message_type": MessageType.AUDIO.value,
+        "media_url": media_url,
+        "timestamp": message.created_at.isoformat()
+    }
+    await manager.broadcast_to_conversation(message.conversation_id, broadcast_msg, db)
+    return _message_response(message)
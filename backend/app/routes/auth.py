@@ -1,14 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Response, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Response, Request, Query
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from typing import Optional
 from datetime import timedelta
 
+from app.core.audit import record_audit, snapshot
 from app.core.database import get_db
+from app.core.pagination import bounded_count, decode_cursor, encode_cursor, escape_like
 from app.core.security import get_password_hash
 from app.core.security import create_access_token, create_refresh_token, verify_refresh_token, blacklist_token
 from app.core.config import settings
 from app.dependencies.auth import get_current_user, require_admin
+from app.dependencies.rate_limit import rate_limit
 from app.models.user import User, UserRole
 from app.schemas.auth import (
     Token, LoginRequest, ParentRegisterRequest, 
@@ -17,6 +20,7 @@ from app.schemas.auth import (
     UserListResponse, UserFilter
 )
 from app.services.auth import AuthService
+from app.services.profile_cache import profile_cache
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -31,7 +35,7 @@ def register_parent(
     return user
 
 
-@router.post("/login")
+@router.post("/login", dependencies=[Depends(rate_limit("auth.login"))])
 def login(
     request: LoginRequest,
     response: Response,
@@ -77,11 +81,23 @@ def create_child_account(
 @router.post("/admin/approve", response_model=UserResponse)
 def approve_parent(
     request: AdminApproveRequest,
+    http_request: Request,
     admin_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """Approve a parent account (admin only)"""
+    target = db.query(User).filter(User.id == request.user_id).first()
+    before = snapshot(target) if target else None
     approved_user = AuthService.approve_parent(db, request.user_id)
+    record_audit(
+        actor_id=admin_user.id,
+        action="account_approved",
+        entity_type="user",
+        entity_id=approved_user.id,
+        before=before,
+        after=snapshot(approved_user),
+        ip=http_request.client.host if http_request.client else None
+    )
     return approved_user
 
 
@@ -171,7 +187,7 @@ def logout(
     return {"message": "Logged out successfully"}
 
 
-@router.post("/password/reset/request")
+@router.post("/password/reset/request", dependencies=[Depends(rate_limit("auth.password_reset"))])
 def request_password_reset(
     request: PasswordResetRequest,
     db: Session = Depends(get_db)
@@ -206,25 +222,47 @@ def change_password(
 @router.get("/admin/users", response_model=UserListResponse)
 def list_users(
     filter: UserFilter = Depends(),
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
     admin_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
-    """List users with filtering (admin only)"""
-    query = db.query(User)
+    """List users with filtering and keyset pagination, newest first (admin only)"""
+    query = db.query(
+        User.id, User.email, User.role, User.parent_id, User.approved_by_admin, User.created_at
+    )
     
     if filter.role:
         query = query.filter(User.role == filter.role)
     if filter.approved is not None:
         query = query.filter(User.approved_by_admin == filter.approved)
     if filter.search:
-        query = query.filter(User.email.ilike(f"%{filter.search}%"))
+        # Served by the pg_trgm GIN index on users.email
+        query = query.filter(User.email.ilike(f"%{escape_like(filter.search)}%", escape="\\"))
+    
+    total, total_is_estimate = bounded_count(query, settings.admin_user_count_cap)
+    
+    if cursor:
+        before_id = decode_cursor(cursor).get("id")
+        if not isinstance(before_id, int):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid pagination cursor"
+            )
+        query = query.filter(User.id < before_id)
+    users = query.order_by(User.id.desc()).limit(limit + 1).all()
     
-    total = query.count()
-    users = query.offset(skip).limit(limit).all()
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor({"id": users[-1].id})
     
-    return UserListResponse(users=users, total=total)
+    return UserListResponse(
+        users=[UserResponse.model_validate(u) for u in users],
+        total=total,
+        total_is_estimate=total_is_estimate,
+        next_cursor=next_cursor
+    )
 
 
 @router.get("/admin/users/{user_id}", response_model=UserResponse)
@@ -246,6 +284,7 @@ def get_user(
 @router.delete("/admin/users/{user_id}")
 def delete_user(
     user_id: int,
+    request: Request,
     admin_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
@@ -264,7 +303,18 @@ def delete_user(
             detail="Cannot delete admin accounts"
         )
     
+    before = snapshot(user)
     db.delete(user)
     db.commit()
+    profile_cache.invalidate(user_id)
+    
+    record_audit(
+        actor_id=admin_user.id,
+        action="user_deleted",
+        entity_type="user",
+        entity_id=user_id,
+        before=before,
+        ip=request.client.host if request.client else None
+    )
     
     return {"message": "User deleted successfully"}
\ No newline at end of file
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
+
+from app.core.database import SessionLocal
+from app.core.websocket import websocket_auth
+from app.models.chat import ConversationMember
+from app.services.call_signaling import SIGNAL_TYPES, call_signaling
+
+router = APIRouter(tags=["calls"])
+
+
+@router.websocket("/ws/call")
+async def call_websocket(websocket: WebSocket, conversation_id: int = Query(...)):
+    """WebRTC signaling for a call among a conversation's members
+
+    On join the peer gets `call:peers` (its own `peer_id` and everyone
+    already in the call); later arrivals and departures come as
+    `call:joined` / `call:left`. Peers send `signal:offer` / `signal:answer`
+    (`to`, `sdp`) and `signal:ice` (`to`, `candidate` or `candidates`) and
+    receive them with `from` set; ICE candidates are delivered in batches.
+    `call:end` leaves the call. Media never passes through the server.
+    """
+    # Short-lived session: a call socket can stay open for hours
+    with SessionLocal() as db:
+        user = await websocket_auth(websocket, db)
+        if not user:
+            return
+        member = db.query(ConversationMember).filter(
+            ConversationMember.conversation_id == conversation_id,
+            ConversationMember.user_id == user.id
+        ).first()
+        if not member:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+        user_id = user.id
+
+    await websocket.accept()
+    peer = await call_signaling.join(conversation_id, user_id, websocket)
+    if peer is None:
+        await websocket.send_json({"type": "call:full"})
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    try:
+        while True:
+            data = await websocket.receive_json()
+            kind = data.get("type")
+            if kind in SIGNAL_TYPES:
+                if not await call_signaling.signal(peer, data):
+                    await websocket.send_json({"type": "error", "detail": "Malformed signal"})
+            elif kind == "call:end":
+                break
+            elif kind == "ping":
+                await websocket.send_json({"type": "pong"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await call_signaling.leave(peer)
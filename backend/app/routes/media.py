@@ -0,0 +1,140 @@
+import os
+from typing import Optional
+
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy import exists
+from sqlalchemy.orm import Session, aliased
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.file_response import RangeFileResponse
+from app.core.http_cache import RangeNotSatisfiable, etag_matches, parse_range
+from app.core.media_types import MEDIA_NAME_RE, media_type_for
+from app.core.websocket import get_user_from_token
+from app.models.message import Message
+from app.models.screenshot import Screenshot
+from app.models.user import User
+from app.services.avatars import AVATAR_KIND, VARIANT_KIND, VARIANT_RE, avatar_cache
+from app.services.media_store import media_store
+from app.services.visibility import visible_conversations_clause, visible_users_clause
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+SCREENSHOTS_KIND = "screenshots"
+AUDIO_KIND = "audio"
+MEDIA_KINDS = {SCREENSHOTS_KIND, AUDIO_KIND, AVATAR_KIND}
+# Chat audio and screenshots are only served to users who may see them
+PROTECTED_KINDS = {SCREENSHOTS_KIND, AUDIO_KIND}
+# Names are content hashes, so a URL's bytes never change; private keeps
+# children's media out of shared proxies and CDNs
+IMMUTABLE = "private, max-age=31536000, immutable"
+
+optional_bearer = HTTPBearer(auto_error=False)
+
+
+def _may_view(db: Session, viewer: User, kind: str, name: str) -> bool:
+    if kind == SCREENSHOTS_KIND:
+        # Full images and thumbnails share the digest prefix; any visible upload of it will do
+        owner = aliased(User)
+        condition = exists().where(
+            Screenshot.content_hash == name.split(".", 1)[0],
+            owner.id == Screenshot.owner_id,
+            visible_users_clause(viewer, owner.id, owner.parent_id),
+        )
+    else:
+        condition = exists().where(
+            Message.media_url == media_store.url(kind, name),
+            visible_conversations_clause(viewer, Message.conversation_id),
+        )
+    return db.query(condition).scalar()
+
+
+def _authorize(db: Session, token: Optional[str], kind: str, name: str) -> None:
+    viewer = get_user_from_token(token, db) if token else None
+    if viewer is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if not _may_view(db, viewer, kind, name):
+        # Same answer as a missing file, so names can't be probed
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+
+
+@router.api_route("/{kind}/{name}", methods=["GET", "HEAD"])
+async def get_media(
+    kind: str,
+    name: str,
+    request: Request,
+    token: Optional[str] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_bearer),
+    db: Session = Depends(get_db)
+):
+    """Serve a stored media file
+
+    Chat audio and screenshots need the caller's token, as a Bearer header
+    or `?token=` for `<img>`/`<audio>` tags, and are served only to users
+    who may see a message or screenshot that uses the file. Avatars are
+    served to anyone.
+
+    The ETag is the content-addressed name itself, so it is strong and
+    computed without reading the file. Single `Range` requests get a 206
+    (audio scrubbing, resumed downloads); `If-Range` falls back to the whole
+    file when it doesn't match. Bodies go out via sendfile when the server
+    supports it, or through nginx with MEDIA_ACCEL_REDIRECT_PREFIX.
+    """
+    if kind not in MEDIA_KINDS or not MEDIA_NAME_RE.match(name):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    if kind in PROTECTED_KINDS:
+        await run_in_threadpool(_authorize, db, credentials.credentials if credentials else token, kind, name)
+
+    stored_kind = kind
+    variant = VARIANT_RE.match(name) if kind == AVATAR_KIND else None
+    if variant:
+        # Resized avatars live in an LRU cache and are rendered on a miss
+        stored_kind = VARIANT_KIND
+        path = await run_in_threadpool(avatar_cache.get, variant.group(1), int(variant.group(2)))
+        if path is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    else:
+        path = media_store.path(kind, name)
+    try:
+        stat_result = await anyio.to_thread.run_sync(os.stat, path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+
+    etag = f'"{name}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if settings.media_accel_redirect_prefix:
+        # nginx serves the body (sendfile, Range) from its internal location
+        prefix = settings.media_accel_redirect_prefix.rstrip("/")
+        headers["X-Accel-Redirect"] = f"{prefix}/{media_store.relative_path(stored_kind, name)}"
+        return Response(headers=headers, media_type=media_type_for(name, kind))
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range is not None and if_range.strip() != etag:
+        range_header = None  # representation changed (or a date validator): send it all
+    try:
+        byte_range = parse_range(range_header, stat_result.st_size)
+    except RangeNotSatisfiable:
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={**headers, "Content-Range": f"bytes */{stat_result.st_size}"},
+        )
+
+    return RangeFileResponse(
+        path,
+        stat_result.st_size,
+        byte_range,
+        headers=headers,
+        media_type=media_type_for(name, kind),
+        send_body=request.method != "HEAD",
+    )
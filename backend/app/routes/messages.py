@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.core.database import get_db
+from app.core.pagination import decode_cursor, encode_cursor
+from app.dependencies.auth import get_current_user
+from app.models.user import User, UserRole
+from app.schemas.message import MessageSearchResponse
+from app.services.message_search import SEARCH_MODES, search_messages
+
+router = APIRouter(prefix="/messages", tags=["messages"])
+
+
+@router.get("/search", response_model=MessageSearchResponse)
+def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    conversation_id: Optional[int] = None,
+    member_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Search chat history, newest matches first
+    
+    Parents search their own and their children's conversations
+    (`member_id` picks one child), admins search every conversation. Each
+    hit carries a snippet with the character ranges to highlight; pass
+    `next_cursor` for older matches.
+    """
+    if current_user.role not in (UserRole.PARENT, UserRole.ADMIN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Requires PARENT or ADMIN role"
+        )
+    
+    mode, before_id = None, None
+    if cursor:
+        position = decode_cursor(cursor)
+        mode, before_id = position.get("mode"), position.get("id")
+        if mode not in SEARCH_MODES or not isinstance(before_id, int):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid pagination cursor"
+            )
+    
+    items, mode, next_before_id = search_messages(
+        db, current_user, q, limit,
+        mode=mode,
+        before_id=before_id,
+        conversation_id=conversation_id,
+        member_id=member_id,
+    )
+    next_cursor = encode_cursor({"id": next_before_id, "mode": mode}) if next_before_id else None
+    return MessageSearchResponse(items=items, mode=mode, next_cursor=next_cursor)
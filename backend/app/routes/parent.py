@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session, joinedload
+from datetime import datetime, timedelta
+
+from app.core.database import get_db
+from app.dependencies.auth import require_parent
+from app.models.activity import UserActivityHourly
+from app.models.user import User, UserRole
+from app.schemas.dashboard import ActivityHour, ChildActivity, ParentDashboardResponse
+from app.services.activity_rollup import hour_of
+
+router = APIRouter(prefix="/parent", tags=["parent"])
+
+
+@router.get("/dashboard", response_model=ParentDashboardResponse)
+def parent_dashboard(
+    hours: int = Query(24, ge=1, le=24 * 31),
+    current_user: User = Depends(require_parent),
+    db: Session = Depends(get_db)
+):
+    """Chat activity and time online per child over the last `hours` hours
+    
+    Reads the hourly rollup rows, so figures lag live activity by up to the
+    rollup flush interval.
+    """
+    since = hour_of(datetime.utcnow()) - timedelta(hours=hours - 1)
+    children = db.query(User).options(joinedload(User.profile)).filter(
+        User.parent_id == current_user.id,
+        User.role == UserRole.CHILD
+    ).order_by(User.id).all()
+    
+    rows_by_child: dict[int, list[UserActivityHourly]] = {child.id: [] for child in children}
+    if children:
+        rows = db.query(UserActivityHourly).filter(
+            UserActivityHourly.user_id.in_(rows_by_child),
+            UserActivityHourly.hour >= since
+        ).order_by(UserActivityHourly.user_id, UserActivityHourly.hour).all()
+        for row in rows:
+            rows_by_child[row.user_id].append(row)
+    
+    result = []
+    for child in children:
+        rows = rows_by_child[child.id]
+        result.append(ChildActivity(
+            user_id=child.id,
+            display_name=child.display_name,
+            messages_sent=sum(row.messages_sent for row in rows),
+            minutes_online=sum(row.seconds_online for row in rows) // 60,
+            hours=[
+                ActivityHour(
+                    hour=row.hour,
+                    messages_sent=row.messages_sent,
+                    conversations_active=row.conversations_active,
+                    minutes_online=row.seconds_online // 60,
+                )
+                for row in rows
+            ],
+        ))
+    return ParentDashboardResponse(since=since, children=result)
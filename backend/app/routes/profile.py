@@ -1,32 +1,113 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+import json
 
+from app.core.config import settings
 from app.core.database import get_db
-from app.dependencies.auth import get_current_user
-from app.models.user import User, Profile
-from app.schemas.profile import ProfileResponse, ProfileUpdate, GameCredentialResponse
+from app.dependencies.auth import ensure_user_exists, get_current_user, get_current_user_id
+from app.models.user import User, Profile, GameCredential
+from app.schemas.profile import (
+    ProfileResponse, ProfileUpdate, GameCredentialResponse,
+    ProfileSummary, ProfileBatchResponse, AvatarResponse
+)
+from app.services.avatars import (
+    AVATAR_KIND, avatar_cache, avatar_name, stored_avatar_digest, variant_urls
+)
+from app.services.image_processing import ImageRejected, process_avatar
+from app.services.media_store import media_store, run_in_media_pool
+from app.services.media_uploads import image_upload
+from app.services.profile_cache import profile_cache
+from app.services.visibility import visible_users_clause
 
 router = APIRouter(prefix="/profiles", tags=["profiles"])
 
 
+def _json(value) -> bytes:
+    return json.dumps(jsonable_encoder(value), separators=(",", ":")).encode()
+
+
+def _profile_not_found(db: Session, user_id: int) -> HTTPException:
+    # Routes authenticated by token alone: a deleted user still gets 401, not 404
+    ensure_user_exists(db, user_id)
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Profile not found"
+    )
+
+
+def _load_profile_id(db: Session, user_id: int) -> int:
+    profile_id = db.query(Profile.id).filter(Profile.user_id == user_id).scalar()
+    if profile_id is None:
+        raise _profile_not_found(db, user_id)
+    return profile_id
+
+
+def parse_ids(ids: str = Query(..., description="Comma-separated user ids")) -> list[int]:
+    """Unique user ids in request order"""
+    try:
+        parsed = list(dict.fromkeys(int(part) for part in ids.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be comma-separated integers"
+        )
+    if len(parsed) > settings.profile_batch_max_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.profile_batch_max_ids} ids per request"
+        )
+    return parsed
+
+
+@router.get("", response_model=ProfileBatchResponse)
+def get_profiles(
+    ids: list[int] = Depends(parse_ids),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Names and avatars for many users in one query
+    
+    Ids the caller may not see (outside their family and conversations) or
+    without a profile are left out of the response.
+    """
+    if not ids:
+        return ProfileBatchResponse(profiles=[])
+    
+    rows = db.query(Profile.user_id, Profile.display_name, Profile.avatar_url).join(
+        User, User.id == Profile.user_id
+    ).filter(
+        Profile.user_id.in_(ids),
+        visible_users_clause(current_user, User.id, User.parent_id)
+    ).all()
+    
+    by_id = {row.user_id: row for row in rows}
+    return ProfileBatchResponse(
+        profiles=[ProfileSummary.model_validate(by_id[user_id]) for user_id in ids if user_id in by_id]
+    )
+
+
 @router.get("/me", response_model=ProfileResponse)
 def get_my_profile(
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    user_id: int = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
-    """Get current user's profile"""
-    profile = db.query(Profile).filter(Profile.user_id == current_user.id).first()
-    if not profile:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Profile not found"
-        )
-    return profile
+    """Get current user's profile (cached; supports If-None-Match)"""
+    def load() -> bytes:
+        profile = db.query(Profile).filter(Profile.user_id == user_id).first()
+        if not profile:
+            raise _profile_not_found(db, user_id)
+        return _json(ProfileResponse.model_validate(profile))
+    
+    return profile_cache.respond(request, user_id, "me", load)
 
 
 @router.put("/me", response_model=ProfileResponse)
 def update_my_profile(
     update_data: ProfileUpdate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -44,20 +125,73 @@ def update_my_profile(
     
     db.commit()
     db.refresh(profile)
+    profile_cache.invalidate(current_user.id)
+    
+    # Avatars uploaded here get their resized variants ready before clients ask
+    digest = stored_avatar_digest(profile.avatar_url)
+    if digest and media_store.exists(AVATAR_KIND, avatar_name(digest)):
+        background_tasks.add_task(avatar_cache.precompute, digest)
     return profile
 
 
-@router.get("/me/games", response_model=list[GameCredentialResponse])
-def get_my_game_credentials(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get current user's game credentials"""
-    profile = db.query(Profile).filter(Profile.user_id == current_user.id).first()
+def _set_avatar_url(db: Session, user_id: int, avatar_url: str) -> None:
+    profile = db.query(Profile).filter(Profile.user_id == user_id).first()
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Profile not found"
         )
+    profile.avatar_url = avatar_url
+    db.commit()
+    profile_cache.invalidate(user_id)
+
+
+@router.post("/me/avatar", response_model=AvatarResponse)
+async def upload_my_avatar(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Upload an avatar (multipart: `file`) and make it the profile picture
+    
+    The image is cropped to a square, stripped of metadata and stored under
+    its content hash; nearest-neighbour variants at every configured size
+    are rendered before the response so all clients hit a ready file.
+    """
+    async with image_upload(request) as upload:
+        digest = upload.file.digest
+        name = avatar_name(digest)
+        if not media_store.exists(AVATAR_KIND, name):
+            try:
+                await run_in_media_pool(
+                    process_avatar,
+                    upload.file.path,
+                    media_store.prepare(AVATAR_KIND, name),
+                    settings.media_max_image_pixels,
+                )
+            except ImageRejected as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+            except OSError:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Image could not be decoded")
+    
+    await run_in_threadpool(avatar_cache.precompute, digest)
+    avatar_url = media_store.url(AVATAR_KIND, name)
+    await run_in_threadpool(_set_avatar_url, db, current_user.id, avatar_url)
+    return AvatarResponse(avatar_url=avatar_url, variants=variant_urls(digest))
+
+
+@router.get("/me/games", response_model=list[GameCredentialResponse])
+def get_my_game_credentials(
+    request: Request,
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """Get current user's game credentials (cached; supports If-None-Match)"""
+    def load() -> bytes:
+        profile_id = _load_profile_id(db, user_id)
+        credentials = db.query(GameCredential).filter(
+            GameCredential.profile_id == profile_id
+        ).order_by(GameCredential.id).all()
+        return _json([GameCredentialResponse.model_validate(c) for c in credentials])
     
-    return profile.game_credentials
\ No newline at end of file
+    return profile_cache.respond(request, user_id, "games", load)
@@ -0,0 +1,135 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.media_types import EXTENSIONS
+from app.dependencies.auth import get_current_user
+from app.models.screenshot import Screenshot
+from app.models.user import User
+from app.schemas.screenshot import ScreenshotFeedResponse, ScreenshotResponse
+from app.services.image_processing import ImageRejected, process_screenshot
+from app.services.media_store import media_store, run_in_media_pool
+from app.services.media_uploads import image_upload
+from app.services.screenshot_feed import screenshot_feed
+
+router = APIRouter(prefix="/screenshots", tags=["screenshots"])
+
+MEDIA_KIND = "screenshots"
+MAX_CAPTION_LENGTH = 500
+
+
+def _find_existing(db: Session, digest: str) -> Optional[Screenshot]:
+    """An earlier screenshot with the same bytes whose files are still on disk"""
+    existing = db.query(Screenshot).filter(Screenshot.content_hash == digest).first()
+    if existing is None:
+        return None
+    name = existing.url.rsplit("/", 1)[-1]
+    thumb_name = existing.thumbnail_url.rsplit("/", 1)[-1]
+    if media_store.exists(MEDIA_KIND, name) and media_store.exists(MEDIA_KIND, thumb_name):
+        return existing
+    return None
+
+
+def _create_screenshot(db: Session, owner: User, **values) -> Screenshot:
+    screenshot = Screenshot(owner_id=owner.id, **values)
+    db.add(screenshot)
+    db.commit()
+    db.refresh(screenshot)
+    screenshot_feed.publish(db, screenshot, owner)
+    return screenshot
+
+
+@router.get("", response_model=ScreenshotFeedResponse)
+def list_screenshots(
+    cursor: Optional[str] = None,
+    limit: int = Query(30, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Screenshots from the caller's family and conversations, newest first
+    
+    The first page comes from the caller's precomputed feed; pass
+    `next_cursor` for older pages.
+    """
+    if cursor:
+        before_id = decode_cursor(cursor).get("id")
+        if not isinstance(before_id, int):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid pagination cursor"
+            )
+        items = screenshot_feed.read_from_db(db, current_user, limit + 1, before_id)
+    else:
+        items = screenshot_feed.first_page(db, current_user, limit + 1)
+    
+    # The extra row only tells whether an older page exists
+    has_more = len(items) > limit
+    items = items[:limit]
+    next_cursor = encode_cursor({"id": items[-1].id}) if has_more else None
+    return ScreenshotFeedResponse(items=items, next_cursor=next_cursor)
+
+
+@router.post("", response_model=ScreenshotResponse, status_code=status.HTTP_201_CREATED)
+async def upload_screenshot(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Upload a screenshot (multipart: `file`, optional `caption`)
+
+    The body is streamed to disk while it is hashed, so memory stays at one
+    network chunk however large the image is. Images are re-encoded without
+    EXIF (GPS, device data) and thumbnailed in the media process pool, then
+    stored under their content hash: uploading the same image twice reuses
+    the stored files.
+    """
+    async with image_upload(request) as upload:
+        caption = upload.fields.get("caption") or None
+        if caption and len(caption) > MAX_CAPTION_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Caption is limited to {MAX_CAPTION_LENGTH} characters"
+            )
+
+        digest = upload.file.digest
+        existing = await run_in_threadpool(_find_existing, db, digest)
+        if existing is not None:
+            url, thumbnail_url = existing.url, existing.thumbnail_url
+            width, height, size_bytes = existing.width, existing.height, existing.size_bytes
+        else:
+            name = f"{digest}.{EXTENSIONS[upload.image_type]}"
+            thumb_name = f"{digest}.thumb.webp"
+            try:
+                width, height = await run_in_media_pool(
+                    process_screenshot,
+                    upload.file.path,
+                    media_store.prepare(MEDIA_KIND, name),
+                    media_store.prepare(MEDIA_KIND, thumb_name),
+                    upload.image_type,
+                    settings.screenshot_thumbnail_width,
+                    settings.media_max_image_pixels,
+                )
+            except ImageRejected as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+            except OSError:
+                # Pillow raises OSError subclasses for truncated or corrupt data
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Image could not be decoded")
+            url, thumbnail_url = media_store.url(MEDIA_KIND, name), media_store.url(MEDIA_KIND, thumb_name)
+            size_bytes = upload.file.size
+
+    return await run_in_threadpool(
+        _create_screenshot,
+        db,
+        current_user,
+        url=url,
+        thumbnail_url=thumbnail_url,
+        content_hash=digest,
+        caption=caption,
+        width=width,
+        height=height,
+        size_bytes=size_bytes,
+    )
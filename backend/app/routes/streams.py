@@ -0,0 +1,140 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from datetime import datetime
+from typing import Optional
+import time
+
+from app.core.config import settings
+from app.core.database import SessionLocal, get_db
+from app.core.websocket import websocket_auth
+from app.dependencies.auth import get_current_user
+from app.models.stream import Stream
+from app.models.user import User
+from app.schemas.stream import StreamResponse, StreamStart
+from app.services.stream_hub import stream_hub
+from app.services.stream_reactions import reaction_aggregator
+from app.services.stream_viewers import viewer_roster
+from app.services.visibility import visible_users_clause
+
+router = APIRouter(tags=["streams"])
+
+
+@router.post("/streams/start", response_model=StreamResponse, status_code=status.HTTP_201_CREATED)
+def start_stream(
+    request: StreamStart,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Go live; returns the caller's current stream if one is already live"""
+    live = db.query(Stream).filter(
+        Stream.streamer_id == current_user.id,
+        Stream.status == "live"
+    ).first()
+    if live:
+        return live
+
+    stream = Stream(streamer_id=current_user.id, title=request.title, status="live")
+    db.add(stream)
+    db.commit()
+    db.refresh(stream)
+    return stream
+
+
+def _end_stream(db: Session, streamer_id: int) -> Optional[Stream]:
+    stream = db.query(Stream).filter(
+        Stream.streamer_id == streamer_id,
+        Stream.status == "live"
+    ).first()
+    if stream:
+        stream.status = "ended"
+        stream.ended_at = datetime.utcnow()
+        db.commit()
+        db.refresh(stream)
+    return stream
+
+
+@router.post("/streams/stop", response_model=StreamResponse)
+async def stop_stream(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """End the caller's live stream and tell its viewers on every node"""
+    stream = await run_in_threadpool(_end_stream, db, current_user.id)
+    if not stream:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No live stream"
+        )
+    await stream_hub.relay(stream.id, {"type": "stream:ended", "stream_id": stream.id})
+    await viewer_roster.clear(stream.id)
+    return stream
+
+
+def _authorize_viewer(db: Session, user: User, stream_id: int):
+    """The live stream if `user` may watch it (streamer visible to them), else None"""
+    return db.query(Stream).join(User, User.id == Stream.streamer_id).filter(
+        Stream.id == stream_id,
+        Stream.status == "live",
+        visible_users_clause(user, User.id, User.parent_id)
+    ).first()
+
+
+@router.websocket("/ws/stream")
+async def stream_websocket(websocket: WebSocket, stream_id: int = Query(...)):
+    """Live stream events: `stream:live` and `viewer:list` on join, then
+    `reaction:new`, `viewer:delta` and `stream:ended`
+
+    Viewers send `{"type": "reaction", "reaction": "<name>"}`; reactions are
+    aggregated and delivered as one delta frame per tick, not one frame per
+    reaction. Viewer joins and leaves arrive the same way as versioned
+    deltas; `{"type": "viewer:resync"}` asks for the full list again.
+    """
+    # Short-lived session: a stream socket can stay open for hours
+    with SessionLocal() as db:
+        user = await websocket_auth(websocket, db)
+        if not user:
+            return
+        stream = await run_in_threadpool(_authorize_viewer, db, user, stream_id)
+        if not stream:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+        snapshot = {
+            "type": "stream:live",
+            "stream_id": stream.id,
+            "streamer_id": stream.streamer_id,
+            "title": stream.title,
+        }
+        user_id = user.id
+
+    await websocket.accept()
+    snapshot["reactions"] = await reaction_aggregator.totals(stream_id)
+    await websocket.send_json(snapshot)
+    # Joined before the list is read, so no delta after its version is missed
+    stream_hub.join(stream_id, websocket, user_id)
+
+    window_start, sent_in_window = time.monotonic(), 0
+    try:
+        viewer_list = await viewer_roster.join(stream_id, user_id)
+        if viewer_list is not None:
+            await websocket.send_json(viewer_list)
+        while True:
+            data = await websocket.receive_json()
+            if data.get("type") == "reaction":
+                now = time.monotonic()
+                if now - window_start >= 1.0:
+                    window_start, sent_in_window = now, 0
+                # Extra reactions from one viewer are dropped silently
+                if sent_in_window < settings.stream_reaction_max_per_second:
+                    sent_in_window += reaction_aggregator.add(stream_id, data.get("reaction"))
+            elif data.get("type") == "viewer:resync":
+                viewer_list = await viewer_roster.resync(stream_id)
+                if viewer_list is not None:
+                    await websocket.send_json(viewer_list)
+            elif data.get("type") == "ping":
+                await websocket.send_json({"type": "pong"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        stream_hub.leave(stream_id, websocket)
+        await viewer_roster.leave(stream_id, user_id)
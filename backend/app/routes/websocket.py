@@ -4,8 +4,12 @@ import json
 import asyncio
 
 from app.core.database import get_db
+from app.core.profiling import profile_queries
+from app.core.rate_limit import RATE_LIMITED_EVENTS, rate_limit_error, rate_limiter
 from app.core.websocket import manager, websocket_auth
 from app.models.user import User
+from app.services.chat_messages import save_message
+from app.services.session_tracker import session_tracker
 
 router = APIRouter()
 
@@ -26,24 +30,34 @@ async def websocket_endpoint(
         while True:
             # Receive and handle messages
             data = await websocket.receive_json()
+            session_tracker.heartbeat(user.id)
             
-            if data["type"] == "message":
-                # Handle new message
-                await handle_new_message(data, user, db)
+            # Reject floods before any database work
+            if data["type"] in RATE_LIMITED_EVENTS:
+                limited = rate_limiter.hit(f"ws.{data['type']}", user.id)
+                if not limited.allowed:
+                    await websocket.send_json(rate_limit_error(data["type"], limited))
+                    continue
             
-            elif data["type"] == "typing":
-                # Handle typing indicator
-                await handle_typing(data, user, db)
-            
-            elif data["type"] == "ping":
-                # Respond to ping
-                await websocket.send_json({"type": "pong"})
-    
-    except WebSocketDisconnect:
-        manager.disconnect(websocket, user.id)
+            with profile_queries(f"ws {data['type']}"):
+                if data["type"] == "message":
+                    # Handle new message
+                    await handle_new_message(data, user, db)
+                
+                elif data["type"] == "typing":
+                    # Handle typing indicator
+                    await handle_typing(data, user, db)
+                
+                elif data["type"] == "ping":
+                    # Respond to ping
+                    await websocket.send_json({"type": "pong"})
+    
+    except WebSocketDisconnect as e:
+        # 1006: the connection dropped without a close frame
+        manager.disconnect(websocket, user.id, abnormal=e.code == 1006)
     except Exception as e:
         print(f"WebSocket error: {e}")
-        manager.disconnect(websocket, user.id)
+        manager.disconnect(websocket, user.id, abnormal=True)
 
 
 async def handle_new_message(data: dict, user: User, db: Session):
@@ -73,9 +87,7 @@ async def handle_new_message(data: dict, user: User, db: Session):
         media_url=data.get("media_url")
     )
     
-    db.add(new_message)
-    db.commit()
-    db.refresh(new_message)
+    save_message(db, new_message, manager.redis_client)
     
     # Prepare broadcast message
     broadcast_msg = {
@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+
+class AudioUploadCreate(BaseModel):
+    conversation_id: int
+    size: int = Field(..., gt=0, description="Total bytes of the recording")
+
+
+class AudioUploadStatus(BaseModel):
+    upload_id: str
+    offset: int  # bytes received so far; the next PUT starts here
+    size: int
+    max_chunk_bytes: int
+    expires_at: datetime
+
+
+class AudioMessageResponse(BaseModel):
+    message_id: int
+    conversation_id: int
+    media_url: str
+    created_at: datetime
@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class AuditLogFilter(BaseModel):
+    actor: Optional[int] = None
+    entity: Optional[str] = None
+    action: Optional[str] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+
+
+class AuditLogResponse(BaseModel):
+    id: int
+    actor_id: int
+    action: str
+    entity_type: str
+    entity_id: Optional[int] = None
+    before_json: Optional[dict] = None
+    after_json: Optional[dict] = None
+    ip: Optional[str] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class AuditLogListResponse(BaseModel):
+    logs: list[AuditLogResponse]
+    next_cursor: Optional[str] = None
\ No newline at end of file
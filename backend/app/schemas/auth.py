@@ -58,4 +58,17 @@ class ChildCreateRequest(BaseModel):
 
 
 class AdminApproveRequest(BaseModel):
-    user_id: int
\ No newline at end of file
+    user_id: int
+
+
+class UserFilter(BaseModel):
+    role: Optional[UserRole] = None
+    approved: Optional[bool] = None
+    search: Optional[str] = Field(None, min_length=1, max_length=255)
+
+
+class UserListResponse(BaseModel):
+    users: list[UserResponse]
+    total: int
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None
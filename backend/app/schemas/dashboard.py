@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class ActivityHour(BaseModel):
+    hour: datetime
+    messages_sent: int
+    conversations_active: int
+    minutes_online: int
+
+
+class ChildActivity(BaseModel):
+    user_id: int
+    display_name: Optional[str] = None
+    messages_sent: int
+    minutes_online: int
+    hours: list[ActivityHour]
+
+
+class ParentDashboardResponse(BaseModel):
+    since: datetime
+    children: list[ChildActivity]
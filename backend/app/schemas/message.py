@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class MessageSearchHit(BaseModel):
+    message_id: int
+    conversation_id: int
+    sender_id: int
+    created_at: datetime
+    snippet: str
+    # [start, end) character offsets of matches within `snippet`
+    highlights: list[tuple[int, int]]
+
+
+class MessageSearchResponse(BaseModel):
+    items: list[MessageSearchHit]
+    mode: str
+    next_cursor: Optional[str] = None
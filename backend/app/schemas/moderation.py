@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class ModerationQueueMetrics(BaseModel):
+    stream_length: int
+    pending: int
+    lag: Optional[int] = None
+    oldest_pending_age_seconds: float
+    consumers: int
+    delayed: int
+    dead_letters: int
@@ -43,4 +43,23 @@ class GameCredentialResponse(GameCredentialBase):
     created_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class ProfileSummary(BaseModel):
+    """Compact projection for rendering names and avatars in lists"""
+    user_id: int
+    display_name: str
+    avatar_url: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class ProfileBatchResponse(BaseModel):
+    profiles: list[ProfileSummary]
+
+
+class AvatarResponse(BaseModel):
+    avatar_url: str
+    variants: dict[int, str]  # pixel size -> URL
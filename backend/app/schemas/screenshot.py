@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class ScreenshotResponse(BaseModel):
+    id: int
+    owner_id: int
+    url: str
+    thumbnail_url: str
+    caption: Optional[str] = None
+    width: int
+    height: int
+    size_bytes: int
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class ScreenshotFeedResponse(BaseModel):
+    items: list[ScreenshotResponse]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+class StreamStart(BaseModel):
+    title: Optional[str] = Field(None, max_length=100)
+
+
+class StreamResponse(BaseModel):
+    id: int
+    streamer_id: int
+    title: Optional[str] = None
+    status: str
+    started_at: datetime
+    ended_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
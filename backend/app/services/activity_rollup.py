@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.database import SessionLocal, is_transient_error
+from app.models.activity import UserActivityConversation, UserActivityHourly
+from app.models.chat import Conversation
+from app.models.user import User
+
+
+logger = logging.getLogger(__name__)
+
+HOUR = timedelta(hours=1)
+
+
+def hour_of(at: datetime) -> datetime:
+    return at.replace(minute=0, second=0, microsecond=0)
+
+
+@dataclass
+class _Counters:
+    messages_sent: int = 0
+    seconds_online: float = 0.0
+    conversations: set[int] = field(default_factory=set)
+
+    def merge(self, other: "_Counters") -> None:
+        self.messages_sent += other.messages_sent
+        self.seconds_online += other.seconds_online
+        self.conversations |= other.conversations
+
+
+class ActivityRollup:
+    """Hourly per-user activity counters for the parent dashboard
+
+    Message inserts and time online (credited by the session tracker) only
+    bump in-memory counters keyed by (user, hour). A background task writes
+    them every `flush_interval` seconds: one batched UPDATE for hours that
+    already have a row and one multi-row INSERT for new ones, so the
+    dashboard reads a handful of pre-aggregated rows per child instead of
+    scanning messages. Counters for users or conversations deleted in the
+    meantime are dropped; counters that fail to write for a transient reason
+    (lost connection, another worker creating the same row) are kept for the
+    next flush. `stop()` flushes what is left.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        flush_interval: float = settings.activity_flush_interval_seconds,
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._counters: dict[tuple[int, datetime], _Counters] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _bucket(self, user_id: int, hour: datetime) -> _Counters:
+        counters = self._counters.get((user_id, hour))
+        if counters is None:
+            counters = self._counters[(user_id, hour)] = _Counters()
+        return counters
+
+    def message_sent(self, user_id: int, conversation_id: int, at: Optional[datetime] = None) -> None:
+        hour = hour_of(at or datetime.utcnow())
+        with self._lock:
+            counters = self._bucket(user_id, hour)
+            counters.messages_sent += 1
+            counters.conversations.add(conversation_id)
+
+    def _add_online(self, user_id: int, start: datetime, end: datetime) -> None:
+        """Credit `start`..`end` to the hours it spans (caller holds the lock)"""
+        while start < end:
+            hour = hour_of(start)
+            stop = min(end, hour + HOUR)
+            self._bucket(user_id, hour).seconds_online += (stop - start).total_seconds()
+            start = stop
+
+    def add_online(self, user_id: int, start: datetime, end: datetime) -> None:
+        with self._lock:
+            self._add_online(user_id, start, end)
+
+    def _take(self) -> dict[tuple[int, datetime], _Counters]:
+        with self._lock:
+            counters, self._counters = self._counters, {}
+        return counters
+
+    def _restore(self, counters: dict[tuple[int, datetime], _Counters]) -> None:
+        with self._lock:
+            for (user_id, hour), pending in counters.items():
+                self._bucket(user_id, hour).merge(pending)
+
+    def flush(self) -> int:
+        """Write pending counters; returns the number of (user, hour) rows touched"""
+        with self._flush_lock:
+            counters = self._take()
+            if not counters:
+                return 0
+            db = self.session_factory()
+            try:
+                try:
+                    self._write(db, counters)
+                    db.commit()
+                except IntegrityError:
+                    db.rollback()
+                    if not self._drop_deleted(db, counters):
+                        # Another worker created the same rows first; retry next time
+                        raise
+                    self._write(db, counters)
+                    db.commit()
+                return len(counters)
+            except Exception as e:
+                db.rollback()
+                if not (isinstance(e, IntegrityError) or is_transient_error(e)):
+                    logger.error("Activity rollup flush of %d rows failed, dropping them: %s", len(counters), e)
+                    return 0
+                logger.error("Activity rollup flush of %d rows failed: %s", len(counters), e)
+                self._restore(counters)
+                return 0
+            finally:
+                db.close()
+
+    @staticmethod
+    def _drop_deleted(db, counters: dict[tuple[int, datetime], _Counters]) -> int:
+        """Remove counters for users and conversations that no longer exist; returns how many"""
+        user_ids = {user_id for user_id, _ in counters}
+        conversation_ids = set().union(*(pending.conversations for pending in counters.values()))
+        gone_users = user_ids - set(db.scalars(select(User.id).where(User.id.in_(user_ids))))
+        gone_conversations = conversation_ids - set(
+            db.scalars(select(Conversation.id).where(Conversation.id.in_(conversation_ids)))
+        )
+        dropped = 0
+        for key in [key for key in counters if key[0] in gone_users]:
+            del counters[key]
+            dropped += 1
+        for pending in counters.values():
+            dropped += len(pending.conversations & gone_conversations)
+            pending.conversations -= gone_conversations
+        if dropped:
+            logger.warning(
+                "Activity rollup dropped counters for %d deleted users and %d deleted conversations",
+                len(gone_users), len(gone_conversations),
+            )
+        return dropped
+
+    def _write(self, db, counters: dict[tuple[int, datetime], _Counters]) -> None:
+        hourly = UserActivityHourly.__table__
+        seen_table = UserActivityConversation.__table__
+        user_ids = {user_id for user_id, _ in counters}
+        hours = {hour for _, hour in counters}
+
+        existing = set(db.execute(
+            select(hourly.c.user_id, hourly.c.hour)
+            .where(hourly.c.user_id.in_(user_ids), hourly.c.hour.in_(hours))
+        ).all())
+        seen = set(db.execute(
+            select(seen_table.c.user_id, seen_table.c.hour, seen_table.c.conversation_id)
+            .where(seen_table.c.user_id.in_(user_ids), seen_table.c.hour.in_(hours))
+        ).all())
+
+        new_conversations = []
+        updates, inserts = [], []
+        for (user_id, hour), pending in counters.items():
+            fresh = [
+                {"user_id": user_id, "hour": hour, "conversation_id": conversation_id}
+                for conversation_id in pending.conversations
+                if (user_id, hour, conversation_id) not in seen
+            ]
+            new_conversations.extend(fresh)
+            values = {
+                "messages_sent": pending.messages_sent,
+                "conversations_active": len(fresh),
+                "seconds_online": round(pending.seconds_online),
+            }
+            if (user_id, hour) in existing:
+                updates.append({"b_user_id": user_id, "b_hour": hour, **{f"b_{k}": v for k, v in values.items()}})
+            else:
+                inserts.append({"user_id": user_id, "hour": hour, **values})
+
+        if new_conversations:
+            db.execute(insert(seen_table), new_conversations)
+        if updates:
+            db.execute(
+                update(hourly)
+                .where(hourly.c.user_id == bindparam("b_user_id"), hourly.c.hour == bindparam("b_hour"))
+                .values(
+                    messages_sent=hourly.c.messages_sent + bindparam("b_messages_sent"),
+                    conversations_active=hourly.c.conversations_active + bindparam("b_conversations_active"),
+                    seconds_online=hourly.c.seconds_online + bindparam("b_seconds_online"),
+                ),
+                updates,
+            )
+        if inserts:
+            db.execute(insert(hourly), inserts)
+        # Only the current and previous hour can still receive late events
+        db.execute(delete(seen_table).where(seen_table.c.hour < hour_of(datetime.utcnow()) - HOUR))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task and flush everything still in memory"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.flush)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.error("Activity rollup flush failed: %s", e)
+
+
+# Global activity rollup
+activity_rollup = ActivityRollup()
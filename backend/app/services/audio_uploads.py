@@ -0,0 +1,254 @@
+import json
+import os
+import secrets
+import shutil
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Iterator, Optional
+
+from fastapi import HTTPException, status
+from starlette.requests import ClientDisconnect
+
+from app.core.config import settings
+from app.services.media_store import HashingTempFile, MediaStore, media_store
+
+# Upload ids are URL-safe tokens; anything else never touches the filesystem
+_ID_CHARS = set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+COPY_BUFFER_BYTES = 1024 * 1024
+
+
+def _create_exclusive(path: str) -> Optional[int]:
+    """Create and open `path` only if it doesn't exist; None if someone holds it
+
+    Files older than AUDIO_UPLOAD_STALE_CHUNK_SECONDS are treated as left
+    behind by a crashed worker and taken over.
+    """
+    try:
+        return os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        try:
+            if time.time() - os.path.getmtime(path) < settings.audio_upload_stale_chunk_seconds:
+                return None
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        try:
+            return os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            return None
+
+
+@dataclass
+class UploadSession:
+    id: str
+    owner_id: int
+    conversation_id: int
+    size: int
+    created_at: float
+    message_id: Optional[int] = None
+
+    @property
+    def expires_at(self) -> float:
+        return self.created_at + settings.audio_upload_ttl_seconds
+
+
+class AudioUploadStore:
+    """Resumable uploads kept as offset-named chunk files on local disk
+
+    Each session is a directory under `<media_root>/uploads/` holding
+    `session.json` and one `<offset>.chunk` file per accepted PUT. The
+    upload offset is the contiguous length of the chunks, so it survives
+    restarts and needs no other bookkeeping. A chunk is written to
+    `<offset>.tmp` (created exclusively, which also serialises concurrent
+    PUTs) and renamed into place when its body ends, including when the
+    client disconnects midway: the bytes that did arrive are kept.
+    """
+
+    def __init__(self, store: MediaStore = media_store):
+        self.store = store
+        self.root = os.path.join(store.root, "uploads")
+        os.makedirs(self.root, exist_ok=True)
+        self._last_sweep = 0.0
+
+    def _dir(self, upload_id: str) -> str:
+        return os.path.join(self.root, upload_id)
+
+    def _save(self, session: UploadSession) -> None:
+        path = os.path.join(self._dir(session.id), "session.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(asdict(session), f)
+        os.replace(path + ".tmp", path)
+
+    def create(self, owner_id: int, conversation_id: int, size: int) -> UploadSession:
+        self.sweep_expired()
+        session = UploadSession(
+            id=secrets.token_urlsafe(16),
+            owner_id=owner_id,
+            conversation_id=conversation_id,
+            size=size,
+            created_at=time.time(),
+        )
+        os.makedirs(self._dir(session.id))
+        self._save(session)
+        return session
+
+    def load(self, upload_id: str, owner_id: int) -> UploadSession:
+        session = None
+        if upload_id and set(upload_id) <= _ID_CHARS:
+            try:
+                with open(os.path.join(self._dir(upload_id), "session.json"), encoding="utf-8") as f:
+                    session = UploadSession(**json.load(f))
+            except (OSError, ValueError, TypeError):
+                session = None
+        if session is None or session.owner_id != owner_id or session.expires_at < time.time():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Upload not found"
+            )
+        return session
+
+    def _chunks(self, session: UploadSession) -> list[tuple[int, str, int]]:
+        """(offset, path, length) of the stored chunks, in order"""
+        directory = self._dir(session.id)
+        chunks = []
+        for name in os.listdir(directory):
+            if name.endswith(".chunk"):
+                path = os.path.join(directory, name)
+                chunks.append((int(name[:-len(".chunk")]), path, os.path.getsize(path)))
+        return sorted(chunks)
+
+    def offset(self, session: UploadSession) -> int:
+        received = 0
+        for start, _, length in self._chunks(session):
+            if start != received:
+                break
+            received += length
+        return received
+
+    async def write_chunk(self, session: UploadSession, offset: int, body: AsyncIterator[bytes]) -> int:
+        """Append the request body at `offset`; returns the new upload offset"""
+        current = self.offset(session)
+        if offset != current:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"message": "Offset does not match the upload", "offset": current}
+            )
+        tmp = os.path.join(self._dir(session.id), f"{offset:012d}.tmp")
+        fd = _create_exclusive(tmp)
+        if fd is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"message": "A chunk is already being written at this offset", "offset": current}
+            )
+        if self.offset(session) != offset:
+            # Another PUT for this offset finished between our check and our claim
+            os.close(fd)
+            os.remove(tmp)
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"message": "Offset does not match the upload", "offset": self.offset(session)}
+            )
+
+        limit = min(settings.audio_upload_max_chunk_bytes, session.size - offset)
+        written = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                try:
+                    async for data in body:
+                        written += len(data)
+                        if written > limit:
+                            raise HTTPException(
+                                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                detail=f"Chunk exceeds {limit} bytes"
+                            )
+                        f.write(data)
+                except ClientDisconnect:
+                    pass  # keep what arrived; the client resumes from the new offset
+        except BaseException:
+            os.remove(tmp)
+            raise
+        if written:
+            os.replace(tmp, os.path.join(self._dir(session.id), f"{offset:012d}.chunk"))
+        else:
+            os.remove(tmp)
+        return offset + written
+
+    @contextmanager
+    def finalizing(self, session: UploadSession) -> Iterator[None]:
+        """Exclusive right to finalize, so a double-submitted finalize creates one message"""
+        lock = os.path.join(self._dir(session.id), "finalize.lock")
+        fd = _create_exclusive(lock)
+        if fd is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Upload is already being finalized"
+            )
+        os.close(fd)
+        try:
+            yield
+        finally:
+            os.remove(lock)
+
+    def head(self, session: UploadSession, length: int = 16) -> bytes:
+        chunks = self._chunks(session)
+        if not chunks or chunks[0][0] != 0:
+            return b""
+        with open(chunks[0][1], "rb") as f:
+            return f.read(length)
+
+    def assemble(self, session: UploadSession) -> HashingTempFile:
+        """Concatenate the chunks into a hashed temp file in the media root
+
+        Copies through a fixed buffer, so memory does not grow with the
+        recording's length.
+        """
+        target = self.store.temp_file(session.size, head_bytes=16)
+        try:
+            for _, path, _ in self._chunks(session):
+                with open(path, "rb") as f:
+                    while data := f.read(COPY_BUFFER_BYTES):
+                        target.write(data)
+            target.close()
+        except BaseException:
+            target.discard()
+            raise
+        return target
+
+    def complete(self, session: UploadSession, message_id: int) -> None:
+        """Record the created message and drop the chunks
+
+        The session itself stays until it expires so a retried finalize
+        returns the same message instead of a 404.
+        """
+        session.message_id = message_id
+        self._save(session)
+        for _, path, _ in self._chunks(session):
+            os.remove(path)
+
+    def delete(self, session: UploadSession) -> None:
+        shutil.rmtree(self._dir(session.id), ignore_errors=True)
+
+    def sweep_expired(self, interval: float = 600.0) -> None:
+        """Remove expired sessions; runs at most once per `interval` per process"""
+        now = time.time()
+        if now - self._last_sweep < interval:
+            return
+        self._last_sweep = now
+        for upload_id in os.listdir(self.root):
+            directory = self._dir(upload_id)
+            try:
+                with open(os.path.join(directory, "session.json"), encoding="utf-8") as f:
+                    created_at = json.load(f)["created_at"]
+            except (OSError, ValueError, KeyError):
+                # Half-created session: judge by the directory's age instead
+                try:
+                    created_at = os.path.getmtime(directory)
+                except OSError:
+                    continue
+            if created_at + settings.audio_upload_ttl_seconds < now:
+                shutil.rmtree(directory, ignore_errors=True)
+
+
+# Global audio upload store
+audio_uploads = AudioUploadStore()
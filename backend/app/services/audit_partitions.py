@@ -0,0 +1,180 @@
+import gzip
+import logging
+import os
+import re
+from datetime import date, datetime
+from typing import Iterator, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.audit import AuditLog
+
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "audit_logs"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+_PARTITION_RE = re.compile(rf"^{PARENT_TABLE}_p(\d{{4}})(\d{{2}})$")
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def iter_months(start: date, end: date) -> Iterator[date]:
+    """Yield the first day of each month from `start` up to and including `end`"""
+    current, last = month_start(start), month_start(end)
+    while current <= last:
+        yield current
+        current = add_months(current, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_p{month:%Y%m}"
+
+
+def _parse_partitions(names) -> list[tuple[str, date]]:
+    partitions = []
+    for name in names:
+        match = _PARTITION_RE.match(name)
+        if match:
+            partitions.append((name, date(int(match[1]), int(match[2]), 1)))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+def list_partitions(db: Session) -> list[tuple[str, date]]:
+    """Monthly partitions currently attached to audit_logs, oldest first"""
+    return _parse_partitions(db.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :parent"
+    ), {"parent": PARENT_TABLE}).scalars())
+
+
+def list_detached_partitions(db: Session) -> list[tuple[str, date]]:
+    """Tables named like a monthly partition but no longer attached, oldest first
+
+    Older archive runs detached a partition before copying it out, so a
+    failed run could leave one behind.
+    """
+    return _parse_partitions(db.execute(text(
+        "SELECT c.relname FROM pg_class c "
+        "JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE c.relkind = 'r' AND NOT c.relispartition "
+        "AND n.nspname = current_schema() AND c.relname LIKE :pattern"
+    ), {"pattern": f"{PARENT_TABLE}\\_p%"}).scalars())
+
+
+def _has_default_partition(db: Session) -> bool:
+    return db.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": DEFAULT_PARTITION}).scalar()
+
+
+def _create_partition(db: Session, name: str, month: date, has_default: bool) -> int:
+    """Create the partition for `month`; returns rows moved into it from the default partition"""
+    start, end = month.isoformat(), add_months(month, 1).isoformat()
+    bounds = f"FOR VALUES FROM ('{start}') TO ('{end}')"
+    if not has_default:
+        db.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} {bounds}"))
+        return 0
+
+    # CREATE ... PARTITION OF fails if the default partition already holds rows
+    # for this month (the job fell behind), so build the table, move those rows
+    # into it and attach it. The lock keeps new rows out of the default meanwhile.
+    columns = ", ".join(column.name for column in AuditLog.__table__.columns)
+    db.execute(text(f"LOCK TABLE {DEFAULT_PARTITION} IN ACCESS EXCLUSIVE MODE"))
+    db.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)"))
+    moved = db.execute(text(
+        f"WITH moved AS ("
+        f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end RETURNING {columns}"
+        f") INSERT INTO {name} ({columns}) SELECT {columns} FROM moved"
+    ), {"start": start, "end": end}).rowcount
+    db.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} {bounds}"))
+    return moved
+
+
+def ensure_partitions(db: Session, months_ahead: int = settings.audit_partitions_ahead,
+                      today: Optional[date] = None) -> list[str]:
+    """Create partitions for the current month and `months_ahead` upcoming ones
+
+    Rows that landed in the default partition for a month without its own
+    partition are moved into the new partition.
+    """
+    current = month_start(today or datetime.utcnow().date())
+    existing = {name for name, _ in list_partitions(db)}
+    has_default = _has_default_partition(db)
+    created = []
+    for month in iter_months(current, add_months(current, months_ahead)):
+        name = partition_name(month)
+        if name in existing:
+            continue
+        moved = _create_partition(db, name, month, has_default)
+        db.commit()
+        created.append(name)
+        logger.info("Created audit partition %s (%d rows moved from %s)", name, moved, DEFAULT_PARTITION)
+    return created
+
+
+def archive_expired_partitions(db: Session, retention_months: int = settings.audit_retention_months,
+                               archive_dir: str = settings.audit_archive_dir,
+                               today: Optional[date] = None) -> list[str]:
+    """Archive partitions older than the retention window as gzipped CSV, then detach and drop them
+
+    A partition is copied out while still attached and only detached and
+    dropped, in one transaction, once its archive is on disk; if anything
+    fails it stays in audit_logs for the next run. Expired tables left
+    detached by an earlier failed run are archived and dropped too.
+    Returns the archive file paths written.
+    """
+    cutoff = add_months(month_start(today or datetime.utcnow().date()), -retention_months)
+    expired = [(name, month, True) for name, month in list_partitions(db) if month < cutoff]
+    expired += [(name, month, False) for name, month in list_detached_partitions(db) if month < cutoff]
+    if not expired:
+        return []
+
+    os.makedirs(archive_dir, exist_ok=True)
+    archives = []
+    for name, month, attached in sorted(expired, key=lambda p: p[1]):
+        path = os.path.join(archive_dir, f"{name}.csv.gz")
+        partial = path + ".partial"
+        try:
+            # Nothing should write to an expired month, but make sure the copy is complete
+            db.execute(text(f"LOCK TABLE {name} IN SHARE MODE"))
+            cursor = db.connection().connection.cursor()
+            with gzip.open(partial, "wt", encoding="utf-8") as f:
+                cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", f)
+            os.replace(partial, path)
+
+            if attached:
+                db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+            db.execute(text(f"DROP TABLE {name}"))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        archives.append(path)
+        logger.info("Archived audit partition %s to %s", name, path)
+    return archives
+
+
+def prune_by_created_at(statement, date_from: Optional[datetime] = None,
+                        date_to: Optional[datetime] = None, before: Optional[datetime] = None):
+    """Add plain created_at bounds so the planner can prune partitions
+
+    `before` is the created_at of a keyset cursor: a row comparison on
+    (created_at, id) alone does not let PostgreSQL exclude newer partitions.
+    """
+    if date_from:
+        statement = statement.where(AuditLog.created_at >= date_from)
+    if date_to:
+        statement = statement.where(AuditLog.created_at < date_to)
+    if before:
+        statement = statement.where(AuditLog.created_at <= before)
+    return statement
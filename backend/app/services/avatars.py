@@ -0,0 +1,147 @@
+import logging
+import os
+import re
+import threading
+import time
+from typing import Iterable, Optional
+
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.services.image_processing import render_avatar_variants
+from app.services.media_store import MediaStore, media_pool, media_store
+
+
+logger = logging.getLogger(__name__)
+
+AVATAR_KIND = "avatars"
+# Variants are a cache: they live apart from the originals and may be evicted
+VARIANT_KIND = "avatar_variants"
+VARIANT_RE = re.compile(r"^([0-9a-f]{64})\.(\d+)\.png$")
+AVATAR_URL_RE = re.compile(r"^/media/avatars/([0-9a-f]{64})\.png$")
+
+
+def avatar_name(digest: str) -> str:
+    return f"{digest}.png"
+
+
+def variant_name(digest: str, size: int) -> str:
+    return f"{digest}.{size}.png"
+
+
+def stored_avatar_digest(avatar_url: Optional[str]) -> Optional[str]:
+    """Content hash of an avatar uploaded here, None for external URLs"""
+    match = AVATAR_URL_RE.match(avatar_url or "")
+    return match.group(1) if match else None
+
+
+def variant_urls(digest: str, sizes: Iterable[int] = settings.avatar_sizes) -> dict[int, str]:
+    return {size: MediaStore.url(AVATAR_KIND, variant_name(digest, size)) for size in sizes}
+
+
+class AvatarVariantCache:
+    """Size-bounded on-disk LRU of resized avatars
+
+    Recency is the file mtime, refreshed on access (at most once per
+    `touch_interval`), so every app process shares one LRU order through the
+    filesystem. Each process tracks an estimate of the bytes on disk; once
+    it passes `max_bytes` the directory is scanned and the least recently
+    used variants are deleted down to 90% of the bound. Evicted variants are
+    re-rendered from the original on their next request.
+    """
+
+    def __init__(
+        self,
+        store: MediaStore = media_store,
+        max_bytes: int = settings.avatar_cache_max_bytes,
+        sizes: Iterable[int] = settings.avatar_sizes,
+        touch_interval: float = 60.0,
+    ):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.sizes = tuple(sizes)
+        self.touch_interval = touch_interval
+        self.root = os.path.join(store.root, VARIANT_KIND)
+        self._lock = threading.Lock()
+        self._bytes: Optional[int] = None
+        self._flight = SingleFlight()
+
+    def get(self, digest: str, size: int) -> Optional[str]:
+        """Path of the variant, rendering it first if missing; None if unknown
+
+        Concurrent misses for the same variant render it once.
+        """
+        if size not in self.sizes:
+            return None
+        path = self.store.path(VARIANT_KIND, variant_name(digest, size))
+        try:
+            stat_result = os.stat(path)
+        except FileNotFoundError:
+            if not self.store.exists(AVATAR_KIND, avatar_name(digest)):
+                return None
+            self._flight.do(path, lambda: self._render(digest, [size]))
+            return path
+        if time.time() - stat_result.st_mtime > self.touch_interval:
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass  # evicted by another process just now
+        return path
+
+    def precompute(self, digest: str) -> None:
+        """Render every missing variant of an avatar in one pool task"""
+        missing = [
+            size for size in self.sizes
+            if not self.store.exists(VARIANT_KIND, variant_name(digest, size))
+        ]
+        if missing:
+            self._flight.do((digest, tuple(missing)), lambda: self._render(digest, missing))
+
+    def _render(self, digest: str, sizes: list[int]) -> None:
+        source = self.store.path(AVATAR_KIND, avatar_name(digest))
+        targets = [(size, self.store.prepare(VARIANT_KIND, variant_name(digest, size))) for size in sizes]
+        written = media_pool().submit(render_avatar_variants, source, targets).result()
+        self._account(sum(written))
+
+    def _account(self, added: int) -> None:
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = sum(size for _, size, _ in self._scan())
+            else:
+                self._bytes += added
+            if self._bytes > self.max_bytes:
+                self._bytes = self._evict(int(self.max_bytes * 0.9))
+
+    def _scan(self) -> list[tuple[float, int, str]]:
+        """(mtime, size, path) of every variant on disk"""
+        entries = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if not VARIANT_RE.match(filename):
+                    continue  # temp files from in-progress renders
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat_result = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat_result.st_mtime, stat_result.st_size, path))
+        return entries
+
+    def _evict(self, target_bytes: int) -> int:
+        entries = sorted(self._scan())
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in entries:
+            if total <= target_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        logger.info("Evicted %d avatar variants (%d bytes remain)", evicted, total)
+        return total
+
+
+# Global avatar variant cache
+avatar_cache = AvatarVariantCache()
@@ -0,0 +1,378 @@
+import asyncio
+import json
+import logging
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+import redis
+import redis.asyncio as aioredis
+from fastapi import WebSocket
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+SIGNAL_TYPES = ("signal:offer", "signal:answer", "signal:ice")
+NODE_CHANNEL_PREFIX = "calls:node:"
+MAX_SDP_LENGTH = 64 * 1024
+MAX_ICE_BATCH = 32
+ROOM_TTL_SECONDS = 86400
+NODE_HEARTBEAT_SECONDS = 10
+NODE_ALIVE_TTL_SECONDS = 30
+
+
+def _is_end_of_candidates(candidate) -> bool:
+    if isinstance(candidate, dict):
+        return not candidate.get("candidate")
+    return not candidate
+
+
+@dataclass(eq=False)
+class Peer:
+    peer_id: str
+    user_id: int
+    room_id: int
+    websocket: WebSocket
+
+
+class _Room:
+    __slots__ = ("local", "remote")
+
+    def __init__(self):
+        self.local: dict[str, Peer] = {}
+        self.remote: dict[str, tuple[int, str]] = {}  # peer id -> (user id, node id)
+
+
+class _Shard:
+    __slots__ = ("rooms", "lock")
+
+    def __init__(self):
+        self.rooms: dict[int, _Room] = {}
+        self.lock = asyncio.Lock()
+
+
+class CallSignaling:
+    """WebRTC signaling relay: offers, answers and ICE candidates between peers
+
+    Rooms live in memory, sharded by room id. Joining and leaving await
+    Redis, so each shard has its own lock: membership changes in one room
+    are serialised without holding up rooms in other shards.
+
+    Every peer is also recorded in the room's Redis hash with the node it is
+    connected to. Signals between peers on the same node never touch Redis;
+    a signal for a peer on another node is published on that node's own
+    channel, so nodes only receive traffic for their peers. Each node also
+    refreshes a short-lived heartbeat key; a join drops registered peers
+    whose node's heartbeat has expired, so a crashed node's peers do not
+    keep the room full.
+
+    Browsers trickle ICE candidates one at a time. Candidates from one peer
+    to another are held for `ice_batch_interval` and sent as one
+    `signal:ice` frame (duplicates dropped); an offer or answer flushes the
+    pending candidates first so the remote side sees them in order.
+    """
+
+    def __init__(
+        self,
+        redis_client=None,
+        node_id: Optional[str] = None,
+        shards: int = settings.call_registry_shards,
+        ice_batch_interval: float = settings.call_ice_batch_ms / 1000,
+        max_peers: int = settings.call_max_peers,
+        send_timeout: float = settings.stream_send_timeout_seconds,
+    ):
+        self.redis = redis_client or aioredis.from_url(str(settings.redis_url))
+        self.node_id = node_id or uuid.uuid4().hex[:12]
+        self.ice_batch_interval = ice_batch_interval
+        self.max_peers = max_peers
+        self.send_timeout = send_timeout
+        self._shards = [_Shard() for _ in range(shards)]
+        self._ice: dict[tuple[int, str, str], list] = {}  # (room, from, to) -> pending candidates
+        self._flushes: set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    @property
+    def channel(self) -> str:
+        return f"{NODE_CHANNEL_PREFIX}{self.node_id}"
+
+    @staticmethod
+    def _alive_key(node_id: str) -> str:
+        return f"{NODE_CHANNEL_PREFIX}{node_id}:alive"
+
+    @staticmethod
+    def _room_key(room_id: int) -> str:
+        return f"call:{room_id}:peers"
+
+    def _shard(self, room_id: int) -> _Shard:
+        return self._shards[room_id % len(self._shards)]
+
+    def _room(self, room_id: int) -> Optional[_Room]:
+        return self._shard(room_id).rooms.get(room_id)
+
+    def room_count(self) -> int:
+        return sum(len(shard.rooms) for shard in self._shards)
+
+    async def _send(self, peer: Peer, frame: dict) -> None:
+        try:
+            await asyncio.wait_for(peer.websocket.send_json(frame), self.send_timeout)
+        except Exception:
+            # The peer's own handler notices the dead socket and leaves
+            pass
+
+    async def _publish(self, node_id: str, message: dict) -> int:
+        try:
+            return await self.redis.publish(f"{NODE_CHANNEL_PREFIX}{node_id}", json.dumps(message))
+        except redis.RedisError as e:
+            logger.warning("Call relay unavailable: %s", e)
+            return -1
+
+    async def _announce(self, room_id: int, local: list[Peer], remote_nodes: set[str], frame: dict) -> None:
+        """Send `frame` to the given local peers and, once per node, to the room's remote peers"""
+        message = {"kind": "announce", "room": room_id, "node": self.node_id, "frame": frame}
+        await asyncio.gather(
+            *(self._send(peer, frame) for peer in local),
+            *(self._publish(node_id, message) for node_id in remote_nodes),
+        )
+
+    def _remote_members(self, members: dict) -> dict[str, tuple[int, str]]:
+        remote = {}
+        for member_id, value in members.items():
+            user_id, node_id = json.loads(value)
+            if node_id != self.node_id:
+                remote[member_id.decode()] = (user_id, node_id)
+        return remote
+
+    async def _drop_dead_nodes(self, key: str, remote: dict[str, tuple[int, str]]) -> dict[str, tuple[int, str]]:
+        """Remove peers from the room's hash whose node has stopped heartbeating"""
+        nodes = sorted({node_id for _, node_id in remote.values()})
+        if not nodes:
+            return remote
+        alive = await self.redis.mget([self._alive_key(node_id) for node_id in nodes])
+        dead = {node_id for node_id, value in zip(nodes, alive) if value is None}
+        if not dead:
+            return remote
+        ghosts = [peer_id for peer_id, (_, node_id) in remote.items() if node_id in dead]
+        await self.redis.hdel(key, *ghosts)
+        logger.info("Dropped %d peers of stopped nodes from call room %s", len(ghosts), key)
+        return {peer_id: member for peer_id, member in remote.items() if member[1] not in dead}
+
+    async def join(self, room_id: int, user_id: int, websocket: WebSocket) -> Optional[Peer]:
+        """Add a peer and tell the room; None if the room is full
+
+        The new peer gets `call:peers` listing everyone already in the room;
+        the others get `call:joined`.
+        """
+        peer = Peer(uuid.uuid4().hex[:16], user_id, room_id, websocket)
+        key = self._room_key(room_id)
+        shard = self._shard(room_id)
+        async with shard.lock:
+            room = shard.rooms.setdefault(room_id, _Room())
+            try:
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.set(self._alive_key(self.node_id), 1, ex=NODE_ALIVE_TTL_SECONDS)
+                    pipe.hset(key, peer.peer_id, json.dumps([user_id, self.node_id]))
+                    pipe.hgetall(key)
+                    _, _, members = await pipe.execute()
+                room.remote = await self._drop_dead_nodes(key, self._remote_members(members))
+            except redis.RedisError as e:
+                logger.warning("Call registry unavailable, room is local only: %s", e)
+
+            if len(room.local) + len(room.remote) >= self.max_peers:
+                if not room.local:
+                    del shard.rooms[room_id]
+                try:
+                    await self.redis.hdel(key, peer.peer_id)
+                except redis.RedisError:
+                    pass
+                return None
+            try:
+                # Only an admitted peer keeps the room alive
+                await self.redis.expire(key, ROOM_TTL_SECONDS)
+            except redis.RedisError:
+                pass
+            others = list(room.local.values())
+            room.local[peer.peer_id] = peer
+            remote_peers = dict(room.remote)
+
+        await self._send(peer, {
+            "type": "call:peers",
+            "peer_id": peer.peer_id,
+            "peers": [{"peer_id": other.peer_id, "user_id": other.user_id} for other in others] + [
+                {"peer_id": peer_id, "user_id": other_user_id}
+                for peer_id, (other_user_id, _) in remote_peers.items()
+            ],
+        })
+        await self._announce(
+            room_id, others, {node_id for _, node_id in remote_peers.values()},
+            {"type": "call:joined", "peer_id": peer.peer_id, "user_id": user_id},
+        )
+        return peer
+
+    async def leave(self, peer: Peer) -> None:
+        shard = self._shard(peer.room_id)
+        async with shard.lock:
+            room = shard.rooms.get(peer.room_id)
+            if room is None or room.local.pop(peer.peer_id, None) is None:
+                return
+            others = list(room.local.values())
+            remote = room.remote
+            try:
+                # Nodes are read with the removal, so one that joined after our
+                # last look at the room still hears about it
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.hdel(self._room_key(peer.room_id), peer.peer_id)
+                    pipe.hgetall(self._room_key(peer.room_id))
+                    _, members = await pipe.execute()
+                remote = self._remote_members(members)
+            except redis.RedisError as e:
+                logger.warning("Call registry unavailable: %s", e)
+            if not room.local:
+                # Remote peers are only tracked while someone here is in the call
+                del shard.rooms[peer.room_id]
+        for key in [key for key in self._ice if peer.peer_id in key[1:]]:
+            del self._ice[key]
+        await self._announce(
+            peer.room_id, others, {node_id for _, node_id in remote.values()},
+            {"type": "call:left", "peer_id": peer.peer_id},
+        )
+
+    async def _forget_remote(self, room_id: int, peer_id: str) -> None:
+        """Drop a peer whose node no longer listens (crashed without leaving)"""
+        async with self._shard(room_id).lock:
+            room = self._room(room_id)
+            if room is None or room.remote.pop(peer_id, None) is None:
+                return
+            others = list(room.local.values())
+        try:
+            await self.redis.hdel(self._room_key(room_id), peer_id)
+        except redis.RedisError:
+            pass
+        frame = {"type": "call:left", "peer_id": peer_id}
+        await asyncio.gather(*(self._send(peer, frame) for peer in others))
+
+    async def _deliver(self, room_id: int, to: str, frame: dict) -> None:
+        room = self._room(room_id)
+        if room is None:
+            return
+        peer = room.local.get(to)
+        if peer is not None:
+            await self._send(peer, frame)
+            return
+        remote = room.remote.get(to)
+        if remote is None:
+            return
+        receivers = await self._publish(remote[1], {"kind": "signal", "room": room_id, "to": to, "frame": frame})
+        if receivers == 0:
+            await self._forget_remote(room_id, to)
+
+    async def signal(self, peer: Peer, data: dict) -> bool:
+        """Route an offer, answer or ICE candidate(s) to `data["to"]`; False if malformed"""
+        kind, to = data.get("type"), data.get("to")
+        if kind not in SIGNAL_TYPES or not isinstance(to, str) or to == peer.peer_id:
+            return False
+        key = (peer.room_id, peer.peer_id, to)
+
+        if kind == "signal:ice":
+            if isinstance(data.get("candidates"), list):
+                candidates = data["candidates"]
+            elif "candidate" in data:
+                candidates = [data["candidate"]]
+            else:
+                return False
+            pending = self._ice.get(key)
+            if pending is None:
+                pending = self._ice[key] = []
+                task = asyncio.create_task(self._flush_ice_later(key))
+                self._flushes.add(task)
+                task.add_done_callback(self._flushes.discard)
+            for candidate in candidates:
+                if candidate not in pending:
+                    pending.append(candidate)
+            # A null or empty candidate marks the end of gathering: nothing more to wait for
+            if len(pending) >= MAX_ICE_BATCH or any(_is_end_of_candidates(c) for c in candidates):
+                await self._flush_ice(key)
+            return True
+
+        sdp = data.get("sdp")
+        if not isinstance(sdp, str) or len(sdp) > MAX_SDP_LENGTH:
+            return False
+        await self._flush_ice(key)
+        await self._deliver(peer.room_id, to, {"type": kind, "from": peer.peer_id, "sdp": sdp})
+        return True
+
+    async def _flush_ice(self, key: tuple[int, str, str]) -> None:
+        candidates = self._ice.pop(key, None)
+        if candidates:
+            room_id, sender, to = key
+            await self._deliver(room_id, to, {"type": "signal:ice", "from": sender, "candidates": candidates})
+
+    async def _flush_ice_later(self, key: tuple[int, str, str]) -> None:
+        await asyncio.sleep(self.ice_batch_interval)
+        await self._flush_ice(key)
+
+    async def _receive(self, message: dict) -> None:
+        room_id = message["room"]
+        if message["kind"] == "signal":
+            await self._deliver(room_id, message["to"], message["frame"])
+            return
+        frame = message["frame"]
+        async with self._shard(room_id).lock:
+            room = self._room(room_id)
+            if room is None:
+                return
+            if frame["type"] == "call:joined":
+                room.remote[frame["peer_id"]] = (frame["user_id"], message["node"])
+            elif frame["type"] == "call:left":
+                room.remote.pop(frame["peer_id"], None)
+            others = list(room.local.values())
+        await asyncio.gather(*(self._send(peer, frame) for peer in others))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+        if self._heartbeat_task is None:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+
+    async def stop(self) -> None:
+        for task in (self._task, self._heartbeat_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._heartbeat_task = None
+        try:
+            await self.redis.delete(self._alive_key(self.node_id))
+        except redis.RedisError:
+            pass
+
+    async def _heartbeat(self) -> None:
+        while True:
+            try:
+                await self.redis.set(self._alive_key(self.node_id), 1, ex=NODE_ALIVE_TTL_SECONDS)
+            except redis.RedisError as e:
+                logger.warning("Call node heartbeat failed: %s", e)
+            await asyncio.sleep(NODE_HEARTBEAT_SECONDS)
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        await self._receive(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Call relay listener failed: %s", e)
+                await asyncio.sleep(1)
+
+
+# Global signaling relay
+call_signaling = CallSignaling()
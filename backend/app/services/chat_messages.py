@@ -0,0 +1,20 @@
+from sqlalchemy.orm import Session
+
+from app.models.message import Message
+from app.services.activity_rollup import activity_rollup
+from app.services.moderation_stream import enqueue_for_moderation
+
+
+def save_message(db: Session, message: Message, redis_client) -> Message:
+    """Commit a new chat message and run the hooks every new message needs
+
+    Counts it for the activity rollup and queues it for the moderation
+    workers (out-of-band, never blocks delivery). Every path that creates
+    messages goes through here so none of them skips moderation.
+    """
+    db.add(message)
+    db.commit()
+    db.refresh(message)
+    activity_rollup.message_sent(message.sender_id, message.conversation_id, message.created_at)
+    enqueue_for_moderation(redis_client, message.id, message.sender_id)
+    return message
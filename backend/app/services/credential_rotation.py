@@ -0,0 +1,182 @@
+import json
+import logging
+import os
+import signal
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional
+
+from cryptography.fernet import InvalidToken
+from sqlalchemy import bindparam, or_, select, update
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.keyring import Keyring
+from app.models.user import GameCredential
+
+
+logger = logging.getLogger(__name__)
+
+_worker_keyring: Optional[Keyring] = None
+
+
+def _init_worker() -> None:
+    # Each process builds its own keyring from settings; keys never cross the pipe
+    global _worker_keyring
+    # Ctrl-C pauses the parent, which lets in-flight chunks finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_keyring = Keyring.from_settings()
+
+
+def rotate_chunk(rows: list[tuple[int, str, Optional[str]]]) -> tuple[list[dict], list[int]]:
+    """Re-encrypt (id, ciphertext, key_id) rows under the primary key
+
+    Returns update parameters for the rows that decrypted and the ids of rows
+    no configured key could decrypt.
+    """
+    keyring = _worker_keyring or Keyring.from_settings()
+    updates, failed = [], []
+    for row_id, ciphertext, key_id in rows:
+        try:
+            new_key_id, token = keyring.rotate(ciphertext, key_id)
+        except InvalidToken:
+            failed.append(row_id)
+            continue
+        updates.append({
+            "row_id": row_id,
+            "old_ciphertext": ciphertext,
+            "new_ciphertext": token.decode(),
+            "new_key_id": new_key_id,
+        })
+    return updates, failed
+
+
+# Compare-and-set on the old ciphertext: a row rewritten by the app meanwhile is left alone
+_credentials = GameCredential.__table__
+UPDATE_ROTATED = update(_credentials).where(
+    _credentials.c.id == bindparam("row_id"),
+    _credentials.c.password_ciphertext == bindparam("old_ciphertext"),
+).values(
+    password_ciphertext=bindparam("new_ciphertext"),
+    key_id=bindparam("new_key_id"),
+)
+
+
+@dataclass
+class RotationState:
+    """Checkpoint of a re-encryption run, saved after every chunk"""
+    primary_key_id: str
+    last_id: int = 0
+    rotated: int = 0
+    skipped: int = 0  # changed concurrently by the app
+    failed: int = 0  # no configured key decrypts them
+    elapsed_seconds: float = 0.0
+
+    @classmethod
+    def load(cls, path: str, primary_key_id: str) -> "RotationState":
+        """Resume from `path` if it belongs to a run for the same primary key"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                state = cls(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return cls(primary_key_id)
+        return state if state.primary_key_id == primary_key_id else cls(primary_key_id)
+
+    def save(self, path: str) -> None:
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f)
+        os.replace(tmp, path)
+
+
+class ReencryptionJob:
+    """Re-encrypt every GameCredential not yet under the primary key
+
+    Rows are streamed in id order through a server-side cursor (`yield_per`),
+    decrypted and re-encrypted in chunks across a process pool, and written
+    back with one executemany UPDATE per chunk. The state file records the
+    last finished id, so a stopped run resumes where it left off; rows
+    already under the primary key are never selected again either way.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        chunk_size: int = settings.reencrypt_chunk_size,
+        workers: int = settings.reencrypt_workers,
+        state_path: str = "reencrypt_state.json",
+        primary_key_id: str = settings.encryption_key_id,
+    ):
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.state_path = state_path
+        self.primary_key_id = primary_key_id
+        self.state = RotationState.load(state_path, primary_key_id)
+
+    def pending_query(self):
+        return select(
+            GameCredential.id, GameCredential.password_ciphertext, GameCredential.key_id
+        ).where(
+            or_(GameCredential.key_id.is_(None), GameCredential.key_id != self.primary_key_id),
+            GameCredential.id > self.state.last_id,
+        ).order_by(GameCredential.id)
+
+    def run(
+        self,
+        should_stop: Callable[[], bool] = lambda: False,
+        progress: Optional[Callable[[RotationState, float], None]] = None,
+        progress_interval: float = 5.0,
+    ) -> RotationState:
+        """Process rows until done or `should_stop()`; returns the saved state"""
+        started = time.monotonic()
+        base_elapsed = self.state.elapsed_seconds
+        base_rows = self.state.rotated + self.state.skipped
+        last_report = started
+        window: deque[tuple[int, Future]] = deque()
+        reader = self.session_factory()
+        writer = self.session_factory()
+
+        def finish_oldest() -> None:
+            nonlocal last_report
+            last_id, future = window.popleft()
+            updates, failed = future.result()
+            if updates:
+                result = writer.execute(UPDATE_ROTATED, updates)
+                writer.commit()
+                # Some drivers don't report executemany rowcounts (-1)
+                written = result.rowcount if result.rowcount >= 0 else len(updates)
+                self.state.rotated += written
+                self.state.skipped += len(updates) - written
+            if failed:
+                logger.error("No configured key decrypts credentials %s", failed)
+                self.state.failed += len(failed)
+            self.state.last_id = last_id
+            now = time.monotonic()
+            self.state.elapsed_seconds = base_elapsed + now - started
+            self.state.save(self.state_path)
+            if progress and now - last_report >= progress_interval:
+                rows = self.state.rotated + self.state.skipped - base_rows
+                progress(self.state, rows / max(now - started, 1e-9))
+                last_report = now
+
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as pool:
+                result = reader.execute(self.pending_query().execution_options(yield_per=self.chunk_size))
+                for rows in result.partitions():
+                    if should_stop():
+                        break
+                    chunk = [tuple(row) for row in rows]
+                    window.append((chunk[-1][0], pool.submit(rotate_chunk, chunk)))
+                    # Bounded in flight; results are applied in id order so the checkpoint stays contiguous
+                    while len(window) >= self.workers * 2:
+                        finish_oldest()
+                result.close()
+                while window:
+                    finish_oldest()
+        finally:
+            reader.close()
+            writer.close()
+        return self.state
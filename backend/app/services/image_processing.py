@@ -0,0 +1,80 @@
+"""Image work executed in the media process pool
+
+Functions here take and return only paths and plain values so they can be
+pickled across the pool. Output is written to a temp name and renamed into
+place, so readers never see a half-written file.
+"""
+import os
+
+from PIL import Image, ImageOps
+
+
+class ImageRejected(ValueError):
+    pass
+
+
+def _save_atomic(image: Image.Image, path: str, format: str, **options) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    image.save(tmp, format=format, **options)
+    os.replace(tmp, path)
+
+
+def process_screenshot(src: str, dst: str, thumb_dst: str, format: str, thumb_width: int, max_pixels: int) -> tuple[int, int]:
+    """Re-encode `src` without EXIF/metadata into `dst` and write a WebP thumbnail
+
+    Returns the (width, height) of the stored image. Rejects images whose
+    header declares more than `max_pixels`, before any pixel data is decoded.
+    """
+    with Image.open(src) as image:
+        width, height = image.size
+        if width * height > max_pixels:
+            raise ImageRejected(f"Image is too large ({width}x{height})")
+        # Apply the EXIF orientation to the pixels, since the tag itself is dropped
+        image = ImageOps.exif_transpose(image)
+        if format == "jpeg":
+            image = image.convert("RGB")
+            # No exif/icc/comment arguments: nothing but pixels is written
+            _save_atomic(image, dst, "JPEG", quality=90, optimize=True)
+        elif format == "png":
+            _save_atomic(image, dst, "PNG", optimize=True)
+        else:
+            _save_atomic(image, dst, "WEBP", quality=90)
+
+        thumb = image.copy()
+        thumb.thumbnail((thumb_width, thumb_width * 4), Image.Resampling.LANCZOS)
+        if thumb.mode not in ("RGB", "RGBA"):
+            thumb = thumb.convert("RGBA")
+        _save_atomic(thumb, thumb_dst, "WEBP", quality=80)
+        return image.size
+
+
+def process_avatar(src: str, dst: str, max_pixels: int) -> tuple[int, int]:
+    """Centre-crop `src` to a square and store it as PNG without metadata"""
+    with Image.open(src) as image:
+        width, height = image.size
+        if width * height > max_pixels:
+            raise ImageRejected(f"Image is too large ({width}x{height})")
+        image = ImageOps.exif_transpose(image)
+        side = min(image.size)
+        left, top = (image.width - side) // 2, (image.height - side) // 2
+        image = image.crop((left, top, left + side, top + side))
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        _save_atomic(image, dst, "PNG", optimize=True)
+        return image.size
+
+
+def render_avatar_variants(src: str, targets: list[tuple[int, str]]) -> list[int]:
+    """Write a `size`x`size` nearest-neighbour PNG for each (size, path)
+
+    Nearest-neighbour keeps pixel art crisp at every size instead of
+    blurring it. The source is decoded once for all targets. Returns the
+    byte size of each written file.
+    """
+    written = []
+    with Image.open(src) as image:
+        image.load()
+        for size, path in targets:
+            _save_atomic(image.resize((size, size), Image.Resampling.NEAREST), path, "PNG")
+            written.append(os.path.getsize(path))
+    return written
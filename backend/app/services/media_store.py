@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+from app.core.config import settings
+
+
+class HashingTempFile:
+    """Temp file that hashes and counts bytes as they are written
+
+    Created inside the media root so a finished upload can be moved into
+    place with an atomic rename. `check_head` is called once with the first
+    `head_bytes` bytes so bad uploads can be rejected before the rest arrives.
+    """
+
+    def __init__(
+        self,
+        store: "MediaStore",
+        max_bytes: int,
+        head_bytes: int = 0,
+        check_head: Optional[Callable[[bytes], None]] = None,
+    ):
+        fd, self.path = tempfile.mkstemp(dir=store.tmp_dir, suffix=".part")
+        self._file = os.fdopen(fd, "wb")
+        self._hash = hashlib.sha256()
+        self.max_bytes = max_bytes
+        self.head_bytes = head_bytes
+        self.check_head = check_head
+        self.head = b""
+        self.size = 0
+
+    def write(self, data: bytes) -> None:
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise OverflowError(f"Upload exceeds {self.max_bytes} bytes")
+        if len(self.head) < self.head_bytes:
+            self.head += data[:self.head_bytes - len(self.head)]
+            if len(self.head) == self.head_bytes and self.check_head:
+                self.check_head(self.head)
+        self._hash.update(data)
+        self._file.write(data)
+
+    @property
+    def digest(self) -> str:
+        return self._hash.hexdigest()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def discard(self) -> None:
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class MediaStore:
+    """Content-addressed files under MEDIA_ROOT
+
+    Files are named by the SHA-256 of their uploaded bytes and sharded by the
+    first two hex digits: `<root>/<kind>/ab/abcdef....png`. Identical uploads
+    map to the same name, so each is stored (and processed) once.
+    """
+
+    def __init__(self, root: str = settings.media_root):
+        self.root = root
+        self.tmp_dir = os.path.join(root, "tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def temp_file(self, max_bytes: int, head_bytes: int = 0, check_head=None) -> HashingTempFile:
+        return HashingTempFile(self, max_bytes, head_bytes, check_head)
+
+    @staticmethod
+    def relative_path(kind: str, name: str) -> str:
+        return f"{kind}/{name[:2]}/{name}"
+
+    def path(self, kind: str, name: str) -> str:
+        return os.path.join(self.root, self.relative_path(kind, name))
+
+    @staticmethod
+    def url(kind: str, name: str) -> str:
+        return f"/media/{kind}/{name}"
+
+    def exists(self, kind: str, name: str) -> bool:
+        return os.path.exists(self.path(kind, name))
+
+    def prepare(self, kind: str, name: str) -> str:
+        """Absolute path for `name`, creating its shard directory"""
+        path = self.path(kind, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+
+# Global media store
+media_store = MediaStore()
+
+# CPU-heavy media work (decoding, EXIF stripping, resizing) runs off the event loop
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def media_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.media_workers)
+    return _pool
+
+
+async def run_in_media_pool(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(media_pool(), fn, *args)
+
+
+def shutdown_media_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,86 @@
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+from fastapi import HTTPException, Request, status
+
+from app.core.config import settings
+from app.core.media_types import SNIFF_BYTES, sniff_image_type
+from app.core.multipart_stream import MultipartError, StreamingMultipart
+from app.services.media_store import HashingTempFile, media_store
+
+UNSUPPORTED_IMAGE = "Only PNG, JPEG and WebP images are supported"
+
+
+class UnsupportedImage(ValueError):
+    pass
+
+
+def _check_image_head(head: bytes) -> None:
+    if sniff_image_type(head) is None:
+        raise UnsupportedImage(UNSUPPORTED_IMAGE)
+
+
+@dataclass
+class ImageUpload:
+    file: HashingTempFile
+    image_type: str
+    fields: dict[str, str]
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Uploads are limited to {settings.media_max_upload_bytes} bytes"
+    )
+
+
+@asynccontextmanager
+async def image_upload(request: Request, field: str = "file") -> AsyncIterator[ImageUpload]:
+    """Stream a multipart image upload to a hashed temp file
+
+    The body is never buffered: the file part goes to disk chunk by chunk
+    while it is hashed. The type is checked from the first bytes and the
+    upload is aborted there if it isn't an image. The temp file is removed
+    when the block exits, so move or copy anything worth keeping inside it.
+    """
+    # Allow for the multipart envelope around the file itself
+    max_body_bytes = settings.media_max_upload_bytes + 64 * 1024
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_body_bytes:
+        raise _too_large()
+
+    sinks: list[HashingTempFile] = []
+
+    def open_file(name: str) -> HashingTempFile:
+        if name != field or sinks:
+            raise MultipartError(f"Expected a single file field named {field!r}")
+        sink = media_store.temp_file(settings.media_max_upload_bytes, SNIFF_BYTES, _check_image_head)
+        sinks.append(sink)
+        return sink
+
+    try:
+        try:
+            form = StreamingMultipart(
+                request.headers.get("content-type", ""), open_file, max_body_bytes=max_body_bytes
+            )
+            await form.consume(request.stream())
+        except OverflowError:
+            raise _too_large()
+        except UnsupportedImage as e:
+            raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(e))
+        except MultipartError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        if not sinks:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Missing {field!r} field")
+        upload = sinks[0]
+        upload.close()
+        # Files shorter than SNIFF_BYTES never triggered the streaming check
+        image_type = sniff_image_type(upload.head)
+        if image_type is None:
+            raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=UNSUPPORTED_IMAGE)
+        yield ImageUpload(upload, image_type, form.fields)
+    finally:
+        for sink in sinks:
+            sink.discard()
@@ -0,0 +1,166 @@
+import re
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.orm import Session
+
+from app.core.pagination import escape_like
+from app.models.chat import ConversationMember
+from app.models.message import Message
+from app.models.user import User, UserRole
+from app.schemas.message import MessageSearchHit
+
+
+WORDS = "words"
+SUBSTRING = "substring"
+SEARCH_MODES = (WORDS, SUBSTRING)
+
+MAX_TERMS = 8
+# Shorter terms match whole words only ("u", "gg"); longer ones also match as prefixes
+MIN_PREFIX_LENGTH = 3
+SNIPPET_LENGTH = 160
+
+TERM_RE = re.compile(r"[^\W_]+")
+# pg_trgm only indexes runs of letters and digits; a substring without three
+# in a row (":-)", "xD") can't use the index and needs a narrower scope
+INDEXABLE_SUBSTRING_RE = re.compile(r"[^\W_]{3}")
+
+# Generated by the message_search migration (PostgreSQL only)
+CONTENT_TSV = literal_column("messages.content_tsv")
+
+
+def search_terms(q: str) -> list[str]:
+    terms = []
+    for term in TERM_RE.findall(q.lower()):
+        if term not in terms:
+            terms.append(term)
+    return terms[:MAX_TERMS]
+
+
+def _tsquery(terms: list[str]) -> str:
+    # Terms are alphanumeric only, so nothing here is tsquery syntax
+    return " & ".join(f"{term}:*" if len(term) >= MIN_PREFIX_LENGTH else term for term in terms)
+
+
+def conversation_scope(db: Session, viewer: User, member_id: Optional[int] = None):
+    """SELECT of the conversation ids `viewer` may search (None: no restriction)
+
+    Admins search everything. Everyone else searches conversations they or,
+    for parents, their children belong to; `member_id` narrows that to one
+    of those users.
+    """
+    if viewer.role == UserRole.ADMIN:
+        members = None if member_id is None else [member_id]
+    else:
+        members = [viewer.id]
+        if viewer.role == UserRole.PARENT:
+            members += [child_id for (child_id,) in db.query(User.id).filter(User.parent_id == viewer.id)]
+        if member_id is not None:
+            if member_id not in members:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="You can only search your own or your children's conversations"
+                )
+            members = [member_id]
+    if members is None:
+        return None
+    return select(ConversationMember.conversation_id).where(ConversationMember.user_id.in_(members))
+
+
+def _highlight_pattern(q: str, terms: list[str], mode: str) -> re.Pattern:
+    if mode == SUBSTRING:
+        return re.compile(re.escape(q.strip()), re.IGNORECASE)
+    alternatives = sorted(terms, key=len, reverse=True)
+    return re.compile(
+        r"\b(?:" + "|".join(
+            re.escape(term) + (r"\w*" if len(term) >= MIN_PREFIX_LENGTH else r"\b") for term in alternatives
+        ) + ")",
+        re.IGNORECASE,
+    )
+
+
+def snippet(content: str, pattern: re.Pattern) -> tuple[str, list[tuple[int, int]]]:
+    """Up to SNIPPET_LENGTH characters around the first match, with match offsets in it"""
+    ranges = [match.span() for match in pattern.finditer(content) if match.end() > match.start()]
+    if len(content) <= SNIPPET_LENGTH:
+        return content, ranges
+    first = ranges[0][0] if ranges else 0
+    start = max(0, min(first - SNIPPET_LENGTH // 4, len(content) - SNIPPET_LENGTH))
+    end = start + SNIPPET_LENGTH
+    prefix = "…" if start else ""
+    suffix = "…" if end < len(content) else ""
+    shift = len(prefix) - start
+    return (
+        prefix + content[start:end] + suffix,
+        [(s + shift, e + shift) for s, e in ranges if s >= start and e <= end],
+    )
+
+
+def _search(db: Session, match, scope, conversation_id: Optional[int], before_id: Optional[int], limit: int):
+    statement = select(
+        Message.id, Message.conversation_id, Message.sender_id, Message.created_at, Message.content
+    ).where(match)
+    if scope is not None:
+        statement = statement.where(Message.conversation_id.in_(scope))
+    if conversation_id is not None:
+        statement = statement.where(Message.conversation_id == conversation_id)
+    if before_id is not None:
+        statement = statement.where(Message.id < before_id)
+    return db.execute(statement.order_by(Message.id.desc()).limit(limit + 1)).all()
+
+
+def search_messages(
+    db: Session,
+    viewer: User,
+    q: str,
+    limit: int,
+    mode: Optional[str] = None,
+    before_id: Optional[int] = None,
+    conversation_id: Optional[int] = None,
+    member_id: Optional[int] = None,
+) -> tuple[list[MessageSearchHit], str, Optional[int]]:
+    """Messages matching `q` that `viewer` may see, newest first
+
+    Words are matched against the GIN-indexed tsvector (all terms, longer
+    ones as prefixes). When `q` has no words (":)", "^^") or the first page
+    finds nothing ("bulax" in "zorbulax"), the phrase is matched as a
+    substring instead, through the trigram index where it has one. Later
+    pages pass back the `mode` and `before_id` of the previous page.
+    Returns (hits, mode, next before_id or None).
+    """
+    terms = search_terms(q)
+    phrase = q.strip()
+    scope = conversation_scope(db, viewer, member_id)
+    substring_ok = bool(phrase) and (
+        INDEXABLE_SUBSTRING_RE.search(phrase) is not None or scope is not None or conversation_id is not None
+    )
+
+    words_match = CONTENT_TSV.op("@@")(func.to_tsquery("simple", _tsquery(terms))) if terms else None
+    substring_match = Message.content.ilike(f"%{escape_like(phrase)}%", escape="\\") if substring_ok else None
+
+    first_page = mode is None
+    if mode is None:
+        mode = WORDS if terms else SUBSTRING
+    rows = []
+    if mode == WORDS and words_match is not None:
+        rows = _search(db, words_match, scope, conversation_id, before_id, limit)
+        if not rows and first_page and substring_match is not None:
+            mode = SUBSTRING
+    if mode == SUBSTRING and substring_match is not None:
+        rows = _search(db, substring_match, scope, conversation_id, before_id, limit)
+
+    next_before_id = rows[limit - 1].id if len(rows) > limit else None
+    pattern = _highlight_pattern(q, terms, mode)
+    hits = []
+    for row in rows[:limit]:
+        text, highlights = snippet(row.content or "", pattern)
+        hits.append(MessageSearchHit(
+            message_id=row.id,
+            conversation_id=row.conversation_id,
+            sender_id=row.sender_id,
+            created_at=row.created_at,
+            snippet=text,
+            highlights=highlights,
+        ))
+    return hits, mode, next_before_id
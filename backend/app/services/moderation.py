@@ -0,0 +1,185 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from app.core.aho_corasick import AhoCorasick
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+SEVERITIES = ("low", "medium", "high")
+
+LEET_MAP = str.maketrans({
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "8": "b", "9": "g",
+    "@": "a", "$": "s", "!": "i", "+": "t", "|": "l",
+})
+_APOSTROPHE_RE = re.compile(r"['\u2019`]")
+_TRAILING_BANG_RE = re.compile(r"!+(?=[^a-z0-9]|$)")
+# Sentence ends and line breaks: phrase rules must not match across them
+_SENTENCE_RE = re.compile(r"[.?!]+\s+|[\r\n]+")
+# Normalized words are only [a-z0-9], so no pattern can contain or span this
+SENTENCE_BREAK = "|"
+# Punctuation followed by whitespace, or line breaks, end a run of spelled-out letters
+_CHUNK_RE = re.compile(r"[,;:?!.]+\s+|\s{2,}|[\r\n]+")
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+_REPEAT_RE = re.compile(r"(.)\1+")
+
+
+def _words(chunk: str) -> list[str]:
+    words: list[str] = []
+    spelled: list[str] = []
+    for token in _NON_ALNUM_RE.split(chunk):
+        if not token:
+            continue
+        if len(token) == 1:
+            spelled.append(token)
+            continue
+        if spelled:
+            words.append("".join(spelled))
+            spelled = []
+        words.append(token)
+    if spelled:
+        words.append("".join(spelled))
+    return words
+
+
+def normalize(text: str) -> str:
+    """Canonical form used for both rules and messages
+
+    Strips accents, lowercases, maps leetspeak, collapses repeated letters
+    ("baaad" -> "bad"), and re-joins letters spaced out to dodge filters
+    ("b a d" / "b.a.d" -> "bad"). Words are separated by single spaces,
+    sentences by " | ", and the result is padded with a space on each side so
+    whole-word rules can match " word ".
+    """
+    text = unicodedata.normalize("NFKD", text)
+    text = _APOSTROPHE_RE.sub("", "".join(c for c in text if not unicodedata.combining(c)).casefold())
+    sentences = []
+    for sentence in _SENTENCE_RE.split(text):
+        sentence = _TRAILING_BANG_RE.sub("", sentence).translate(LEET_MAP)
+        words = [word for chunk in _CHUNK_RE.split(sentence) for word in _words(chunk)]
+        if words:
+            sentences.append(" ".join(_REPEAT_RE.sub(r"\1", word) for word in words))
+    return " " + f" {SENTENCE_BREAK} ".join(sentences) + " "
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    severity: str
+    whole_word: bool = True
+
+
+@dataclass(frozen=True)
+class Match:
+    rule: str
+    severity: str
+    start: int
+    end: int
+
+
+class RuleSet:
+    """A compiled rule list: every pattern of every rule in one automaton"""
+
+    def __init__(self, rules: list[dict]):
+        patterns = []
+        for entry in rules:
+            severity = entry.get("severity", "low")
+            if severity not in SEVERITIES:
+                raise ValueError(f"Unknown severity {severity!r} for rule {entry.get('rule')!r}")
+            rule = Rule(entry["rule"], severity, entry.get("whole_word", True))
+            for pattern in entry["patterns"]:
+                normalized = normalize(pattern).strip()
+                if rule.whole_word:
+                    normalized = f" {normalized} "
+                patterns.append((normalized, rule))
+        self.automaton = AhoCorasick(patterns)
+        self.rule_count = len(rules)
+
+    @classmethod
+    def from_file(cls, path: str) -> "RuleSet":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)["rules"])
+
+    def scan(self, text: str) -> list[Match]:
+        """One linear pass over the normalized text; one match per rule"""
+        seen: dict[str, Match] = {}
+        for start, end, rule in self.automaton.iter_matches(normalize(text)):
+            if rule.name not in seen:
+                seen[rule.name] = Match(rule.name, rule.severity, start, end)
+        return list(seen.values())
+
+
+class ModerationEngine:
+    """Rule engine that hot-reloads its rules file when it changes on disk"""
+
+    def __init__(
+        self,
+        rules_path: str = settings.moderation_rules_path,
+        reload_interval: float = settings.moderation_reload_interval_seconds,
+    ):
+        self.rules_path = rules_path
+        self.reload_interval = reload_interval
+        self._ruleset: Optional[RuleSet] = None
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def ruleset(self) -> RuleSet:
+        self.maybe_reload()
+        return self._ruleset
+
+    def maybe_reload(self, force: bool = False) -> bool:
+        """Recompile the rules if the file changed; returns True when reloaded"""
+        now = time.monotonic()
+        if not force and self._ruleset is not None and now - self._checked_at < self.reload_interval:
+            return False
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.path.getmtime(self.rules_path)
+            except OSError:
+                if self._ruleset is None:
+                    logger.warning("Moderation rules file %s not found; no rules loaded", self.rules_path)
+                    self._ruleset = RuleSet([])
+                return False
+            if not force and mtime == self._mtime:
+                return False
+            try:
+                ruleset = RuleSet.from_file(self.rules_path)
+            except (OSError, ValueError, KeyError) as e:
+                # Keep serving the previous rules if the new file is broken
+                logger.error("Failed to load moderation rules from %s: %s", self.rules_path, e)
+                if self._ruleset is None:
+                    self._ruleset = RuleSet([])
+                return False
+            # Swap the reference atomically; in-flight scans finish on the old rules
+            self._ruleset, self._mtime = ruleset, mtime
+            logger.info("Loaded %d moderation rules from %s", ruleset.rule_count, self.rules_path)
+            return True
+
+    def scan(self, text: Optional[str]) -> list[Match]:
+        if not text:
+            return []
+        return self.ruleset.scan(text)
+
+
+# Global moderation engine
+moderation_engine = ModerationEngine()
+
+
+def flag_rows(messages: Iterable[tuple[int, Optional[str]]]) -> list[dict]:
+    """message_flags rows for a batch of (message_id, content) pairs (flag-only)"""
+    return [
+        {"message_id": message_id, "rule": match.rule, "severity": match.severity}
+        for message_id, content in messages
+        for match in moderation_engine.scan(content)
+    ]
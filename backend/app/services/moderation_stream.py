@@ -0,0 +1,293 @@
+import json
+import logging
+import socket
+import time
+from collections import Counter
+from typing import Optional
+
+import redis
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.message import Message
+from app.models.moderation import MessageFlag
+from app.services.moderation import flag_rows
+
+
+logger = logging.getLogger(__name__)
+
+DEAD_LETTER_SUFFIX = ":dead"
+# Sorted set of entries waiting for a retry or the next rate-limit window
+DELAYED_SUFFIX = ":delayed"
+
+# Moves one due member of the delayed set back onto the stream. ZREM decides
+# which worker owns it when several race for it, and doing the XADD in the
+# same script means a crash in between cannot lose the entry.
+RELEASE_DELAYED_LUA = """
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 0 then
+    return false
+end
+local fields = cjson.decode(ARGV[1])
+local args = {'XADD', KEYS[2], 'MAXLEN', '~', ARGV[2], '*'}
+for name, value in pairs(fields) do
+    if name ~= 'origin' then
+        table.insert(args, name)
+        table.insert(args, tostring(value))
+    end
+end
+return redis.call(unpack(args))
+"""
+
+
+def enqueue_for_moderation(redis_client, message_id: int, sender_id: int) -> Optional[str]:
+    """Append a new message to the moderation stream; never raises into the send path"""
+    try:
+        entry_id = redis_client.xadd(
+            settings.moderation_stream_key,
+            {"message_id": message_id, "sender_id": sender_id, "attempts": 0},
+            maxlen=settings.moderation_stream_maxlen,
+            approximate=True,
+        )
+    except Exception as e:
+        logger.error("Failed to enqueue message %s for moderation: %s", message_id, e)
+        return None
+    return entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+
+
+def _decode(fields: dict) -> dict:
+    return {
+        (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+        for k, v in fields.items()
+    }
+
+
+def _entry_age_seconds(entry_id, now: float) -> float:
+    """Stream ids start with their creation time in milliseconds"""
+    if isinstance(entry_id, bytes):
+        entry_id = entry_id.decode()
+    return max(0.0, now - int(entry_id.split("-")[0]) / 1000)
+
+
+def stream_metrics(redis_client) -> dict:
+    """Backlog and lag of the moderation consumer group"""
+    stream = settings.moderation_stream_key
+    group = settings.moderation_consumer_group
+    now = time.time()
+    metrics = {
+        "stream_length": redis_client.xlen(stream),
+        "pending": 0,
+        "lag": None,
+        "oldest_pending_age_seconds": 0.0,
+        "consumers": 0,
+        "delayed": redis_client.zcard(stream + DELAYED_SUFFIX),
+        "dead_letters": redis_client.xlen(stream + DEAD_LETTER_SUFFIX),
+    }
+    try:
+        groups = redis_client.xinfo_groups(stream)
+    except redis.ResponseError:
+        return metrics  # stream not created yet
+    for info in groups:
+        name = info["name"].decode() if isinstance(info["name"], bytes) else info["name"]
+        if name == group:
+            metrics["pending"] = info["pending"]
+            metrics["consumers"] = info["consumers"]
+            # Entries not yet delivered to any consumer (Redis 7+)
+            metrics["lag"] = info.get("lag")
+    if metrics["pending"]:
+        summary = redis_client.xpending(stream, group)
+        if summary.get("min"):
+            metrics["oldest_pending_age_seconds"] = _entry_age_seconds(summary["min"], now)
+    return metrics
+
+
+class ModerationWorker:
+    """One consumer in the moderation group
+
+    Reads batches of message ids with XREADGROUP, loads their content in one
+    query, scans them with the rule engine and bulk-inserts message_flags
+    before acknowledging the entries. Each sender gets at most
+    `user_rate_limit` messages scanned per window; the rest wait in a delay
+    set for the next window so one flooding user can't starve the others.
+    Failed entries are retried with exponential backoff and moved to the
+    dead-letter stream after `max_attempts`. Entries left pending by a crashed
+    worker are claimed after `claim_idle_ms`.
+    """
+
+    def __init__(
+        self,
+        consumer: Optional[str] = None,
+        redis_client=None,
+        session_factory=SessionLocal,
+        batch_size: int = settings.moderation_batch_size,
+        block_ms: int = settings.moderation_block_ms,
+        claim_idle_ms: int = settings.moderation_claim_idle_ms,
+        max_attempts: int = settings.moderation_max_attempts,
+        retry_backoff: float = settings.moderation_retry_backoff_seconds,
+        user_rate_limit: int = settings.moderation_user_rate_limit,
+        user_rate_window: int = settings.moderation_user_rate_window_seconds,
+    ):
+        self.consumer = consumer or f"{socket.gethostname()}-{id(self):x}"
+        self.redis = redis_client or redis.from_url(str(settings.redis_url))
+        self.session_factory = session_factory
+        self.stream = settings.moderation_stream_key
+        self.group = settings.moderation_consumer_group
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.user_rate_limit = user_rate_limit
+        self.user_rate_window = user_rate_window
+        self.stats = Counter()
+        self._release_script = self.redis.register_script(RELEASE_DELAYED_LUA)
+
+    def ensure_group(self) -> None:
+        try:
+            self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def run_once(self) -> int:
+        """Release due delayed entries, then process one batch; returns entries handled"""
+        self._release_delayed()
+        entries = self._claim_stale()
+        if not entries:
+            response = self.redis.xreadgroup(
+                self.group, self.consumer, {self.stream: ">"}, count=self.batch_size, block=self.block_ms
+            )
+            entries = [(entry_id, _decode(fields)) for _, batch in response for entry_id, fields in batch]
+        if entries:
+            self.process(entries)
+        return len(entries)
+
+    def close(self) -> None:
+        """Leave the group cleanly if nothing is pending for this consumer"""
+        try:
+            pending = self.redis.xpending_range(self.stream, self.group, "-", "+", 1, consumername=self.consumer)
+            if not pending:
+                self.redis.xgroup_delconsumer(self.stream, self.group, self.consumer)
+        except redis.RedisError:
+            pass
+
+    def _claim_stale(self) -> list[tuple]:
+        result = self.redis.xautoclaim(
+            self.stream, self.group, self.consumer, self.claim_idle_ms, start_id="0-0", count=self.batch_size
+        )
+        claimed = [(entry_id, _decode(fields)) for entry_id, fields in result[1] if fields]
+        if claimed:
+            logger.warning("Moderation worker %s claimed %d stale entries", self.consumer, len(claimed))
+            # A worker died holding these; count it as a failed attempt so poison messages end up dead-lettered
+            for _, fields in claimed:
+                fields["attempts"] = int(fields.get("attempts", 0)) + 1
+        entries = []
+        for entry in claimed:
+            if entry[1]["attempts"] >= self.max_attempts:
+                self._dead_letter(entry, "worker stopped while processing")
+            else:
+                entries.append(entry)
+        return entries
+
+    def _release_delayed(self) -> None:
+        key = self.stream + DELAYED_SUFFIX
+        for member in self.redis.zrangebyscore(key, 0, time.time(), start=0, num=self.batch_size):
+            self._release_script(keys=[key, self.stream], args=[member, settings.moderation_stream_maxlen])
+
+    def _delay(self, pipe, entry_id, fields: dict, until: float) -> None:
+        origin = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+        pipe.zadd(self.stream + DELAYED_SUFFIX, {json.dumps({**fields, "origin": origin}): until})
+
+    def _dead_letter(self, entry: tuple, error: str) -> None:
+        entry_id, fields = entry
+        with self.redis.pipeline() as pipe:
+            pipe.xadd(self.stream + DEAD_LETTER_SUFFIX, {**fields, "error": error[:500], "failed_at": time.time()})
+            pipe.xack(self.stream, self.group, entry_id)
+            pipe.execute()
+        self.stats["dead_lettered"] += 1
+        logger.error("Moderation entry %s dead-lettered: %s", fields.get("message_id"), error)
+
+    def _rate_limit(self, entries: list[tuple]) -> tuple[list[tuple], list[tuple]]:
+        """Split entries into (allowed, deferred) using a shared per-sender window counter"""
+        window = int(time.time() // self.user_rate_window)
+        per_sender = Counter(fields.get("sender_id") for _, fields in entries)
+        senders = list(per_sender)
+        with self.redis.pipeline(transaction=False) as pipe:
+            for sender in senders:
+                key = f"moderation:rate:{sender}:{window}"
+                pipe.incrby(key, per_sender[sender])
+                pipe.expire(key, self.user_rate_window * 2)
+            totals = pipe.execute()[::2]
+        # How many of this batch's entries each sender may still use in the window
+        remaining = {
+            sender: max(0, self.user_rate_limit - (total - per_sender[sender]))
+            for sender, total in zip(senders, totals)
+        }
+        allowed, deferred = [], []
+        for entry in entries:
+            sender = entry[1].get("sender_id")
+            if remaining[sender] > 0:
+                remaining[sender] -= 1
+                allowed.append(entry)
+            else:
+                deferred.append(entry)
+        return allowed, deferred
+
+    def process(self, entries: list[tuple]) -> None:
+        allowed, deferred = self._rate_limit(entries)
+        next_window = (int(time.time() // self.user_rate_window) + 1) * self.user_rate_window
+        failed: Optional[Exception] = None
+        if allowed:
+            try:
+                self._scan_and_flag(allowed)
+            except Exception as e:
+                logger.error("Moderation batch of %d failed: %s", len(allowed), e)
+                failed = e
+
+        dead = []
+        with self.redis.pipeline() as pipe:
+            for entry_id, fields in deferred:
+                self._delay(pipe, entry_id, fields, next_window)
+            if failed is not None:
+                for entry_id, fields in allowed:
+                    attempts = int(fields.get("attempts", 0)) + 1
+                    if attempts >= self.max_attempts:
+                        dead.append((entry_id, {**fields, "attempts": attempts}))
+                        continue
+                    fields = {**fields, "attempts": attempts}
+                    self._delay(pipe, entry_id, fields, time.time() + self.retry_backoff * 2 ** (attempts - 1))
+            # Delayed copies and acks are applied together, so an entry is never lost or doubled
+            dead_ids = {entry_id for entry_id, _ in dead}
+            acked = [entry_id for entry_id, _ in deferred + allowed if entry_id not in dead_ids]
+            if acked:
+                pipe.xack(self.stream, self.group, *acked)
+            pipe.execute()
+        for entry in dead:
+            self._dead_letter(entry, str(failed))
+
+        self.stats["deferred"] += len(deferred)
+        self.stats["retried" if failed is not None else "processed"] += len(allowed) - len(dead)
+
+    def _scan_and_flag(self, entries: list[tuple]) -> None:
+        ids = {int(fields["message_id"]) for _, fields in entries}
+        db = self.session_factory()
+        try:
+            # Deleted messages simply have no row here and are acknowledged
+            messages = db.execute(select(Message.id, Message.content).where(Message.id.in_(ids))).all()
+            rows = flag_rows(messages)
+            flagged = 0
+            if rows:
+                # A batch redelivered after its flags were committed (e.g. Redis failed
+                # before the XACK) must not flag the same messages twice
+                statement = insert(MessageFlag).on_conflict_do_nothing(
+                    index_elements=["message_id", "rule"]
+                ).returning(MessageFlag.id)
+                flagged = len(db.execute(statement, rows).all())
+                db.commit()
+            self.stats["flagged"] += flagged
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
@@ -0,0 +1,100 @@
+import logging
+import time
+from typing import Callable, Optional
+
+import redis
+from fastapi import Request, Response
+
+from app.core.config import settings
+from app.core.http_cache import etag_matches
+from app.core.singleflight import SingleFlight
+
+
+logger = logging.getLogger(__name__)
+
+# Cached representations of a user's own profile data
+RESOURCES = ("me", "games")
+CACHE_CONTROL = "private, no-cache"
+
+
+class ProfileCache:
+    """Versioned Redis cache for the caller's own profile responses
+
+    Each user has one hash holding a version stamp and the serialized JSON of
+    every cached resource, prefixed with the version it was built from.
+    Invalidation deletes the hash; the next read stamps a fresh, time-based
+    version, so ETags issued before the change can never match again.
+
+    A request whose `If-None-Match` matches the current version gets a 304
+    after a single Redis round trip, without touching Postgres. Concurrent
+    misses for the same user and resource share one database load. If Redis
+    is unavailable, responses are built from the database without an ETag.
+    """
+
+    def __init__(self, redis_client=None, ttl: int = settings.profile_cache_ttl_seconds):
+        self.redis = redis_client or redis.from_url(str(settings.redis_url))
+        self.ttl = ttl
+        self._flights = SingleFlight()
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"profile_cache:{user_id}"
+
+    def lookup(self, user_id: int, resource: str) -> tuple[Optional[str], Optional[bytes]]:
+        """Current version stamp and cached body (None when missing or stale)"""
+        key = self._key(user_id)
+        try:
+            version, cached = self.redis.hmget(key, "v", resource)
+            if version is None:
+                with self.redis.pipeline() as pipe:
+                    pipe.hsetnx(key, "v", time.time_ns())
+                    pipe.expire(key, self.ttl)
+                    pipe.hget(key, "v")
+                    version = pipe.execute()[-1]
+                cached = None
+        except redis.RedisError as e:
+            logger.warning("Profile cache unavailable: %s", e)
+            return None, None
+        version = version.decode()
+        if cached is None:
+            return version, None
+        stamp, _, body = cached.partition(b":")
+        return version, body if stamp.decode() == version else None
+
+    def store(self, user_id: int, resource: str, version: str, body: bytes) -> None:
+        key = self._key(user_id)
+        try:
+            with self.redis.pipeline() as pipe:
+                pipe.hset(key, resource, version.encode() + b":" + body)
+                pipe.expire(key, self.ttl)
+                pipe.execute()
+        except redis.RedisError as e:
+            logger.warning("Profile cache unavailable: %s", e)
+
+    def invalidate(self, user_id: int) -> None:
+        """Call after committing any change to the user's profile or credentials"""
+        try:
+            self.redis.delete(self._key(user_id))
+        except redis.RedisError as e:
+            logger.error("Failed to invalidate profile cache for user %s: %s", user_id, e)
+
+    def respond(self, request: Request, user_id: int, resource: str, load: Callable[[], bytes]) -> Response:
+        """304, cached JSON, or JSON from `load()` with an ETag for the current version"""
+        version, body = self.lookup(user_id, resource)
+        headers = {"Cache-Control": CACHE_CONTROL}
+        if version is not None:
+            headers["ETag"] = f'"{resource}-{user_id}-{version}"'
+            if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+                return Response(status_code=304, headers=headers)
+        if body is None:
+            def load_and_store() -> bytes:
+                loaded = load()
+                if version is not None:
+                    self.store(user_id, resource, version, loaded)
+                return loaded
+            body = self._flights.do((resource, user_id, version), load_and_store)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Global profile cache
+profile_cache = ProfileCache()
@@ -0,0 +1,142 @@
+import logging
+import time
+from typing import Optional
+
+import redis
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.screenshot import Screenshot
+from app.models.user import User, UserRole
+from app.services.visibility import audience_query, visible_users_clause
+
+
+logger = logging.getLogger(__name__)
+
+# Marks a feed list as built; also keeps a feed of nothing from looking missing
+SENTINEL = "0"
+# Sorted set of large-audience owners scored by their last publish time
+LARGE_AUDIENCE_OWNERS_KEY = "feed:screenshots:pull_recent"
+
+
+class ScreenshotFeed:
+    """Per-viewer screenshot feeds kept in Redis (fan-out on write)
+
+    A new screenshot's id is pushed onto the capped list of every user it is
+    visible to, so opening the gallery is one LRANGE and one batched
+    metadata query. Owners with more than `fanout_limit` viewers are not
+    pushed; they are recorded in a sorted set by last publish time and
+    their screenshots are merged in at read time instead (fan-out on read).
+    Reads trim owners whose last such publish is over `ttl` seconds old: by
+    then every feed built before it has expired, and rebuilt feeds already
+    include their screenshots.
+
+    Feeds are pushed with LPUSHX, so only viewers who opened the gallery
+    recently hold a list. A missing feed is rebuilt from Postgres on the
+    next read and expires `ttl` seconds later; rebuilding also picks up
+    new family and conversation relations. The metadata query re-checks
+    visibility, so a stale list can never show something it shouldn't.
+    Older pages, admins and Redis outages read from Postgres directly.
+    """
+
+    def __init__(
+        self,
+        redis_client=None,
+        max_items: int = settings.screenshot_feed_max_items,
+        fanout_limit: int = settings.screenshot_feed_fanout_limit,
+        ttl: int = settings.screenshot_feed_ttl_seconds,
+    ):
+        self.redis = redis_client or redis.from_url(str(settings.redis_url))
+        self.max_items = max_items
+        self.fanout_limit = fanout_limit
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"feed:screenshots:{user_id}"
+
+    def publish(self, db: Session, screenshot: Screenshot, owner: User) -> None:
+        """Push a new screenshot onto the feeds of everyone who can see it"""
+        audience = db.execute(audience_query(owner)).scalars().all()
+        try:
+            if len(audience) > self.fanout_limit:
+                self.redis.zadd(LARGE_AUDIENCE_OWNERS_KEY, {owner.id: time.time()})
+                return
+            with self.redis.pipeline(transaction=False) as pipe:
+                for user_id in audience:
+                    key = self._key(user_id)
+                    pipe.lpushx(key, screenshot.id)
+                    pipe.ltrim(key, 0, self.max_items - 1)
+                pipe.execute()
+        except redis.RedisError as e:
+            # Feeds converge when they expire and are rebuilt
+            logger.warning("Screenshot feed fan-out failed: %s", e)
+
+    def _visible_query(self, db: Session, viewer: User):
+        return db.query(Screenshot).join(User, User.id == Screenshot.owner_id).filter(
+            visible_users_clause(viewer, User.id, User.parent_id)
+        )
+
+    def read_from_db(self, db: Session, viewer: User, limit: int, before_id: Optional[int] = None) -> list[Screenshot]:
+        """Fan-out on read: newest visible screenshots, optionally older than `before_id`"""
+        query = self._visible_query(db, viewer)
+        if before_id is not None:
+            query = query.filter(Screenshot.id < before_id)
+        return query.order_by(Screenshot.id.desc()).limit(limit).all()
+
+    def _rebuild(self, db: Session, viewer: User) -> list[Screenshot]:
+        screenshots = self.read_from_db(db, viewer, self.max_items)
+        key = self._key(viewer.id)
+        with self.redis.pipeline() as pipe:
+            pipe.delete(key)
+            pipe.rpush(key, *[s.id for s in screenshots], SENTINEL)
+            pipe.expire(key, self.ttl)
+            pipe.execute()
+        return screenshots
+
+    def first_page(self, db: Session, viewer: User, limit: int) -> list[Screenshot]:
+        """Newest `limit` visible screenshots, from the viewer's feed where possible
+
+        Listed ids that no longer resolve (deleted, or no longer visible to
+        the viewer) would leave the page short, so it is topped up from
+        Postgres: a short page always means there is nothing older.
+        """
+        if viewer.role == UserRole.ADMIN:
+            return self.read_from_db(db, viewer, limit)
+        key = self._key(viewer.id)
+        cutoff = time.time() - self.ttl
+        try:
+            with self.redis.pipeline(transaction=False) as pipe:
+                pipe.lrange(key, 0, limit - 1)
+                pipe.zremrangebyscore(LARGE_AUDIENCE_OWNERS_KEY, "-inf", cutoff)
+                pipe.zrangebyscore(LARGE_AUDIENCE_OWNERS_KEY, cutoff, "+inf")
+                raw_ids, _, large_owners = pipe.execute()
+            if not raw_ids:
+                # The rebuild reads from Postgres, which already includes large-audience owners
+                screenshots = self._rebuild(db, viewer)
+                if len(screenshots) < limit and len(screenshots) == self.max_items:
+                    screenshots += self.read_from_db(db, viewer, limit - len(screenshots), screenshots[-1].id)
+                return screenshots[:limit]
+        except redis.RedisError as e:
+            logger.warning("Screenshot feed unavailable, reading from the database: %s", e)
+            return self.read_from_db(db, viewer, limit)
+
+        ids = [int(i) for i in raw_ids if int(i) != int(SENTINEL)]
+        large_owner_ids = [int(i) for i in large_owners]
+        conditions = [Screenshot.id.in_(ids)] if ids else []
+        if large_owner_ids:
+            conditions.append(Screenshot.owner_id.in_(large_owner_ids))
+        page = []
+        if conditions:
+            # One query for the listed ids plus recent screenshots of large-audience owners
+            page = self._visible_query(db, viewer).filter(or_(*conditions)).order_by(
+                Screenshot.id.desc()
+            ).limit(limit).all()
+        if len(page) < limit:
+            page += self.read_from_db(db, viewer, limit - len(page), page[-1].id if page else None)
+        return page
+
+
+# Global screenshot feed
+screenshot_feed = ScreenshotFeed()
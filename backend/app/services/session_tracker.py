@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.database import SessionLocal, is_transient_error
+from app.models.session import UserSession
+from app.models.user import User
+from app.services.activity_rollup import ActivityRollup, activity_rollup
+
+
+logger = logging.getLogger(__name__)
+
+
+class _OpenSession:
+    __slots__ = ("connections", "peak", "started_at", "last_seen", "credited_until")
+
+    def __init__(self, now: float):
+        self.connections = 1
+        self.peak = 1
+        self.started_at = now
+        self.last_seen = now  # last connect, heartbeat or disconnect
+        self.credited_until = now  # time online already given to the rollup
+
+
+def _utc(timestamp: float) -> datetime:
+    return datetime.utcfromtimestamp(timestamp)
+
+
+class SessionTracker:
+    """Time online per user from WebSocket connects, heartbeats and disconnects
+
+    Events only touch one in-memory entry per user. A user's connections
+    share that entry, so overlapping devices make one session. A session ends
+    once the last connection has been gone for `merge_gap` seconds, so a
+    page reload or a network blip does not split it. An abnormal close ends
+    the connection at its user's last heartbeat (at most `heartbeat_timeout`
+    earlier) rather than when the dead socket was noticed.
+
+    Every `flush_interval` seconds closed sessions are written to
+    `user_sessions` in one multi-row INSERT, and time online since the last
+    flush (open sessions included) is credited to the activity rollup.
+    Sessions of users deleted in the meantime are dropped; a batch is only
+    kept for the next flush after a transient failure.
+    `stop()` closes every open session at the current time and flushes.
+    Sessions are merged per worker; a user connected to two workers at once
+    gets a session on each.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        rollup: ActivityRollup = activity_rollup,
+        flush_interval: float = settings.session_flush_interval_seconds,
+        merge_gap: float = settings.session_merge_gap_seconds,
+        heartbeat_timeout: float = settings.session_heartbeat_timeout_seconds,
+    ):
+        self.session_factory = session_factory
+        self.rollup = rollup
+        self.flush_interval = flush_interval
+        self.merge_gap = merge_gap
+        self.heartbeat_timeout = heartbeat_timeout
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._open: dict[int, _OpenSession] = {}
+        self._closed: list[dict] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def connect(self, user_id: int) -> None:
+        now = time.time()
+        with self._lock:
+            session = self._open.get(user_id)
+            if session is None:
+                self._open[user_id] = _OpenSession(now)
+                return
+            if session.connections == 0:
+                # Back within the merge gap: the time away still counts as offline
+                session.credited_until = max(session.credited_until, now)
+            session.connections += 1
+            session.peak = max(session.peak, session.connections)
+            session.last_seen = now
+
+    def heartbeat(self, user_id: int) -> None:
+        session = self._open.get(user_id)
+        if session is not None and session.connections:
+            session.last_seen = time.time()
+
+    def disconnect(self, user_id: int, abnormal: bool = False) -> None:
+        """Drop one connection; `abnormal` ends it at the last heartbeat rather than now"""
+        now = time.time()
+        with self._lock:
+            session = self._open.get(user_id)
+            if session is None or session.connections == 0:
+                return
+            session.connections -= 1
+            if not abnormal or session.connections:
+                session.last_seen = now
+            else:
+                session.last_seen = max(session.last_seen, now - self.heartbeat_timeout)
+
+    def _sweep(self, now: float, close_all: bool = False) -> list[tuple[int, float, float]]:
+        """Move finished sessions to the flush queue; returns time online to credit"""
+        credits = []
+        with self._lock:
+            for user_id, session in list(self._open.items()):
+                if session.connections:
+                    online_until = now
+                    ended = close_all
+                else:
+                    online_until = session.last_seen
+                    ended = close_all or now - session.last_seen >= self.merge_gap
+                if online_until > session.credited_until:
+                    credits.append((user_id, session.credited_until, online_until))
+                    session.credited_until = online_until
+                if ended:
+                    del self._open[user_id]
+                    self._closed.append({
+                        "user_id": user_id,
+                        "started_at": _utc(session.started_at),
+                        "ended_at": _utc(online_until),
+                        "peak_connections": session.peak,
+                    })
+        return credits
+
+    def flush(self, close_all: bool = False) -> int:
+        """Write closed sessions and credit time online; returns sessions written"""
+        with self._flush_lock:
+            for user_id, start, end in self._sweep(time.time(), close_all):
+                self.rollup.add_online(user_id, _utc(start), _utc(end))
+            with self._lock:
+                rows, self._closed = self._closed, []
+            if not rows:
+                return 0
+            db = self.session_factory()
+            try:
+                try:
+                    db.execute(insert(UserSession), rows)
+                    db.commit()
+                except IntegrityError:
+                    db.rollback()
+                    user_ids = {row["user_id"] for row in rows}
+                    live = set(db.scalars(select(User.id).where(User.id.in_(user_ids))))
+                    logger.warning("Dropping sessions of %d deleted users", len(user_ids - live))
+                    rows = [row for row in rows if row["user_id"] in live]
+                    if rows:
+                        db.execute(insert(UserSession), rows)
+                        db.commit()
+                return len(rows)
+            except Exception as e:
+                db.rollback()
+                if not is_transient_error(e):
+                    logger.error("Session flush of %d rows failed, dropping them: %s", len(rows), e)
+                    return 0
+                logger.error("Session flush of %d rows failed: %s", len(rows), e)
+                with self._lock:
+                    self._closed[:0] = rows
+                return 0
+            finally:
+                db.close()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task, close every open session and flush"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.flush, True)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.error("Session flush failed: %s", e)
+
+
+# Global session tracker
+session_tracker = SessionTracker()
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import logging
+from typing import Optional
+
+import redis
+import redis.asyncio as aioredis
+from fastapi import WebSocket
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = "streams:events"
+
+
+class StreamHub:
+    """Live stream viewers connected to this process, plus a cross-node relay
+
+    `broadcast` serialises a frame once and sends it to every local viewer
+    of a stream concurrently; a viewer that can't take a frame within
+    `send_timeout` is dropped rather than holding everyone else back.
+    `relay` publishes a frame through Redis so every node broadcasts it to
+    its own viewers.
+    """
+
+    def __init__(self, redis_client=None, send_timeout: float = settings.stream_send_timeout_seconds):
+        self.redis = redis_client or aioredis.from_url(str(settings.redis_url))
+        self.send_timeout = send_timeout
+        self._viewers: dict[int, dict[WebSocket, int]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def join(self, stream_id: int, websocket: WebSocket, user_id: int) -> None:
+        self._viewers.setdefault(stream_id, {})[websocket] = user_id
+
+    def leave(self, stream_id: int, websocket: WebSocket) -> None:
+        viewers = self._viewers.get(stream_id)
+        if viewers is not None:
+            viewers.pop(websocket, None)
+            if not viewers:
+                del self._viewers[stream_id]
+
+    def has_viewers(self, stream_id: int) -> bool:
+        return stream_id in self._viewers
+
+    def streams(self) -> list[int]:
+        return list(self._viewers)
+
+    async def _send(self, stream_id: int, websocket: WebSocket, text: str) -> None:
+        try:
+            await asyncio.wait_for(websocket.send_text(text), self.send_timeout)
+        except Exception:
+            self.leave(stream_id, websocket)
+            try:
+                await websocket.close()
+            except Exception:
+                pass
+
+    async def broadcast(self, stream_id: int, frame: dict) -> None:
+        viewers = list(self._viewers.get(stream_id, ()))
+        if not viewers:
+            return
+        text = json.dumps(frame, separators=(",", ":"))
+        await asyncio.gather(*(self._send(stream_id, websocket, text) for websocket in viewers))
+
+    async def relay(self, stream_id: int, frame: dict) -> None:
+        """Broadcast to the stream's viewers on every node"""
+        try:
+            await self.redis.publish(EVENTS_CHANNEL, json.dumps({"stream_id": stream_id, "frame": frame}))
+        except redis.RedisError as e:
+            logger.warning("Stream relay unavailable, delivering locally: %s", e)
+            await self.broadcast(stream_id, frame)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(EVENTS_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        data = json.loads(message["data"])
+                        if self.has_viewers(data["stream_id"]):
+                            await self.broadcast(data["stream_id"], data["frame"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Stream relay listener failed: %s", e)
+                await asyncio.sleep(1)
+
+
+# Global stream hub
+stream_hub = StreamHub()
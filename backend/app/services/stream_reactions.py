@@ -0,0 +1,142 @@
+import asyncio
+import json
+import logging
+from collections import Counter
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.services.stream_hub import StreamHub, stream_hub
+
+
+logger = logging.getLogger(__name__)
+
+# Pixel emoji names accepted from viewers
+REACTIONS = ("heart", "fire", "laugh", "wow", "clap", "gg")
+REACTIONS_CHANNEL = "streams:reactions"
+
+
+class ReactionAggregator:
+    """Coalesce live stream reactions into one delta frame per stream per tick
+
+    Viewers' reactions only bump an in-memory counter. Every
+    `flush_interval` each node publishes all its pending counts as a single
+    Redis message (and adds them to the stream's running totals). Each node
+    merges the deltas it receives from every node, its own included, and
+    sends each stream's local viewers one `reaction:new` frame with the
+    merged counts. Frames per viewer are therefore bounded by the tick rate,
+    however many viewers are reacting or how many nodes they are spread over.
+
+    If Redis is unavailable, pending counts are delivered to this node's
+    viewers only.
+    """
+
+    def __init__(
+        self,
+        hub: StreamHub = stream_hub,
+        redis_client=None,
+        flush_interval: float = settings.stream_reaction_flush_ms / 1000,
+        totals_ttl: int = 86400,
+    ):
+        self.hub = hub
+        self.redis = redis_client or aioredis.from_url(str(settings.redis_url))
+        self.flush_interval = flush_interval
+        self.totals_ttl = totals_ttl
+        self._pending: dict[int, Counter] = {}  # from local viewers, not yet published
+        self._outbound: dict[int, Counter] = {}  # from all nodes, not yet sent to local viewers
+        self._tasks: list[asyncio.Task] = []
+
+    @staticmethod
+    def _totals_key(stream_id: int) -> str:
+        return f"stream:{stream_id}:reactions"
+
+    def add(self, stream_id: int, reaction: str) -> bool:
+        if reaction not in REACTIONS:
+            return False
+        self._pending.setdefault(stream_id, Counter())[reaction] += 1
+        return True
+
+    async def totals(self, stream_id: int) -> dict[str, int]:
+        """Reaction counts since the stream started, for viewers who just joined"""
+        try:
+            raw = await self.redis.hgetall(self._totals_key(stream_id))
+        except redis.RedisError:
+            return {}
+        return {key.decode(): int(value) for key, value in raw.items()}
+
+    def _merge(self, deltas: dict[int, dict[str, int]]) -> None:
+        for stream_id, counts in deltas.items():
+            if self.hub.has_viewers(stream_id):
+                self._outbound.setdefault(stream_id, Counter()).update(counts)
+
+    async def publish_pending(self) -> None:
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for stream_id, counts in pending.items():
+                    key = self._totals_key(stream_id)
+                    for reaction, count in counts.items():
+                        pipe.hincrby(key, reaction, count)
+                    pipe.expire(key, self.totals_ttl)
+                pipe.publish(REACTIONS_CHANNEL, json.dumps(
+                    {str(stream_id): dict(counts) for stream_id, counts in pending.items()}
+                ))
+                await pipe.execute()
+        except redis.RedisError as e:
+            logger.warning("Reaction relay unavailable, delivering locally: %s", e)
+            self._merge(pending)
+
+    async def send_outbound(self) -> None:
+        outbound, self._outbound = self._outbound, {}
+        await asyncio.gather(*(
+            self.hub.broadcast(stream_id, {"type": "reaction:new", "stream_id": stream_id, "counts": dict(counts)})
+            for stream_id, counts in outbound.items()
+        ))
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._tick()), asyncio.create_task(self._listen())]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        # Counts already taken from viewers still reach the totals and other nodes
+        await self.publish_pending()
+
+    async def _tick(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.publish_pending()
+                await self.send_outbound()
+            except Exception as e:
+                logger.error("Reaction flush failed: %s", e)
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(REACTIONS_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        deltas = json.loads(message["data"])
+                        self._merge({int(stream_id): counts for stream_id, counts in deltas.items()})
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Reaction listener failed: %s", e)
+                await asyncio.sleep(1)
+
+
+# Global reaction aggregator
+reaction_aggregator = ReactionAggregator()
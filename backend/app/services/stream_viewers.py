@@ -0,0 +1,219 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.services.stream_hub import StreamHub, stream_hub
+
+
+logger = logging.getLogger(__name__)
+
+VIEWERS_CHANNEL = "streams:viewers"
+
+# Connection counting makes a user with several tabs one viewer. Membership,
+# the version bump and the change notice happen in one script, so the order
+# of notices on the channel is exactly the version order.
+CHANGE_VIEWER_LUA = """
+local delta = tonumber(ARGV[2])
+local connections = redis.call('HINCRBY', KEYS[1], ARGV[1], delta)
+if delta > 0 and connections == 1 then
+    redis.call('ZADD', KEYS[2], ARGV[3], ARGV[1])
+elseif delta < 0 and connections <= 0 then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+    redis.call('ZREM', KEYS[2], ARGV[1])
+else
+    return 0
+end
+local version = redis.call('INCR', KEYS[3])
+redis.call('PUBLISH', ARGV[4], cjson.encode({
+    s = tonumber(ARGV[5]), v = version, u = tonumber(ARGV[1]), j = delta > 0
+}))
+return version
+"""
+
+
+class _StreamState:
+    __slots__ = ("version", "changes", "from_version", "resync")
+
+    def __init__(self, version: int):
+        self.version = version  # last change seen by this node
+        self.changes: dict[int, bool] = {}  # user id -> joined, net of this batch
+        self.from_version: Optional[int] = None
+        self.resync = False
+
+
+class ViewerRoster:
+    """Per-stream viewer lists sent as versioned deltas
+
+    Membership lives in a Redis sorted set per stream (scored by join time)
+    with a version counter bumped on every change. A joining viewer gets
+    the whole list once (`viewer:list`); after that each node batches the
+    change notices it receives and sends its viewers one `viewer:delta`
+    per `flush_interval` carrying the net joins and leaves for the version
+    range `(from_version, version]`.
+
+    Deltas are idempotent, so a client applies one whenever `from_version`
+    <= its version; a larger `from_version` means it missed something and
+    it sends `viewer:resync` for a fresh list. A node that sees a gap in
+    the versions it receives sends a full list instead of a delta.
+    """
+
+    def __init__(
+        self,
+        hub: StreamHub = stream_hub,
+        redis_client=None,
+        flush_interval: float = settings.stream_viewer_flush_ms / 1000,
+    ):
+        self.hub = hub
+        self.redis = redis_client or aioredis.from_url(str(settings.redis_url))
+        self.flush_interval = flush_interval
+        self._script = self.redis.register_script(CHANGE_VIEWER_LUA)
+        self._streams: dict[int, _StreamState] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    @staticmethod
+    def _keys(stream_id: int) -> list[str]:
+        return [
+            f"stream:{stream_id}:viewer_connections",
+            f"stream:{stream_id}:viewers",
+            f"stream:{stream_id}:viewers:version",
+        ]
+
+    async def _change(self, stream_id: int, user_id: int, delta: int) -> None:
+        await self._script(
+            keys=self._keys(stream_id),
+            args=[user_id, delta, int(time.time() * 1000), VIEWERS_CHANNEL, stream_id],
+        )
+
+    async def snapshot(self, stream_id: int) -> dict:
+        """`viewer:list` frame: every viewer in join order and the version it reflects"""
+        _, viewers_key, version_key = self._keys(stream_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrange(viewers_key, 0, -1)
+            pipe.get(version_key)
+            members, version = await pipe.execute()
+        return {
+            "type": "viewer:list",
+            "stream_id": stream_id,
+            "version": int(version or 0),
+            "viewers": [int(member) for member in members],
+        }
+
+    async def join(self, stream_id: int, user_id: int) -> Optional[dict]:
+        """Record a viewer connection; returns the list to send it (None if Redis is down)"""
+        try:
+            await self._change(stream_id, user_id, 1)
+            frame = await self.snapshot(stream_id)
+        except redis.RedisError as e:
+            logger.warning("Viewer roster unavailable: %s", e)
+            return None
+        self._streams.setdefault(stream_id, _StreamState(frame["version"]))
+        return frame
+
+    async def resync(self, stream_id: int) -> Optional[dict]:
+        """Full list for a viewer that detected a gap (None if Redis is down)"""
+        try:
+            return await self.snapshot(stream_id)
+        except redis.RedisError as e:
+            logger.warning("Viewer roster unavailable: %s", e)
+            return None
+
+    async def leave(self, stream_id: int, user_id: int) -> None:
+        try:
+            await self._change(stream_id, user_id, -1)
+        except redis.RedisError as e:
+            logger.warning("Viewer roster unavailable: %s", e)
+        if not self.hub.has_viewers(stream_id):
+            self._streams.pop(stream_id, None)
+
+    async def clear(self, stream_id: int) -> None:
+        """Drop a finished stream's roster"""
+        try:
+            await self.redis.delete(*self._keys(stream_id))
+        except redis.RedisError as e:
+            logger.warning("Viewer roster unavailable: %s", e)
+
+    def _record(self, stream_id: int, version: int, user_id: int, joined: bool) -> None:
+        state = self._streams.get(stream_id)
+        if state is None:
+            return  # no viewers of this stream on this node
+        if version > state.version + 1:
+            # A notice went missing (e.g. while resubscribing): deltas can't be trusted
+            state.resync = True
+        if state.from_version is None:
+            state.from_version = min(version - 1, state.version)
+        state.changes[user_id] = joined
+        state.version = max(state.version, version)
+
+    async def flush(self) -> None:
+        for stream_id, state in list(self._streams.items()):
+            if state.resync:
+                state.resync, state.changes, state.from_version = False, {}, None
+                try:
+                    frame = await self.snapshot(stream_id)
+                except redis.RedisError:
+                    state.resync = True
+                    continue
+                state.version = frame["version"]
+                await self.hub.broadcast(stream_id, frame)
+            elif state.changes:
+                changes, from_version = state.changes, state.from_version
+                state.changes, state.from_version = {}, None
+                await self.hub.broadcast(stream_id, {
+                    "type": "viewer:delta",
+                    "stream_id": stream_id,
+                    "from_version": from_version,
+                    "version": state.version,
+                    "joined": [user_id for user_id, joined in changes.items() if joined],
+                    "left": [user_id for user_id, joined in changes.items() if not joined],
+                })
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._tick()), asyncio.create_task(self._listen())]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    async def _tick(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Viewer list flush failed: %s", e)
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(VIEWERS_CHANNEL)
+                    # Notices published while we were disconnected are lost
+                    for state in self._streams.values():
+                        state.resync = True
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        notice = json.loads(message["data"])
+                        self._record(notice["s"], notice["v"], notice["u"], notice["j"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Viewer list listener failed: %s", e)
+                await asyncio.sleep(1)
+
+
+# Global viewer roster
+viewer_roster = ViewerRoster()
@@ -0,0 +1,80 @@
+from sqlalchemy import and_, exists, or_, select, true, union
+from sqlalchemy.orm import aliased
+
+from app.models.chat import ConversationMember
+from app.models.user import User, UserRole
+
+
+def visible_users_clause(viewer: User, user_id_column, user_parent_column):
+    """SQL condition: the viewer may see the user identified by these columns
+
+    Users see themselves, their family (parent, children, siblings) and
+    anyone they share a conversation with. Parents also see everyone their
+    children share a conversation with. Admins see everyone.
+    """
+    if viewer.role == UserRole.ADMIN:
+        return true()
+
+    mine = aliased(ConversationMember)
+    theirs = aliased(ConversationMember)
+    conditions = [user_id_column == viewer.id]
+    in_my_circle = mine.user_id == viewer.id
+
+    if viewer.role == UserRole.PARENT:
+        child = aliased(User)
+        children = select(child.id).where(child.parent_id == viewer.id).scalar_subquery()
+        conditions.append(user_parent_column == viewer.id)
+        in_my_circle = in_my_circle | mine.user_id.in_(children)
+    if viewer.parent_id is not None:
+        conditions.append(user_id_column == viewer.parent_id)
+        conditions.append(user_parent_column == viewer.parent_id)
+
+    conditions.append(
+        exists().where(and_(
+            theirs.conversation_id == mine.conversation_id,
+            theirs.user_id == user_id_column,
+            in_my_circle,
+        ))
+    )
+    return or_(*conditions)
+
+
+def visible_conversations_clause(viewer: User, conversation_id_column):
+    """SQL condition: the viewer may see the conversation in this column
+
+    Members see their conversations and parents their children's; admins
+    see every conversation.
+    """
+    if viewer.role == UserRole.ADMIN:
+        return true()
+    member = aliased(ConversationMember)
+    in_conversation = member.user_id == viewer.id
+    if viewer.role == UserRole.PARENT:
+        child = aliased(User)
+        children = select(child.id).where(child.parent_id == viewer.id).scalar_subquery()
+        in_conversation = in_conversation | member.user_id.in_(children)
+    return exists().where(and_(member.conversation_id == conversation_id_column, in_conversation))
+
+
+def audience_query(owner: User):
+    """SELECT of the ids of every user `owner` is visible to
+
+    The inverse of `visible_users_clause`, used to fan content out to the
+    users who would see it. Admins are not included unless they are also
+    related to the owner; they see everything anyway.
+    """
+    mine = aliased(ConversationMember)
+    theirs = aliased(ConversationMember)
+    member = aliased(User)
+    family = [User.id == owner.id, User.parent_id == owner.id]
+    if owner.parent_id is not None:
+        family += [User.id == owner.parent_id, User.parent_id == owner.parent_id]
+
+    co_members = select(theirs.user_id).join(
+        mine, mine.conversation_id == theirs.conversation_id
+    ).where(mine.user_id == owner.id)
+    # Parents see whoever their children share a conversation with
+    co_member_parents = select(member.parent_id).where(
+        member.id.in_(co_members), member.parent_id.is_not(None)
+    )
+    return union(select(User.id).where(or_(*family)), co_members, co_member_parents)
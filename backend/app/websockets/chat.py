@@ -5,10 +5,13 @@ import asyncio
 from typing import Dict, List
 
 from app.core.database import get_db
+from app.core.rate_limit import RATE_LIMITED_EVENTS, rate_limit_error, rate_limiter
 from app.core.security import verify_token
+from app.core.websocket import manager as realtime_manager
 from app.models.user import User
 from app.models.chat import Conversation, ConversationMember
 from app.models.message import Message
+from app.services.chat_messages import save_message
 
 
 class ConnectionManager:
@@ -78,6 +81,13 @@ async def websocket_endpoint(websocket: WebSocket, token: str, db: Session = Dep
         while True:
             data = await websocket.receive_json()
             
+            # Reject floods before any database work
+            if data["type"] in RATE_LIMITED_EVENTS:
+                limited = rate_limiter.hit(f"ws.{data['type']}", user_id)
+                if not limited.allowed:
+                    await websocket.send_json(rate_limit_error(data["type"], limited))
+                    continue
+            
             if data["type"] == "subscribe":
                 # Subscribe to conversation
                 conversation_id = data["conversation_id"]
@@ -126,9 +136,7 @@ async def websocket_endpoint(websocket: WebSocket, token: str, db: Session = Dep
                     type="text",
                     content=content
                 )
-                db.add(message)
-                db.commit()
-                db.refresh(message)
+                save_message(db, message, realtime_manager.redis_client)
                 
                 # Get sender info
                 sender = db.query(User).filter(User.id == user_id).first()
@@ -0,0 +1 @@
+"""Offline benchmarks for the Kids Pixel Pals backend"""
@@ -0,0 +1,189 @@
+"""Storage benchmark for compact audit snapshot encoding
+
+Generates a synthetic stream of user/profile/conversation edits, writes it
+through the AuditWriter (base snapshots + RFC 6902 patches) into in-memory
+SQLite, verifies every row reconstructs to the original before/after states
+and reports storage compared to storing two full snapshots per event.
+
+Usage:
+    python -m benchmarks.audit_encoding --entities 2000 --events 50000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select
+
+from app.core.audit import AuditEvent, AuditWriter
+from app.core.audit_encoding import AuditStateResolver
+from app.models.audit import AuditLog
+from app.models.user import User, UserRole
+
+from .fakes import create_sqlite_sessionmaker
+
+
+WORDS = "pixel pal quest dragon castle blocky rainbow turbo comet ninja llama rocket".split()
+
+
+def initial_state(entity_type: str, entity_id: int, rng: random.Random) -> dict:
+    created = (datetime(2026, 1, 1) + timedelta(minutes=entity_id)).isoformat()
+    if entity_type == "user":
+        return {
+            "id": entity_id, "email": f"pal{entity_id}@example.com", "role": "CHILD",
+            "parent_id": rng.randint(1, 500), "approved_by_admin": False, "created_at": created,
+        }
+    if entity_type == "profile":
+        return {
+            "id": entity_id, "user_id": entity_id, "display_name": f"Pal {entity_id}",
+            "avatar_url": None, "bio": " ".join(rng.choices(WORDS, k=12)), "created_at": created,
+        }
+    return {
+        "id": entity_id, "is_group": True, "title": f"{rng.choice(WORDS)} club",
+        "created_by": rng.randint(1, 500), "created_at": created,
+        "member_ids": sorted(rng.sample(range(1, 5000), 6)),
+    }
+
+
+def edit(entity_type: str, state: dict, rng: random.Random) -> dict:
+    state = dict(state)
+    if entity_type == "user":
+        field = rng.choice(["approved_by_admin", "email", "parent_id"])
+        if field == "approved_by_admin":
+            state[field] = not state[field]
+        elif field == "email":
+            state[field] = f"{rng.choice(WORDS)}{rng.randint(1, 999)}@example.com"
+        else:
+            state[field] = rng.randint(1, 500)
+    elif entity_type == "profile":
+        field = rng.choice(["display_name", "bio", "avatar_url"])
+        if field == "avatar_url":
+            state[field] = f"/media/{rng.getrandbits(64):016x}.png"
+        else:
+            state[field] = " ".join(rng.choices(WORDS, k=2 if field == "display_name" else 12))
+    else:
+        if rng.random() < 0.5:
+            state["title"] = f"{rng.choice(WORDS)} {rng.choice(WORDS)} club"
+        else:
+            state["member_ids"] = sorted(set(state["member_ids"]) | {rng.randint(1, 5000)})
+    return state
+
+
+def generate(entities: int, events: int, seed: int) -> list[AuditEvent]:
+    rng = random.Random(seed)
+    types = ["user", "profile", "conversation"]
+    states = {}
+    stream = []
+    for _ in range(events):
+        entity_type = rng.choice(types)
+        entity_id = rng.randint(1, entities)
+        key = (entity_type, entity_id)
+        before = states.get(key) or initial_state(entity_type, entity_id, rng)
+        after = edit(entity_type, before, rng)
+        states[key] = after
+        stream.append(AuditEvent(
+            actor_id=1, action=f"{entity_type}_updated", entity_type=entity_type,
+            entity_id=entity_id, before_json=before, after_json=after,
+        ))
+    return stream
+
+
+def json_size(value) -> int:
+    return 0 if value is None else len(json.dumps(value, separators=(",", ":")))
+
+
+def run(entities: int, events: int, snapshot_interval: Optional[int], seed: int) -> dict:
+    engine, session_factory = create_sqlite_sessionmaker()
+    db = session_factory()
+    db.add(User(email="admin@example.com", password_hash="x", role=UserRole.ADMIN))
+    db.commit()
+
+    stream = generate(entities, events, seed)
+    full_bytes = sum(json_size(e.before_json) + json_size(e.after_json) for e in stream)
+
+    with tempfile.TemporaryDirectory() as spill_dir:
+        writer = AuditWriter(
+            session_factory=session_factory,
+            max_queue_size=len(stream),
+            batch_size=1000,
+            spill_path=os.path.join(spill_dir, "audit_spill.jsonl"),
+        )
+        if snapshot_interval:
+            writer.encoder.snapshot_interval = snapshot_interval
+        started = time.perf_counter()
+        for event in stream:
+            writer.record(event)
+        writer.flush_all()
+        write_seconds = time.perf_counter() - started
+
+    rows = db.execute(select(AuditLog).order_by(AuditLog.id)).scalars().all()
+    encoded_bytes = sum(
+        json_size(r.before_json) + json_size(r.after_json) + json_size(r.patch_json) + len(r.before_hash or "")
+        for r in rows
+    )
+    bases = sum(1 for r in rows if r.before_hash is None)
+
+    # Warm reconstruction: one resolver walking the log in order (CSV export path)
+    started = time.perf_counter()
+    states = AuditStateResolver(db).resolve(rows)
+    warm_seconds = time.perf_counter() - started
+    expected = {row.id: (event.before_json, event.after_json) for row, event in zip(rows, stream)}
+    for row in rows:
+        if states[row.id] != expected[row.id]:
+            raise AssertionError(f"Row {row.id} did not reconstruct to its original snapshots")
+
+    # Cold reconstruction: random single rows with an empty cache (admin list path)
+    rng = random.Random(seed)
+    sample = rng.sample(rows, min(200, len(rows)))
+    started = time.perf_counter()
+    for row in sample:
+        if AuditStateResolver(db).resolve([row])[row.id] != expected[row.id]:
+            raise AssertionError(f"Row {row.id} did not reconstruct from the database")
+    cold_ms = (time.perf_counter() - started) / len(sample) * 1000
+
+    db.close()
+    engine.dispose()
+    return {
+        "entities": entities,
+        "events": events,
+        "snapshot_interval": writer.encoder.snapshot_interval,
+        "base_rows": bases,
+        "full_snapshot_bytes": full_bytes,
+        "encoded_bytes": encoded_bytes,
+        "savings_pct": 100 * (1 - encoded_bytes / full_bytes) if full_bytes else 0.0,
+        "write_events_per_sec": events / write_seconds if write_seconds else 0.0,
+        "warm_reconstruct_rows_per_sec": len(rows) / warm_seconds if warm_seconds else 0.0,
+        "cold_reconstruct_ms": cold_ms,
+    }
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--snapshot-interval", type=int, help="override AUDIT_SNAPSHOT_INTERVAL")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", dest="json_path", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    result = run(args.entities, args.events, args.snapshot_interval, args.seed)
+    print(
+        f"Audit snapshot encoding: {result['events']:,} events over {result['entities']:,} entities "
+        f"(base every {result['snapshot_interval']} events, {result['base_rows']:,} base rows)\n"
+        f"  full before/after: {result['full_snapshot_bytes'] / 1e6:,.2f} MB\n"
+        f"  encoded:           {result['encoded_bytes'] / 1e6:,.2f} MB ({result['savings_pct']:.1f}% smaller)\n"
+        f"  write:             {result['write_events_per_sec']:,.0f} events/s\n"
+        f"  reconstruct:       {result['warm_reconstruct_rows_per_sec']:,.0f} rows/s in order, "
+        f"{result['cold_reconstruct_ms']:.2f} ms per random row"
+    )
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
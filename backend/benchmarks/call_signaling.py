@@ -0,0 +1,236 @@
+"""Signaling round-trip latency with hundreds of concurrent call rooms
+
+Runs several CallSignaling nodes in one process over a shared in-memory
+Redis stand-in. Every room's first peer sends each other peer an offer and
+the receiving client answers as soon as the offer arrives; the benchmark
+records offer -> answer round trips for rooms whose peers share a node and
+for rooms split across nodes. Peers then trickle ICE candidates to show how
+many frames the batching saves, and how many messages went through Redis.
+
+Usage:
+    python -m benchmarks.call_signaling --rooms 500 --peers 2 --nodes 2
+    python -m benchmarks.call_signaling --rooms 200 --peers 4 --cross-node 1.0 --json calls.json
+"""
+import argparse
+import asyncio
+import json
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from app.services.call_signaling import CallSignaling
+
+from .fakes import AsyncInMemoryRedis
+
+
+class CountingRedis(AsyncInMemoryRedis):
+    def __init__(self):
+        super().__init__()
+        self.published = 0
+
+    async def publish(self, channel: str, message) -> int:
+        self.published += 1
+        return self.server.publish(channel, message)
+
+
+class FakeClient:
+    """A browser tab: answers offers immediately and records what it receives"""
+
+    def __init__(self, node: CallSignaling, room_id: int, user_id: int):
+        self.node = node
+        self.room_id = room_id
+        self.user_id = user_id
+        self.peer = None
+        self.answers: dict[str, asyncio.Future] = {}
+        self.ice_frames = 0
+        self.ice_candidates = 0
+        self._tasks: set[asyncio.Task] = set()
+
+    async def send_json(self, frame: dict):
+        kind = frame["type"]
+        if kind == "signal:offer":
+            # Answer from a separate task, as a real client's receive loop would
+            task = asyncio.create_task(self.node.signal(self.peer, {"type": "signal:answer", "to": frame["from"], "sdp": "answer"}))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        elif kind == "signal:answer":
+            future = self.answers.get(frame["from"])
+            if future is not None and not future.done():
+                future.set_result(time.perf_counter())
+        elif kind == "signal:ice":
+            self.ice_frames += 1
+            self.ice_candidates += len(frame["candidates"])
+
+
+@dataclass
+class BenchmarkResult:
+    rooms: int
+    peers_per_room: int
+    nodes: int
+    cross_node_rooms: int
+    join_seconds: float
+    round_trips: int
+    local_p50_ms: float
+    local_p99_ms: float
+    cross_node_p50_ms: float
+    cross_node_p99_ms: float
+    ice_candidates_sent: int
+    ice_candidates_delivered: int
+    ice_frames_delivered: int
+    redis_publishes_signaling: int
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def wait_for(predicate, timeout: float) -> bool:
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            return False
+        await asyncio.sleep(0.005)
+    return True
+
+
+async def run(
+    rooms: int = 300,
+    peers: int = 2,
+    nodes: int = 2,
+    cross_node: float = 0.5,
+    offers: int = 5,
+    ice: int = 12,
+    ice_batch_ms: float = 20.0,
+    timeout: float = 60.0,
+) -> BenchmarkResult:
+    redis_client = CountingRedis()
+    hubs = [
+        CallSignaling(redis_client, node_id=f"node{i}", ice_batch_interval=ice_batch_ms / 1000, max_peers=peers)
+        for i in range(nodes)
+    ]
+    for hub in hubs:
+        hub.start()
+    await asyncio.sleep(0)
+
+    # The first `cross_node` share of rooms spread their peers over the nodes
+    split = round(rooms * cross_node) if nodes > 1 else 0
+    room_clients: list[list[FakeClient]] = []
+    started = time.perf_counter()
+    for room_id in range(rooms):
+        clients = []
+        for index in range(peers):
+            hub = hubs[(room_id + index) % nodes] if room_id < split else hubs[room_id % nodes]
+            client = FakeClient(hub, room_id, user_id=room_id * peers + index)
+            client.peer = await hub.join(room_id, client.user_id, client)
+            clients.append(client)
+        room_clients.append(clients)
+    join_seconds = time.perf_counter() - started
+
+    local, remote = [], []
+
+    async def negotiate(room_id: int, clients: list[FakeClient]):
+        caller = clients[0]
+        for callee in clients[1:]:
+            future = caller.answers[callee.peer.peer_id] = asyncio.get_running_loop().create_future()
+            sent_at = time.perf_counter()
+            await caller.node.signal(caller.peer, {"type": "signal:offer", "to": callee.peer.peer_id, "sdp": "offer"})
+            answered_at = await asyncio.wait_for(future, timeout)
+            (remote if callee.node is not caller.node else local).append(answered_at - sent_at)
+
+    published_before = redis_client.published
+    for _ in range(offers):
+        await asyncio.gather(*(negotiate(room_id, clients) for room_id, clients in enumerate(room_clients)))
+
+    # Trickle ICE: every peer sends each other peer `ice` candidates, then end-of-candidates
+    async def trickle(clients: list[FakeClient]):
+        for sender in clients:
+            for receiver in clients:
+                if receiver is sender:
+                    continue
+                for n in range(ice):
+                    await sender.node.signal(sender.peer, {
+                        "type": "signal:ice",
+                        "to": receiver.peer.peer_id,
+                        "candidate": {"candidate": f"candidate:{n} 1 udp 2122260223 10.0.0.{n} 5{n:04d} typ host"},
+                    })
+                    await asyncio.sleep(0.001)
+                await sender.node.signal(sender.peer, {"type": "signal:ice", "to": receiver.peer.peer_id, "candidate": None})
+
+    await asyncio.gather(*(trickle(clients) for clients in room_clients))
+    all_clients = [client for clients in room_clients for client in clients]
+    candidates_sent = rooms * peers * (peers - 1) * (ice + 1)
+    await wait_for(lambda: sum(c.ice_candidates for c in all_clients) >= candidates_sent, timeout)
+    published = redis_client.published - published_before
+
+    for client in all_clients:
+        await client.node.leave(client.peer)
+    for hub in hubs:
+        await hub.stop()
+
+    return BenchmarkResult(
+        rooms=rooms,
+        peers_per_room=peers,
+        nodes=nodes,
+        cross_node_rooms=split,
+        join_seconds=join_seconds,
+        round_trips=len(local) + len(remote),
+        local_p50_ms=percentile(local, 50) * 1000,
+        local_p99_ms=percentile(local, 99) * 1000,
+        cross_node_p50_ms=percentile(remote, 50) * 1000,
+        cross_node_p99_ms=percentile(remote, 99) * 1000,
+        ice_candidates_sent=candidates_sent,
+        ice_candidates_delivered=sum(c.ice_candidates for c in all_clients),
+        ice_frames_delivered=sum(c.ice_frames for c in all_clients),
+        redis_publishes_signaling=published,
+    )
+
+
+def format_report(result: BenchmarkResult) -> str:
+    return "\n".join([
+        f"Call signaling: {result.rooms} rooms x {result.peers_per_room} peers on {result.nodes} node(s), "
+        f"{result.cross_node_rooms} rooms split across nodes",
+        f"  join:      {result.join_seconds:.2f}s for {result.rooms * result.peers_per_room:,} peers",
+        f"  offer->answer ({result.round_trips:,} round trips):",
+        f"             same node  p50 {result.local_p50_ms:.2f} ms, p99 {result.local_p99_ms:.2f} ms",
+        f"             cross node p50 {result.cross_node_p50_ms:.2f} ms, p99 {result.cross_node_p99_ms:.2f} ms",
+        f"  ICE:       {result.ice_candidates_delivered:,}/{result.ice_candidates_sent:,} candidates "
+        f"in {result.ice_frames_delivered:,} frames",
+        f"  Redis:     {result.redis_publishes_signaling:,} publishes for signaling",
+    ])
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=300)
+    parser.add_argument("--peers", type=int, default=2, help="peers per room")
+    parser.add_argument("--nodes", type=int, default=2, help="signaling nodes (workers)")
+    parser.add_argument("--cross-node", type=float, default=0.5, help="share of rooms split across nodes")
+    parser.add_argument("--offers", type=int, default=5, help="negotiation rounds per room")
+    parser.add_argument("--ice", type=int, default=12, help="candidates trickled per peer pair")
+    parser.add_argument("--ice-batch-ms", type=float, default=20.0)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--json", dest="json_path", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run(
+        rooms=args.rooms,
+        peers=args.peers,
+        nodes=args.nodes,
+        cross_node=args.cross_node,
+        offers=args.offers,
+        ice=args.ice,
+        ice_batch_ms=args.ice_batch_ms,
+        timeout=args.timeout,
+    ))
+    print(format_report(result))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(asdict(result), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
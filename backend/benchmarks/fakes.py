@@ -0,0 +1,263 @@
+"""In-process stand-ins for Postgres and Redis used by the offline benchmarks"""
+import asyncio
+import fnmatch
+import itertools
+import time
+from collections import defaultdict, deque
+from typing import Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+
+
+class InMemoryPubSub:
+    def __init__(self, server: "InMemoryRedis"):
+        self._server = server
+        self.channels: set[str] = set()
+        self._queue: deque = deque()
+
+    def subscribe(self, *channels: str):
+        for channel in channels:
+            self.channels.add(channel)
+            self._server._subscribers[channel].add(self)
+
+    def unsubscribe(self, *channels: str):
+        for channel in channels or tuple(self.channels):
+            self.channels.discard(channel)
+            self._server._subscribers[channel].discard(self)
+
+    def get_message(self, ignore_subscribe_messages: bool = False, timeout: float = 0.0):
+        return self._queue.popleft() if self._queue else None
+
+    def close(self):
+        self.unsubscribe()
+
+
+class InMemoryPipeline:
+    """Queues commands and runs them in order on execute()"""
+
+    def __init__(self, server: "InMemoryRedis"):
+        self._server = server
+        self._commands: list = []
+
+    def __getattr__(self, name: str):
+        method = getattr(self._server, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((method, args, kwargs))
+            return self
+        return queue
+
+    def execute(self) -> list:
+        commands, self._commands = self._commands, []
+        return [method(*args, **kwargs) for method, args, kwargs in commands]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._commands = []
+
+
+class InMemoryRedis:
+    """Just enough of the redis-py client surface used by the app"""
+
+    def __init__(self):
+        self._data: dict[str, object] = {}
+        self._expires: dict[str, float] = {}
+        self._subscribers: dict[str, set[InMemoryPubSub]] = defaultdict(set)
+        self._stream_ids = itertools.count(1)
+
+    @staticmethod
+    def _encode(value) -> bytes:
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    def _expired(self, key: str) -> bool:
+        expires_at = self._expires.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+            return True
+        return False
+
+    def get(self, key: str) -> Optional[bytes]:
+        if self._expired(key):
+            return None
+        return self._data.get(key)
+
+    def mget(self, keys, *args) -> list[Optional[bytes]]:
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        return [self.get(key) for key in keys + list(args)]
+
+    def set(self, key: str, value, ex: Optional[int] = None):
+        self._data[key] = self._encode(value)
+        if ex is not None:
+            self._expires[key] = time.monotonic() + ex
+        else:
+            self._expires.pop(key, None)
+        return True
+
+    def setex(self, key: str, seconds: int, value):
+        return self.set(key, value, ex=seconds)
+
+    def delete(self, *keys: str) -> int:
+        removed = 0
+        for key in keys:
+            self._expires.pop(key, None)
+            removed += self._data.pop(key, None) is not None
+        return removed
+
+    def exists(self, *keys: str) -> int:
+        return sum(1 for key in keys if self.get(key) is not None)
+
+    def keys(self, pattern: str = "*") -> list[bytes]:
+        return [k.encode() for k in list(self._data) if not self._expired(k) and fnmatch.fnmatchcase(k, pattern)]
+
+    def publish(self, channel: str, message) -> int:
+        subscribers = self._subscribers.get(channel, ())
+        payload = {"type": "message", "channel": channel.encode(), "data": self._encode(message)}
+        for pubsub in subscribers:
+            pubsub._queue.append(payload)
+        return len(subscribers)
+
+    def pubsub(self) -> InMemoryPubSub:
+        return InMemoryPubSub(self)
+
+    def pipeline(self, transaction: bool = True) -> InMemoryPipeline:
+        return InMemoryPipeline(self)
+
+    def expire(self, key: str, seconds: int) -> bool:
+        if self.get(key) is None:
+            return False
+        self._expires[key] = time.monotonic() + seconds
+        return True
+
+    def _hash(self, key: str, create: bool = False) -> dict:
+        value = self.get(key)
+        if value is None and create:
+            value = self._data[key] = {}
+        return value if value is not None else {}
+
+    def hget(self, key: str, field: str) -> Optional[bytes]:
+        return self._hash(key).get(field)
+
+    def hmget(self, key: str, *fields) -> list[Optional[bytes]]:
+        names = fields[0] if len(fields) == 1 and isinstance(fields[0], (list, tuple)) else fields
+        data = self._hash(key)
+        return [data.get(name) for name in names]
+
+    def hset(self, key: str, field: Optional[str] = None, value=None, mapping: Optional[dict] = None) -> int:
+        data = self._hash(key, create=True)
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        added = sum(1 for name in items if name not in data)
+        data.update((name, self._encode(v)) for name, v in items.items())
+        return added
+
+    def hsetnx(self, key: str, field: str, value) -> int:
+        data = self._hash(key, create=True)
+        if field in data:
+            return 0
+        data[field] = self._encode(value)
+        return 1
+
+    def hdel(self, key: str, *fields: str) -> int:
+        data = self._hash(key)
+        return sum(data.pop(name, None) is not None for name in fields)
+
+    def hgetall(self, key: str) -> dict[bytes, bytes]:
+        return {self._encode(name): value for name, value in self._hash(key).items()}
+
+    def xadd(self, key: str, fields: dict, maxlen: Optional[int] = None, approximate: bool = True) -> bytes:
+        entries = self._data.setdefault(key, [])
+        entry_id = f"{int(time.time() * 1000)}-{next(self._stream_ids)}".encode()
+        entries.append((entry_id, {name: self._encode(v) for name, v in fields.items()}))
+        if maxlen is not None:
+            del entries[:-maxlen]
+        return entry_id
+
+    def xlen(self, key: str) -> int:
+        return len(self._data.get(key) or [])
+
+
+class _WakingQueue(deque):
+    """Message queue that wakes an async listener when something is appended"""
+
+    def __init__(self):
+        super().__init__()
+        self.ready = asyncio.Event()
+
+    def append(self, item):
+        super().append(item)
+        self.ready.set()
+
+
+class AsyncInMemoryPubSub(InMemoryPubSub):
+    def __init__(self, server: "InMemoryRedis"):
+        super().__init__(server)
+        self._queue = _WakingQueue()
+
+    async def subscribe(self, *channels: str):
+        super().subscribe(*channels)
+
+    async def listen(self):
+        while True:
+            while self._queue:
+                yield self._queue.popleft()
+            self._queue.ready.clear()
+            await self._queue.ready.wait()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+
+class AsyncInMemoryPipeline(InMemoryPipeline):
+    async def execute(self) -> list:
+        return super().execute()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self._commands = []
+
+
+class AsyncInMemoryRedis:
+    """redis.asyncio facade over an InMemoryRedis (pass one in to share data with sync clients)"""
+
+    def __init__(self, server: Optional[InMemoryRedis] = None):
+        self.server = server or InMemoryRedis()
+
+    def __getattr__(self, name: str):
+        method = getattr(self.server, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+        return call
+
+    def pipeline(self, transaction: bool = True) -> AsyncInMemoryPipeline:
+        return AsyncInMemoryPipeline(self.server)
+
+    def pubsub(self) -> AsyncInMemoryPubSub:
+        return AsyncInMemoryPubSub(self.server)
+
+
+def create_sqlite_sessionmaker():
+    """Create an in-memory SQLite database with the full schema"""
+    # Import models so they register on Base.metadata
+    from app.models import activity, audit, chat, message, moderation, screenshot, session, stream, user  # noqa: F401
+
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
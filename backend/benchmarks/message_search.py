@@ -0,0 +1,234 @@
+"""Message search latency on PostgreSQL at tens of millions of rows
+
+Unlike the other benchmarks this one needs a real PostgreSQL database
+migrated to head (`alembic upgrade head`), since it measures the tsvector
+and trigram GIN indexes. Use a scratch database: the first run seeds
+families, conversations and `--rows` messages generated server-side with a
+skewed kid-chat vocabulary plus a few rare marker words, then ANALYZEs.
+Later runs reuse the seeded rows.
+
+Each scenario runs `search_messages` as an admin or as a random parent and
+reports p50/p99 latency: common, rare, multi-term and prefix words, the
+trigram substring fallback, a single child's conversations, a wordless
+query scanned within a parent's conversations, and following the cursor
+deep into a common word's results.
+
+Usage:
+    python -m benchmarks.message_search --database-url postgresql://localhost/pixelpals_bench --rows 20000000
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from typing import Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models.user import User, UserRole
+from app.services.message_search import search_messages
+
+
+EMAIL_PREFIX = "search-bench-"
+# Most common first: words are drawn with a steep bias towards the start of the list
+VOCABULARY = (
+    "lol gg u hey ok pls wanna play pixel quest castle dragon rainbow bridge later "
+    "school tomorrow nice build level hard xD gr8 brb omg ty np idk boss "
+    "coins skin unlock server invite minecraft homework mom dinner puppy unicorn <3 :)"
+).split()
+RARE_WORDS = ("zorbulax", "quillfeather")
+RARE_EVERY = 100_000
+
+
+def _bench_count(db, pattern: str) -> int:
+    return db.execute(
+        text("SELECT count(*) FROM users WHERE email LIKE :pattern"), {"pattern": EMAIL_PREFIX + pattern}
+    ).scalar_one()
+
+
+def seed(engine, families: int, conversations: int, rows: int, batch: int, seed_value: float) -> None:
+    # One connection throughout: setseed() and the temp tables are per session
+    with engine.connect() as db:
+        db.execute(text("SELECT setseed(:seed)"), {"seed": seed_value})
+        if _bench_count(db, "admin%") == 0:
+            print(f"Seeding {families:,} families and {conversations:,} conversations")
+            db.execute(text(
+                "INSERT INTO users (email, password_hash, role, approved_by_admin, created_at) "
+                "VALUES (:email, 'x', 'ADMIN', true, now())"
+            ), {"email": f"{EMAIL_PREFIX}admin@example.com"})
+            db.execute(text(
+                "INSERT INTO users (email, password_hash, role, approved_by_admin, created_at) "
+                "SELECT :prefix || 'parent-' || g || '@example.com', 'x', 'PARENT', true, now() "
+                "FROM generate_series(1, :families) g"
+            ), {"prefix": EMAIL_PREFIX, "families": families})
+            db.execute(text(
+                "INSERT INTO users (email, password_hash, role, parent_id, created_at) "
+                "SELECT :prefix || 'child-' || p.id || '-' || k || '@example.com', 'x', 'CHILD', p.id, now() "
+                "FROM users p CROSS JOIN generate_series(1, 2) k "
+                "WHERE p.email LIKE :prefix || 'parent-%'"
+            ), {"prefix": EMAIL_PREFIX})
+            db.execute(text(
+                "CREATE TEMP TABLE bench_children ON COMMIT DROP AS "
+                "SELECT row_number() OVER (ORDER BY id) - 1 AS n, id FROM users "
+                "WHERE email LIKE :prefix || 'child-%'"
+            ), {"prefix": EMAIL_PREFIX})
+            child_count = db.execute(text("SELECT count(*) FROM bench_children")).scalar_one()
+            # Conversation c is between children c and c * 7919 + 1 (mod the child count)
+            db.execute(text(
+                "INSERT INTO conversations (is_group, title, created_by, created_at) "
+                "SELECT false, :prefix || g, c.id, now() FROM generate_series(0, :conversations - 1) g "
+                "JOIN bench_children c ON c.n = g % :children"
+            ), {"prefix": EMAIL_PREFIX, "conversations": conversations, "children": child_count})
+            db.execute(text(
+                "INSERT INTO conversation_members (conversation_id, user_id, role_in_convo, joined_at) "
+                "SELECT cv.id, c.id, 'member', now() FROM conversations cv "
+                "CROSS JOIN LATERAL (VALUES (cv.created_by), ("
+                "  SELECT id FROM bench_children "
+                "  WHERE n = (substring(cv.title FROM length(:prefix) + 1)::bigint * 7919 + 1) % :children"
+                ")) AS c(id) WHERE cv.title LIKE :prefix || '%' "
+                "ON CONFLICT DO NOTHING"
+            ), {"prefix": EMAIL_PREFIX, "children": child_count})
+            db.commit()
+
+        db.execute(text(
+            "CREATE TEMP TABLE bench_conversations AS "
+            "SELECT row_number() OVER (ORDER BY id) - 1 AS n, id, created_by FROM conversations "
+            "WHERE title LIKE :prefix || '%'"
+        ), {"prefix": EMAIL_PREFIX})
+        conversation_count = db.execute(text("SELECT count(*) FROM bench_conversations")).scalar_one()
+        existing = db.execute(text(
+            "SELECT count(*) FROM messages m JOIN bench_conversations c ON c.id = m.conversation_id"
+        )).scalar_one()
+        if existing >= rows:
+            print(f"Reusing {existing:,} seeded messages")
+            return
+
+        started = time.perf_counter()
+        for low in range(existing + 1, rows + 1, batch):
+            high = min(low + batch - 1, rows)
+            db.execute(text(
+                "INSERT INTO messages (conversation_id, sender_id, type, content, created_at) "
+                "SELECT c.id, c.created_by, 'TEXT', "
+                "  (SELECT string_agg(CAST(:vocabulary AS text[])[1 + floor(power(random(), 3) * :words)::int], ' ') "
+                "   FROM generate_series(1, 3 + g % 10)) "
+                "  || CASE WHEN g % :rare_every = 0 THEN ' ' || CAST(:rare AS text[])[1 + (g / :rare_every) % 2] ELSE '' END, "
+                "  now() - make_interval(secs => :rows - g) "
+                "FROM generate_series(CAST(:low AS bigint), :high) g "
+                "JOIN bench_conversations c ON c.n = (g * 2654435761) % :conversations"
+            ), {
+                "vocabulary": VOCABULARY,
+                "words": len(VOCABULARY),
+                "rare": list(RARE_WORDS),
+                "rare_every": RARE_EVERY,
+                "rows": rows,
+                "low": low,
+                "high": high,
+                "conversations": conversation_count,
+            })
+            db.commit()
+            rate = (high - existing) / (time.perf_counter() - started)
+            print(f"  {high:,}/{rows:,} messages ({rate:,.0f} rows/s)")
+        db.execute(text("ANALYZE messages, conversation_members, users"))
+        db.commit()
+
+
+def _percentiles(samples: list[float]) -> tuple[float, float]:
+    ordered = sorted(samples)
+    return statistics.median(ordered), ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+
+def run(session_factory, queries: int, deep_pages: int, rng: random.Random) -> list[dict]:
+    db = session_factory()
+    try:
+        admin = db.query(User).filter(User.email == f"{EMAIL_PREFIX}admin@example.com").one()
+        parents = db.query(User).filter(
+            User.email.like(f"{EMAIL_PREFIX}parent-%"), User.role == UserRole.PARENT
+        ).all()
+        children_by_parent: dict[int, list[int]] = {}
+        for child_id, parent_id in db.query(User.id, User.parent_id).filter(
+            User.email.like(f"{EMAIL_PREFIX}child-%")
+        ):
+            children_by_parent.setdefault(parent_id, []).append(child_id)
+    finally:
+        db.close()
+
+    def admin_search(q: str, **kwargs):
+        return lambda db: search_messages(db, admin, q, 20, **kwargs)
+
+    def parent_search(q: str, one_child: bool = False):
+        def search(db):
+            parent = rng.choice(parents)
+            member_id = rng.choice(children_by_parent[parent.id]) if one_child else None
+            return search_messages(db, parent, q, 20, member_id=member_id)
+        return search
+
+    def deep(db):
+        mode, before_id = None, None
+        for _ in range(deep_pages):
+            _, mode, before_id = search_messages(db, admin, "pixel", 20, mode=mode, before_id=before_id)
+            if before_id is None:
+                break
+        return [], mode, before_id
+
+    scenarios = [
+        ("admin: common word", admin_search("lol")),
+        ("admin: rare word", admin_search(RARE_WORDS[0])),
+        ("admin: two words", admin_search("dragon castle")),
+        ("admin: prefix", admin_search("rainb")),
+        ("admin: substring fallback", admin_search("rbula")),
+        ("parent: common word", parent_search("lol")),
+        ("parent: rare word", parent_search(RARE_WORDS[1])),
+        ("parent: one child", parent_search("dragon", one_child=True)),
+        ("parent: emoticon", parent_search("<3")),
+        (f"admin: page {deep_pages} of common", deep),
+    ]
+    results = []
+    for name, search in scenarios:
+        samples, hits = [], 0
+        for _ in range(queries):
+            db = session_factory()
+            try:
+                started = time.perf_counter()
+                items, mode, _ = search(db)
+                samples.append((time.perf_counter() - started) * 1000)
+                hits += len(items)
+            finally:
+                db.close()
+        p50, p99 = _percentiles(samples)
+        results.append({"scenario": name, "mode": mode, "p50_ms": p50, "p99_ms": p99, "hits_per_query": hits / queries})
+    return results
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=str(settings.database_url))
+    parser.add_argument("--rows", type=int, default=20_000_000)
+    parser.add_argument("--batch", type=int, default=500_000)
+    parser.add_argument("--families", type=int, default=20_000)
+    parser.add_argument("--conversations", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--deep-pages", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", dest="json_path", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.database_url, pool_size=2)
+    if engine.dialect.name != "postgresql":
+        parser.error("message search needs PostgreSQL")
+    seed(engine, args.families, args.conversations, args.rows, args.batch, (args.seed % 100) / 100)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    results = run(session_factory, args.queries, args.deep_pages, random.Random(args.seed))
+
+    print(f"Message search latency ({args.rows:,} messages, {args.queries} queries per scenario)")
+    print(f"  {'scenario':<32} {'mode':>10} {'p50 ms':>8} {'p99 ms':>8} {'hits':>6}")
+    for r in results:
+        print(f"  {r['scenario']:<32} {r['mode']:>10} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['hits_per_query']:>6.1f}")
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Per-message cost of the language monitoring engine as the rule list grows
+
+Scans the same synthetic chat messages against rule sets of increasing size
+with the Aho-Corasick automaton and, for comparison, with one compiled regex
+alternation and a naive per-pattern substring loop. The automaton's cost per
+message should stay flat while the alternatives grow with the rule count.
+
+Usage:
+    python -m benchmarks.moderation_scan --rules 10 100 1000 5000 --messages 2000
+"""
+import argparse
+import json
+import random
+import re
+import string
+import time
+from typing import Optional
+
+from app.services.moderation import RuleSet, normalize
+
+
+WORDS = (
+    "hey wanna play pixel quest later my castle has a dragon and a rainbow bridge "
+    "that level was so hard lol gg nice build see you tomorrow after school"
+).split()
+
+
+def synthetic_rules(count: int, rng: random.Random) -> list[dict]:
+    rules = []
+    for index in range(count):
+        patterns = [
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9)))
+            for _ in range(rng.randint(1, 4))
+        ]
+        rules.append({"rule": f"rule_{index}", "severity": rng.choice(["low", "medium", "high"]), "patterns": patterns})
+    return rules
+
+
+def synthetic_messages(count: int, rules: list[dict], rng: random.Random) -> list[str]:
+    messages = []
+    for _ in range(count):
+        words = rng.choices(WORDS, k=rng.randint(4, 30))
+        if rules and rng.random() < 0.05:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(rng.choice(rules)["patterns"]))
+        messages.append(" ".join(words))
+    return messages
+
+
+def per_message_us(scan, messages: list[str]) -> float:
+    started = time.perf_counter()
+    for message in messages:
+        scan(message)
+    return (time.perf_counter() - started) / len(messages) * 1e6
+
+
+def run(rule_counts: list[int], message_count: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    all_rules = synthetic_rules(max(rule_counts), rng)
+    results = []
+    for count in rule_counts:
+        rules = all_rules[:count]
+        messages = synthetic_messages(message_count, rules, random.Random(seed))
+        patterns = [f" {normalize(p).strip()} " for rule in rules for p in rule["patterns"]]
+
+        started = time.perf_counter()
+        ruleset = RuleSet(rules)
+        compile_ms = (time.perf_counter() - started) * 1000
+        regex = re.compile("|".join(re.escape(p) for p in patterns))
+
+        def naive(message: str) -> list[str]:
+            text = normalize(message)
+            return [p for p in patterns if p in text]
+
+        results.append({
+            "rules": count,
+            "patterns": len(patterns),
+            "compile_ms": compile_ms,
+            "aho_corasick_us": per_message_us(ruleset.scan, messages),
+            "regex_us": per_message_us(lambda m: regex.findall(normalize(m)), messages),
+            "naive_us": per_message_us(naive, messages),
+        })
+    return results
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", dest="json_path", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    results = run(sorted(args.rules), args.messages, args.seed)
+    print(f"Moderation scan cost per message ({args.messages:,} messages, microseconds)")
+    print(f"  {'rules':>7} {'patterns':>9} {'compile ms':>11} {'aho-corasick':>13} {'regex':>9} {'naive':>9}")
+    for r in results:
+        print(
+            f"  {r['rules']:>7,} {r['patterns']:>9,} {r['compile_ms']:>11.1f} "
+            f"{r['aho_corasick_us']:>13.1f} {r['regex_us']:>9.1f} {r['naive_us']:>9.1f}"
+        )
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
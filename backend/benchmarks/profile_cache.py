@@ -0,0 +1,154 @@
+"""Database load and latency of the cached profile endpoints
+
+Drives GET /profiles/me and /profiles/me/games in-process against in-memory
+SQLite and the in-memory Redis stand-in, counting SQL statements per
+request for a cold miss, a warm cache hit and an If-None-Match revalidation
+(304), and checks that a burst of concurrent misses for one user is served
+by a single database load.
+
+Usage:
+    python -m benchmarks.profile_cache --requests 2000 --concurrency 32
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core.database import get_db
+from app.core.security import create_access_token
+from app.models.user import GameCredential, Profile, User, UserRole
+
+from .fakes import InMemoryRedis, create_sqlite_sessionmaker
+
+
+def build_app(session_factory, redis_client) -> FastAPI:
+    from app.routes import profile as profile_routes
+    from app.services.profile_cache import profile_cache
+
+    profile_cache.redis = redis_client
+    app = FastAPI()
+
+    def get_bench_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = get_bench_db
+    app.include_router(profile_routes.router)
+    return app
+
+
+def seed(session_factory) -> str:
+    db = session_factory()
+    try:
+        user = User(email="pal@example.com", password_hash="x", role=UserRole.CHILD, approved_by_admin=True)
+        db.add(user)
+        db.flush()
+        profile = Profile(user_id=user.id, display_name="Pixel Pal", bio="likes dragons")
+        db.add(profile)
+        db.flush()
+        db.add_all(
+            GameCredential(profile_id=profile.id, game_name=f"Game {i}", username=f"pal{i}",
+                           password_ciphertext="x", iv="x")
+            for i in range(5)
+        )
+        db.commit()
+        return create_access_token({"user_id": user.id, "email": user.email, "role": user.role.value})
+    finally:
+        db.close()
+
+
+def run(requests: int, concurrency: int) -> dict:
+    engine, session_factory = create_sqlite_sessionmaker()
+    redis_client = InMemoryRedis()
+    app = build_app(session_factory, redis_client)
+    token = seed(session_factory)
+    from app.services.profile_cache import profile_cache
+
+    statements = {"count": 0, "profile_loads": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_statement(conn, cursor, statement, *args):
+        statements["count"] += 1
+        statements["profile_loads"] += "FROM profiles" in statement
+
+    headers = {"Authorization": f"Bearer {token}"}
+    client = TestClient(app)
+    user_id = client.get("/profiles/me", headers=headers).json()["user_id"]
+
+    def measure(path: str, extra: Optional[dict] = None, invalidate: bool = False) -> tuple[float, float, int]:
+        """(mean ms, SQL statements per request, last status)"""
+        before, total, status = statements["count"], 0.0, 0
+        for _ in range(requests):
+            if invalidate:
+                profile_cache.invalidate(user_id)
+            started = time.perf_counter()
+            response = client.get(path, headers={**headers, **(extra or {})})
+            total += time.perf_counter() - started
+            status = response.status_code
+        return total / requests * 1000, (statements["count"] - before) / requests, status
+
+    results = {}
+    for resource, path in (("me", "/profiles/me"), ("games", "/profiles/me/games")):
+        cold = measure(path, invalidate=True)
+        warm = measure(path)
+        etag = client.get(path, headers=headers).headers["etag"]
+        revalidate = measure(path, {"If-None-Match": etag})
+        results[resource] = {
+            "cold_ms": cold[0], "cold_queries": cold[1],
+            "warm_ms": warm[0], "warm_queries": warm[1],
+            "not_modified_ms": revalidate[0], "not_modified_queries": revalidate[1],
+            "not_modified_status": revalidate[2],
+        }
+
+    # Concurrent misses: the profile query must run once per invalidation
+    bursts = 20
+    before = statements["profile_loads"]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(bursts):
+            profile_cache.invalidate(user_id)
+            list(pool.map(lambda _: client.get("/profiles/me", headers=headers).status_code, range(concurrency)))
+    results["coalescing"] = {
+        "bursts": bursts,
+        "concurrent_requests": concurrency,
+        "profile_loads_per_burst": (statements["profile_loads"] - before) / bursts,
+    }
+    engine.dispose()
+    return results
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--json", dest="json_path", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    results = run(args.requests, args.concurrency)
+    print(f"Profile endpoints ({args.requests:,} requests per case)")
+    for resource in ("me", "games"):
+        r = results[resource]
+        print(
+            f"  /{resource}: miss {r['cold_ms']:.2f} ms ({r['cold_queries']:.1f} SQL), "
+            f"hit {r['warm_ms']:.2f} ms ({r['warm_queries']:.1f} SQL), "
+            f"{r['not_modified_status']} {r['not_modified_ms']:.2f} ms ({r['not_modified_queries']:.1f} SQL)"
+        )
+    c = results["coalescing"]
+    print(
+        f"  single-flight: {c['concurrent_requests']} concurrent misses -> "
+        f"{c['profile_loads_per_burst']:.2f} profile loads per burst"
+    )
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
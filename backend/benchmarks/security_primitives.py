@@ -0,0 +1,258 @@
+"""Microbenchmarks for the primitives in app/core/security.py
+
+Measures latency and throughput of password hashing (Argon2 via passlib and
+argon2-cffi's low-level API), JWT encode/decode (python-jose, and PyJWT when
+installed) and Fernet encrypt/decrypt under the configured Settings, then
+sweeps Argon2 cost parameters at the machine's core count and recommends the
+most expensive setting that keeps login p99 under budget.
+
+Usage:
+    python -m benchmarks.security_primitives
+    python -m benchmarks.security_primitives --budget-ms 250 --workers 8 --json security.json
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+import argon2
+from argon2.low_level import Type
+from jose import jwt as jose_jwt
+
+from app.core.config import settings
+from app.core.security import (
+    create_access_token,
+    decrypt_data,
+    encrypt_data,
+    get_password_hash,
+    verify_password,
+    verify_token,
+)
+
+try:
+    import jwt as pyjwt
+except ImportError:  # PyJWT is optional; only used for comparison
+    pyjwt = None
+
+
+PASSWORD = "correct-horse-battery"
+TOKEN_CLAIMS = {"user_id": 42, "email": "pal@example.com", "role": "CHILD"}
+
+# (time_cost, memory_cost KiB) candidates for the Argon2 sweep
+ARGON2_GRID = [
+    (1, 19456),
+    (2, 19456),
+    (2, 47104),
+    (3, 65536),
+    (4, 65536),
+    (3, 131072),
+]
+
+
+@dataclass
+class Measurement:
+    name: str
+    iterations: int
+    workers: int
+    ops_per_sec: float
+    p50_ms: float
+    p99_ms: float
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(name: str, fn: Callable[[], object], iterations: int, workers: int = 1) -> Measurement:
+    """Run `fn` `iterations` times spread over `workers` threads
+
+    Argon2 and Fernet release the GIL in C, so threads approximate a
+    multi-worker uvicorn deployment's CPU contention.
+    """
+    fn()  # warm up
+
+    def timed(_):
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+
+    started = time.perf_counter()
+    if workers == 1:
+        latencies = [timed(i) for i in range(iterations)]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            latencies = list(pool.map(timed, range(iterations)))
+    elapsed = time.perf_counter() - started
+
+    return Measurement(
+        name=name,
+        iterations=iterations,
+        workers=workers,
+        ops_per_sec=iterations / elapsed if elapsed else 0.0,
+        p50_ms=percentile(latencies, 50) * 1000,
+        p99_ms=percentile(latencies, 99) * 1000,
+    )
+
+
+def bench_passwords(iterations: int) -> list[Measurement]:
+    hashed = get_password_hash(PASSWORD)
+    params = argon2.extract_parameters(hashed)
+    hasher = argon2.PasswordHasher(
+        time_cost=params.time_cost,
+        memory_cost=params.memory_cost,
+        parallelism=params.parallelism,
+        hash_len=params.hash_len,
+        salt_len=params.salt_len,
+        type=Type.ID,
+    )
+    return [
+        measure("passlib argon2 hash", lambda: get_password_hash(PASSWORD), iterations),
+        measure("passlib argon2 verify", lambda: verify_password(PASSWORD, hashed), iterations),
+        measure("argon2-cffi hash", lambda: hasher.hash(PASSWORD), iterations),
+        measure("argon2-cffi verify", lambda: hasher.verify(hashed, PASSWORD), iterations),
+    ]
+
+
+def bench_jwt(iterations: int) -> list[Measurement]:
+    key, algorithm = settings.jwt_secret_key, settings.jwt_algorithm
+    claims = {**TOKEN_CLAIMS, "exp": datetime.utcnow() + timedelta(hours=1)}
+    token = create_access_token(TOKEN_CLAIMS)
+
+    results = [
+        measure("python-jose encode", lambda: jose_jwt.encode(claims, key, algorithm=algorithm), iterations),
+        measure("python-jose decode", lambda: verify_token(token), iterations),
+    ]
+    if pyjwt is not None:
+        results += [
+            measure("PyJWT encode", lambda: pyjwt.encode(claims, key, algorithm=algorithm), iterations),
+            measure("PyJWT decode", lambda: pyjwt.decode(token, key, algorithms=[algorithm]), iterations),
+        ]
+    return results
+
+
+def bench_fernet(iterations: int) -> list[Measurement]:
+    results = []
+    for size in (32, 1024, 16384):
+        plaintext = "x" * size
+        key_id, ciphertext = encrypt_data(plaintext)
+        results += [
+            measure(f"fernet encrypt {size}B", lambda: encrypt_data(plaintext), iterations),
+            measure(f"fernet decrypt {size}B", lambda: decrypt_data(ciphertext, key_id), iterations),
+        ]
+    return results
+
+
+@dataclass
+class Argon2Candidate:
+    time_cost: int
+    memory_cost: int
+    parallelism: int
+    verify: Measurement
+    login_p99_ms: float
+    within_budget: bool
+
+
+def sweep_argon2(workers: int, iterations: int, budget_ms: float, token_ms: float) -> list[Argon2Candidate]:
+    """Time Argon2 verify per cost setting with `workers` concurrent logins"""
+    parallelism = settings.argon2_parallelism
+    candidates = []
+    for time_cost, memory_cost in ARGON2_GRID:
+        hasher = argon2.PasswordHasher(
+            time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism, type=Type.ID
+        )
+        hashed = hasher.hash(PASSWORD)
+        verify = measure(
+            f"argon2 verify t={time_cost} m={memory_cost}",
+            lambda: hasher.verify(hashed, PASSWORD),
+            iterations,
+            workers,
+        )
+        # A login is one verify plus an access and a refresh token
+        login_p99 = verify.p99_ms + 2 * token_ms
+        candidates.append(Argon2Candidate(
+            time_cost=time_cost,
+            memory_cost=memory_cost,
+            parallelism=parallelism,
+            verify=verify,
+            login_p99_ms=login_p99,
+            within_budget=login_p99 <= budget_ms,
+        ))
+    return candidates
+
+
+def recommend(candidates: list[Argon2Candidate]) -> Optional[Argon2Candidate]:
+    """Most expensive (by time x memory) setting that fits the budget"""
+    fitting = [c for c in candidates if c.within_budget]
+    return max(fitting, key=lambda c: c.time_cost * c.memory_cost, default=None)
+
+
+def format_table(measurements: list[Measurement]) -> str:
+    lines = [f"  {'primitive':<34} {'workers':>7} {'ops/s':>11} {'p50 ms':>9} {'p99 ms':>9}"]
+    for m in measurements:
+        lines.append(f"  {m.name:<34} {m.workers:>7} {m.ops_per_sec:>11,.1f} {m.p50_ms:>9.3f} {m.p99_ms:>9.3f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="concurrent logins for the Argon2 sweep (default: core count)")
+    parser.add_argument("--budget-ms", type=float, default=250.0, help="login p99 budget in milliseconds")
+    parser.add_argument("--hash-iterations", type=int, default=20)
+    parser.add_argument("--fast-iterations", type=int, default=5000,
+                        help="iterations for JWT and Fernet primitives")
+    parser.add_argument("--json", dest="json_path", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    passwords = bench_passwords(args.hash_iterations)
+    tokens = bench_jwt(args.fast_iterations)
+    fernet = bench_fernet(args.fast_iterations)
+    token_ms = next(m.p99_ms for m in tokens if m.name == "python-jose encode")
+    candidates = sweep_argon2(
+        args.workers, max(args.hash_iterations, args.workers * 4), args.budget_ms, token_ms
+    )
+    best = recommend(candidates)
+
+    print(
+        f"Configured: argon2 t={settings.argon2_time_cost} m={settings.argon2_memory_cost} "
+        f"p={settings.argon2_parallelism}, JWT {settings.jwt_algorithm}"
+    )
+    print("\nPassword hashing\n" + format_table(passwords))
+    print("\nJWT" + ("" if pyjwt else " (PyJWT not installed; python-jose only)") + "\n" + format_table(tokens))
+    print("\nFernet\n" + format_table(fernet))
+    print(f"\nArgon2 sweep at {args.workers} concurrent logins (budget p99 {args.budget_ms:.0f} ms)")
+    print(f"  {'time':>4} {'memory KiB':>10} {'logins/s':>9} {'login p99 ms':>13}")
+    for c in candidates:
+        marker = " <- recommended" if c is best else ("" if c.within_budget else "  over budget")
+        print(f"  {c.time_cost:>4} {c.memory_cost:>10} {c.verify.ops_per_sec:>9.1f} {c.login_p99_ms:>13.1f}{marker}")
+    if best:
+        print(
+            f"\nRecommended: ARGON2_TIME_COST={best.time_cost} "
+            f"ARGON2_MEMORY_COST={best.memory_cost} ARGON2_PARALLELISM={best.parallelism}"
+        )
+    else:
+        print("\nNo candidate fits the budget; add workers/cores or raise the budget.")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({
+                "workers": args.workers,
+                "budget_ms": args.budget_ms,
+                "passwords": [asdict(m) for m in passwords],
+                "jwt": [asdict(m) for m in tokens],
+                "fernet": [asdict(m) for m in fernet],
+                "argon2_sweep": [asdict(c) for c in candidates],
+                "recommended": asdict(best) if best else None,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
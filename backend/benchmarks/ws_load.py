@@ -0,0 +1,357 @@
+"""Offline WebSocket load test and fan-out benchmark
+
+Boots the WebSocket routes against in-memory SQLite and Redis stand-ins and
+drives simulated clients through connect, subscribe, message and typing flows
+entirely in-process (no sockets, Postgres or Redis required).
+
+Usage:
+    python -m benchmarks.ws_load --clients 2000 --group-size 4 --messages 5
+    python -m benchmarks.ws_load --endpoint chat --rate 500 --json results.json
+
+With the default burst mode every client sends at once, so latency includes
+event-loop queueing; pass --rate to pace messages (open loop) and measure
+delivery latency at a fixed offered load.
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Optional
+from urllib.parse import urlencode
+
+from fastapi import FastAPI
+
+from app.core.database import get_db
+from app.core.security import create_access_token
+from app.models.chat import Conversation, ConversationMember
+from app.models.user import Profile, User, UserRole
+
+from .fakes import InMemoryRedis, create_sqlite_sessionmaker
+
+
+ENDPOINTS = ("ws", "chat")
+
+
+class ASGIWebSocketClient:
+    """Minimal in-process WebSocket client speaking ASGI directly to the app"""
+
+    def __init__(self, app, path: str, query: dict, client_id: int):
+        self.app = app
+        self.scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": urlencode(query).encode(),
+            "headers": [],
+            "server": ("bench", 80),
+            "client": ("127.0.0.1", 10000 + client_id),
+            "subprotocols": [],
+        }
+        self._to_app: asyncio.Queue = asyncio.Queue()
+        self._from_app: asyncio.Queue = asyncio.Queue()
+        self._app_task: Optional[asyncio.Task] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self.on_message = None
+
+    async def connect(self) -> bool:
+        self._app_task = asyncio.create_task(
+            self.app(self.scope, self._to_app.get, self._from_app.put)
+        )
+        await self._to_app.put({"type": "websocket.connect"})
+        message = await self._from_app.get()
+        if message["type"] != "websocket.accept":
+            return False
+        self._reader_task = asyncio.create_task(self._read())
+        return True
+
+    async def _read(self):
+        while True:
+            message = await self._from_app.get()
+            if message["type"] == "websocket.close":
+                return
+            if message["type"] == "websocket.send" and self.on_message:
+                self.on_message(json.loads(message.get("text") or message["bytes"]))
+
+    async def send_json(self, data: dict):
+        await self._to_app.put({"type": "websocket.receive", "text": json.dumps(data)})
+
+    async def close(self):
+        await self._to_app.put({"type": "websocket.disconnect", "code": 1000})
+        if self._app_task:
+            await asyncio.wait([self._app_task], timeout=5)
+        if self._reader_task:
+            self._reader_task.cancel()
+
+
+@dataclass
+class BenchmarkResult:
+    endpoint: str
+    clients: int
+    group_size: int
+    messages_per_client: int
+    rate: float
+    connect_seconds: float
+    connections_per_sec: float
+    memory_per_connection_bytes: float
+    messages_sent: int
+    deliveries_expected: int
+    deliveries_received: int
+    message_seconds: float
+    messages_per_sec: float
+    deliveries_per_sec: float
+    latency_p50_ms: float
+    latency_p99_ms: float
+    typing_events_sent: int
+    typing_deliveries: int
+    typing_seconds: float
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def build_app(endpoint: str, session_factory, redis_client) -> FastAPI:
+    """Mount the selected WebSocket handler with DB and Redis swapped for stand-ins"""
+    app = FastAPI()
+
+    def get_bench_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = get_bench_db
+
+    # Measures fan-out, not admission control
+    from app.core.rate_limit import rate_limiter
+    rate_limiter.enabled = False
+
+    if endpoint == "ws":
+        from app.core.websocket import manager
+        from app.routes import websocket as ws_routes
+
+        manager.active_connections.clear()
+        manager.redis_client = redis_client
+        manager.pubsub = redis_client.pubsub()
+        app.include_router(ws_routes.router)
+    else:
+        from app.websockets import chat as chat_ws
+
+        chat_ws.manager.active_connections.clear()
+        chat_ws.manager.conversation_subscriptions.clear()
+        app.add_api_websocket_route("/ws/chat", chat_ws.websocket_endpoint)
+
+    return app
+
+
+def seed(session_factory, clients: int, group_size: int) -> tuple[list[dict], dict[int, int]]:
+    """Create child users with profiles and group them into conversations"""
+    db = session_factory()
+    try:
+        users = [
+            User(email=f"bench{i}@example.com", password_hash="x", role=UserRole.CHILD, approved_by_admin=True)
+            for i in range(clients)
+        ]
+        db.add_all(users)
+        db.flush()
+        db.add_all(Profile(user_id=u.id, display_name=f"Pal {u.id}") for u in users)
+
+        members_by_conversation: dict[int, int] = {}
+        seeded = []
+        for start in range(0, clients, group_size):
+            group = users[start:start + group_size]
+            conversation = Conversation(is_group=len(group) > 2, created_by=group[0].id)
+            db.add(conversation)
+            db.flush()
+            db.add_all(ConversationMember(conversation_id=conversation.id, user_id=u.id) for u in group)
+            members_by_conversation[conversation.id] = len(group)
+            for u in group:
+                seeded.append({
+                    "user_id": u.id,
+                    "conversation_id": conversation.id,
+                    "token": create_access_token({"user_id": u.id, "email": u.email, "role": u.role.value}),
+                })
+        db.commit()
+        return seeded, members_by_conversation
+    finally:
+        db.close()
+
+
+async def wait_for(predicate, timeout: float) -> bool:
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            return False
+        await asyncio.sleep(0.005)
+    return True
+
+
+async def run(
+    endpoint: str = "ws",
+    clients: int = 1000,
+    group_size: int = 4,
+    messages_per_client: int = 5,
+    typing_per_client: int = 2,
+    rate: float = 0.0,
+    timeout: float = 60.0,
+) -> BenchmarkResult:
+    engine, session_factory = create_sqlite_sessionmaker()
+    redis_client = InMemoryRedis()
+    app = build_app(endpoint, session_factory, redis_client)
+    seeded, members_by_conversation = seed(session_factory, clients, group_size)
+
+    latencies: list[float] = []
+    counts = {"message": 0, "typing": 0}
+
+    def on_message(payload: dict):
+        kind = payload.get("type")
+        if kind == "message":
+            counts["message"] += 1
+            sent_at = json.loads(payload["content"])["sent_at"]
+            latencies.append(time.perf_counter() - sent_at)
+        elif kind == "typing":
+            counts["typing"] += 1
+
+    path = "/ws" if endpoint == "ws" else "/ws/chat"
+    ws_clients = [
+        ASGIWebSocketClient(app, path, {"token": s["token"]}, client_id=i)
+        for i, s in enumerate(seeded)
+    ]
+    for ws in ws_clients:
+        ws.on_message = on_message
+
+    # Connect phase (with allocation tracing for memory per connection)
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+    accepted = await asyncio.gather(*(ws.connect() for ws in ws_clients))
+    if endpoint == "chat":
+        for ws, s in zip(ws_clients, seeded):
+            await ws.send_json({"type": "subscribe", "conversation_id": s["conversation_id"]})
+        await asyncio.sleep(0)
+    connect_seconds = time.perf_counter() - started
+    connected, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if not all(accepted):
+        raise RuntimeError(f"{accepted.count(False)} of {clients} connections were rejected")
+
+    # The /ws handlers echo to the sender too; the chat handler excludes the sender
+    fanout = {cid: n if endpoint == "ws" else n - 1 for cid, n in members_by_conversation.items()}
+
+    # Message phase
+    expected = 0
+    sent = 0
+    started = time.perf_counter()
+    for _ in range(messages_per_client):
+        for ws, s in zip(ws_clients, seeded):
+            if rate:
+                delay = started + sent / rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            sent += 1
+            await ws.send_json({
+                "type": "message",
+                "conversation_id": s["conversation_id"],
+                "content": json.dumps({"sent_at": time.perf_counter()}),
+            })
+            expected += fanout[s["conversation_id"]]
+        await asyncio.sleep(0)
+    await wait_for(lambda: counts["message"] >= expected, timeout)
+    message_seconds = time.perf_counter() - started
+
+    # Typing phase (fan-out to everyone but the typist)
+    expected_typing = 0
+    started = time.perf_counter()
+    for round_ in range(typing_per_client):
+        for ws, s in zip(ws_clients, seeded):
+            await ws.send_json({
+                "type": "typing",
+                "conversation_id": s["conversation_id"],
+                "is_typing": round_ % 2 == 0,
+            })
+            expected_typing += members_by_conversation[s["conversation_id"]] - 1
+        await asyncio.sleep(0)
+    await wait_for(lambda: counts["typing"] >= expected_typing, timeout)
+    typing_seconds = time.perf_counter() - started
+
+    await asyncio.gather(*(ws.close() for ws in ws_clients))
+    engine.dispose()
+
+    return BenchmarkResult(
+        endpoint=endpoint,
+        clients=clients,
+        group_size=group_size,
+        messages_per_client=messages_per_client,
+        rate=rate,
+        connect_seconds=connect_seconds,
+        connections_per_sec=clients / connect_seconds if connect_seconds else 0.0,
+        memory_per_connection_bytes=(connected - baseline) / clients,
+        messages_sent=sent,
+        deliveries_expected=expected,
+        deliveries_received=counts["message"],
+        message_seconds=message_seconds,
+        messages_per_sec=sent / message_seconds if message_seconds else 0.0,
+        deliveries_per_sec=counts["message"] / message_seconds if message_seconds else 0.0,
+        latency_p50_ms=percentile(latencies, 50) * 1000,
+        latency_p99_ms=percentile(latencies, 99) * 1000,
+        typing_events_sent=typing_per_client * clients,
+        typing_deliveries=counts["typing"],
+        typing_seconds=typing_seconds,
+    )
+
+
+def format_report(result: BenchmarkResult) -> str:
+    return "\n".join([
+        f"WebSocket load test ({result.endpoint}): {result.clients} clients, "
+        f"group size {result.group_size}, {result.messages_per_client} messages/client, "
+        f"{'rate ' + format(result.rate, ',.0f') + ' msg/s' if result.rate else 'burst'}",
+        f"  connect:   {result.connect_seconds:.2f}s ({result.connections_per_sec:,.0f} conn/s), "
+        f"{result.memory_per_connection_bytes / 1024:.1f} KiB/connection",
+        f"  messages:  {result.messages_sent:,} sent, "
+        f"{result.deliveries_received:,}/{result.deliveries_expected:,} delivered in {result.message_seconds:.2f}s",
+        f"             {result.messages_per_sec:,.0f} msg/s in, {result.deliveries_per_sec:,.0f} deliveries/s out",
+        f"  latency:   p50 {result.latency_p50_ms:.2f} ms, p99 {result.latency_p99_ms:.2f} ms",
+        f"  typing:    {result.typing_events_sent:,} sent, {result.typing_deliveries:,} delivered "
+        f"in {result.typing_seconds:.2f}s",
+    ])
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint", choices=ENDPOINTS, default="ws")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--group-size", type=int, default=4)
+    parser.add_argument("--messages", type=int, default=5, help="messages sent per client")
+    parser.add_argument("--typing", type=int, default=2, help="typing events sent per client")
+    parser.add_argument("--rate", type=float, default=0.0, help="offered messages/sec (0 = burst)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--json", dest="json_path", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run(
+        endpoint=args.endpoint,
+        clients=args.clients,
+        group_size=args.group_size,
+        messages_per_client=args.messages,
+        typing_per_client=args.typing,
+        rate=args.rate,
+        timeout=args.timeout,
+    ))
+    print(format_report(result))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(asdict(result), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
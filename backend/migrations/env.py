@@ -23,6 +23,11 @@ from app.models.user import *
 from app.models.chat import *
 from app.models.message import *
 from app.models.audit import *
+from app.models.moderation import *
+from app.models.screenshot import *
+from app.models.stream import *
+from app.models.activity import *
+from app.models.session import *
 
 target_metadata = Base.metadata
 
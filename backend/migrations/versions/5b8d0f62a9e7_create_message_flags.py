@@ -0,0 +1,39 @@
+"""create message_flags
+
+Revision ID: 5b8d0f62a9e7
+Revises: e19f5a7c3b42
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8d0f62a9e7'
+down_revision: Union[str, None] = 'e19f5a7c3b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "message_flags",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("message_id", sa.Integer(), nullable=False),
+        sa.Column("rule", sa.String(), nullable=False),
+        sa.Column("severity", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["message_id"], ["messages.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_message_flags_id", "message_flags", ["id"])
+    op.create_index("ix_message_flags_message_id", "message_flags", ["message_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_message_flags_message_id", table_name="message_flags")
+    op.drop_index("ix_message_flags_id", table_name="message_flags")
+    op.drop_table("message_flags")
@@ -0,0 +1,47 @@
+"""create user activity rollups
+
+Revision ID: 7c2d9a4f1e86
+Revises: f3a8c5d17b29
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2d9a4f1e86'
+down_revision: Union[str, None] = 'f3a8c5d17b29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_activity_hourly",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("hour", sa.DateTime(), nullable=False),
+        sa.Column("messages_sent", sa.Integer(), nullable=False),
+        sa.Column("conversations_active", sa.Integer(), nullable=False),
+        sa.Column("seconds_online", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "hour"),
+    )
+    op.create_table(
+        "user_activity_conversations",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("hour", sa.DateTime(), nullable=False),
+        sa.Column("conversation_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["conversation_id"], ["conversations.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "hour", "conversation_id"),
+    )
+    op.create_index("ix_user_activity_conversations_hour", "user_activity_conversations", ["hour"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_activity_conversations_hour", table_name="user_activity_conversations")
+    op.drop_table("user_activity_conversations")
+    op.drop_table("user_activity_hourly")
@@ -0,0 +1,44 @@
+"""profile visibility indexes
+
+Revision ID: 9d3e7b1a4c58
+Revises: 5b8d0f62a9e7
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3e7b1a4c58'
+down_revision: Union[str, None] = '5b8d0f62a9e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_conversation_members_user_id",
+            "conversation_members",
+            ["user_id", "conversation_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_users_parent_id",
+            "users",
+            ["parent_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_users_parent_id", table_name="users", postgresql_concurrently=True)
+        op.drop_index(
+            "ix_conversation_members_user_id", table_name="conversation_members", postgresql_concurrently=True
+        )
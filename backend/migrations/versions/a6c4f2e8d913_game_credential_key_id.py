@@ -0,0 +1,37 @@
+"""game credential key id
+
+Revision ID: a6c4f2e8d913
+Revises: 9d3e7b1a4c58
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c4f2e8d913'
+down_revision: Union[str, None] = '9d3e7b1a4c58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable with no default: a metadata-only change, existing rows stay NULL (legacy key)
+    op.add_column("game_credentials", sa.Column("key_id", sa.String(length=32), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_game_credentials_key_id",
+            "game_credentials",
+            ["key_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_game_credentials_key_id", table_name="game_credentials", postgresql_concurrently=True)
+    op.drop_column("game_credentials", "key_id")
@@ -0,0 +1,34 @@
+"""unique message flags
+
+Revision ID: a9d2c6e4b718
+Revises: e8c4a1d6b357
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d2c6e4b718'
+down_revision: Union[str, None] = 'e8c4a1d6b357'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Drop duplicates left by redelivered moderation batches, keeping the first flag
+    op.execute("""
+        DELETE FROM message_flags a
+        USING message_flags b
+        WHERE a.message_id = b.message_id AND a.rule = b.rule AND a.id > b.id
+    """)
+    op.create_unique_constraint(
+        "uq_message_flags_message_id_rule", "message_flags", ["message_id", "rule"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_message_flags_message_id_rule", "message_flags", type_="unique")
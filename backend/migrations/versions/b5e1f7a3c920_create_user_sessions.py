@@ -0,0 +1,39 @@
+"""create user sessions
+
+Revision ID: b5e1f7a3c920
+Revises: 7c2d9a4f1e86
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e1f7a3c920'
+down_revision: Union[str, None] = '7c2d9a4f1e86'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_sessions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=False),
+        sa.Column("ended_at", sa.DateTime(), nullable=False),
+        sa.Column("peak_connections", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_user_sessions_id", "user_sessions", ["id"])
+    op.create_index("ix_user_sessions_user_id_started_at", "user_sessions", ["user_id", "started_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_sessions_user_id_started_at", table_name="user_sessions")
+    op.drop_index("ix_user_sessions_id", table_name="user_sessions")
+    op.drop_table("user_sessions")
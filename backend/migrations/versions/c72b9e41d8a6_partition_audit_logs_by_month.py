@@ -0,0 +1,121 @@
+"""partition audit_logs by month
+
+Revision ID: c72b9e41d8a6
+Revises: 8a4e6d2c5f31
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c72b9e41d8a6'
+down_revision: Union[str, None] = '8a4e6d2c5f31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+COLUMNS = "id, actor_id, action, entity_type, entity_id, before_json, after_json, ip, created_at"
+
+
+def _add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_indexes() -> None:
+    op.execute("CREATE INDEX ix_audit_logs_id ON audit_logs (id)")
+    op.execute("CREATE INDEX ix_audit_logs_created_at_brin ON audit_logs USING brin (created_at)")
+    op.execute("CREATE INDEX ix_audit_logs_created_at_id ON audit_logs (created_at, id)")
+    op.execute("CREATE INDEX ix_audit_logs_actor_id ON audit_logs (actor_id)")
+    op.execute("CREATE INDEX ix_audit_logs_entity ON audit_logs (entity_type, entity_id)")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    # Move the existing table (and its sequence/index names) out of the way
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_legacy")
+    op.execute("ALTER INDEX audit_logs_pkey RENAME TO audit_logs_legacy_pkey")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY NONE")
+    op.execute("DROP INDEX IF EXISTS ix_audit_logs_id")
+    op.execute("DROP INDEX IF EXISTS ix_audit_logs_created_at_id")
+
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id integer NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+            actor_id integer NOT NULL REFERENCES users (id),
+            action varchar NOT NULL,
+            entity_type varchar NOT NULL,
+            entity_id integer,
+            before_json jsonb,
+            after_json jsonb,
+            ip varchar,
+            created_at timestamp NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+
+    # One partition per month from the oldest row through MONTHS_AHEAD months from now
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM audit_logs_legacy")).scalar()
+    current = datetime.utcnow().date().replace(day=1)
+    month = (oldest.date() if oldest else current).replace(day=1)
+    while month <= _add_months(current, MONTHS_AHEAD):
+        op.execute(
+            f"CREATE TABLE audit_logs_p{month:%Y%m} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+    # Catches rows if the maintenance job ever falls behind; ensure_partitions
+    # moves them into their month's partition once it creates it
+    op.execute("CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT")
+
+    op.execute(f"""
+        INSERT INTO audit_logs ({COLUMNS})
+        SELECT id, actor_id, action, entity_type, entity_id,
+               before_json::jsonb, after_json::jsonb, ip,
+               coalesce(created_at, now() AT TIME ZONE 'utc')
+        FROM audit_logs_legacy
+    """)
+    op.execute("DROP TABLE audit_logs_legacy")
+
+    _create_indexes()
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_partitioned")
+    op.execute("ALTER INDEX audit_logs_pkey RENAME TO audit_logs_partitioned_pkey")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY NONE")
+    for name in ("ix_audit_logs_id", "ix_audit_logs_created_at_brin", "ix_audit_logs_created_at_id",
+                 "ix_audit_logs_actor_id", "ix_audit_logs_entity"):
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id integer PRIMARY KEY DEFAULT nextval('audit_logs_id_seq'),
+            actor_id integer NOT NULL REFERENCES users (id),
+            action varchar NOT NULL,
+            entity_type varchar NOT NULL,
+            entity_id integer,
+            before_json json,
+            after_json json,
+            ip varchar,
+            created_at timestamp
+        )
+    """)
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    op.execute(f"""
+        INSERT INTO audit_logs ({COLUMNS})
+        SELECT id, actor_id, action, entity_type, entity_id,
+               before_json::json, after_json::json, ip, created_at
+        FROM audit_logs_partitioned
+    """)
+    op.execute("DROP TABLE audit_logs_partitioned CASCADE")
+    op.execute("CREATE INDEX ix_audit_logs_id ON audit_logs (id)")
+    op.execute("CREATE INDEX ix_audit_logs_created_at_id ON audit_logs (created_at, id)")
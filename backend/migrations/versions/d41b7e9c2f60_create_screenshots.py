@@ -0,0 +1,46 @@
+"""create screenshots
+
+Revision ID: d41b7e9c2f60
+Revises: a6c4f2e8d913
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41b7e9c2f60'
+down_revision: Union[str, None] = 'a6c4f2e8d913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "screenshots",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("owner_id", sa.Integer(), nullable=False),
+        sa.Column("url", sa.String(), nullable=False),
+        sa.Column("thumbnail_url", sa.String(), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("caption", sa.String(), nullable=True),
+        sa.Column("width", sa.Integer(), nullable=False),
+        sa.Column("height", sa.Integer(), nullable=False),
+        sa.Column("size_bytes", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_screenshots_id", "screenshots", ["id"])
+    op.create_index("ix_screenshots_owner_id", "screenshots", ["owner_id"])
+    op.create_index("ix_screenshots_content_hash", "screenshots", ["content_hash"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_screenshots_content_hash", table_name="screenshots")
+    op.drop_index("ix_screenshots_owner_id", table_name="screenshots")
+    op.drop_index("ix_screenshots_id", table_name="screenshots")
+    op.drop_table("screenshots")
@@ -0,0 +1,36 @@
+"""audit snapshot patches
+
+Revision ID: e19f5a7c3b42
+Revises: c72b9e41d8a6
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e19f5a7c3b42'
+down_revision: Union[str, None] = 'c72b9e41d8a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows keep full before/after copies and read as base rows
+    op.add_column("audit_logs", sa.Column("patch_json", postgresql.JSONB(), nullable=True))
+    op.add_column("audit_logs", sa.Column("before_hash", sa.String(16), nullable=True))
+    op.drop_index("ix_audit_logs_entity", table_name="audit_logs")
+    op.create_index("ix_audit_logs_entity", "audit_logs", ["entity_type", "entity_id", "id"])
+
+
+def downgrade() -> None:
+    # Delta rows only hold patches: export them (the CSV export reconstructs
+    # full snapshots) before downgrading, or their history is lost
+    op.drop_index("ix_audit_logs_entity", table_name="audit_logs")
+    op.create_index("ix_audit_logs_entity", "audit_logs", ["entity_type", "entity_id"])
+    op.drop_column("audit_logs", "before_hash")
+    op.drop_column("audit_logs", "patch_json")
@@ -0,0 +1,63 @@
+"""message search
+
+Revision ID: e8c4a1d6b357
+Revises: b5e1f7a3c920
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c4a1d6b357'
+down_revision: Union[str, None] = 'b5e1f7a3c920'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # 'simple' keeps kid-speak ("gg", "pls", "gr8") and stop words searchable.
+    # Adding a stored column rewrites the table: schedule this for a quiet window.
+    op.execute(
+        "ALTER TABLE messages ADD COLUMN IF NOT EXISTS content_tsv tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('simple', coalesce(content, ''))) STORED"
+    )
+
+    # Build concurrently so the messages table stays writable during deploy
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_messages_content_tsv",
+            "messages",
+            ["content_tsv"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_messages_content_trgm",
+            "messages",
+            ["content"],
+            postgresql_using="gin",
+            postgresql_ops={"content": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_messages_conversation_id_id",
+            "messages",
+            ["conversation_id", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_messages_conversation_id_id", table_name="messages", postgresql_concurrently=True)
+        op.drop_index("ix_messages_content_trgm", table_name="messages", postgresql_concurrently=True)
+        op.drop_index("ix_messages_content_tsv", table_name="messages", postgresql_concurrently=True)
+    op.execute("ALTER TABLE messages DROP COLUMN IF EXISTS content_tsv")
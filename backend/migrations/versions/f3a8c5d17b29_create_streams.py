@@ -0,0 +1,40 @@
+"""create streams
+
+Revision ID: f3a8c5d17b29
+Revises: d41b7e9c2f60
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a8c5d17b29'
+down_revision: Union[str, None] = 'd41b7e9c2f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "streams",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("streamer_id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("ended_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["streamer_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_streams_id", "streams", ["id"])
+    op.create_index("ix_streams_streamer_id", "streams", ["streamer_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_streams_streamer_id", table_name="streams")
+    op.drop_index("ix_streams_id", table_name="streams")
+    op.drop_table("streams")
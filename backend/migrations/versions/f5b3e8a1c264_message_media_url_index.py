@@ -0,0 +1,36 @@
+"""message media url index
+
+Revision ID: f5b3e8a1c264
+Revises: a9d2c6e4b718
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5b3e8a1c264'
+down_revision: Union[str, None] = 'a9d2c6e4b718'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Build concurrently so the messages table stays writable during deploy
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_messages_media_url",
+            "messages",
+            ["media_url"],
+            postgresql_where=sa.text("media_url IS NOT NULL"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_messages_media_url", table_name="messages", postgresql_concurrently=True)
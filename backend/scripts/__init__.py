@@ -0,0 +1 @@
+"""Operational scripts for the Kids Pixel Pals backend"""
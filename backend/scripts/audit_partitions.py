@@ -0,0 +1,40 @@
+"""Maintain monthly audit_logs partitions
+
+Pre-creates upcoming partitions and archives partitions older than the
+retention window to gzipped CSV, detaching and dropping each only once its
+archive is written. Run daily from cron or a scheduler:
+
+    python -m scripts.audit_partitions
+    python -m scripts.audit_partitions --ahead 6 --retention-months 36 --archive-dir /var/archive/audit
+"""
+import argparse
+import logging
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.audit_partitions import archive_expired_partitions, ensure_partitions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ahead", type=int, default=settings.audit_partitions_ahead,
+                        help="upcoming months to pre-create")
+    parser.add_argument("--retention-months", type=int, default=settings.audit_retention_months)
+    parser.add_argument("--archive-dir", default=settings.audit_archive_dir)
+    parser.add_argument("--skip-archive", action="store_true", help="only create upcoming partitions")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    db = SessionLocal()
+    try:
+        created = ensure_partitions(db, args.ahead)
+        archived = [] if args.skip_archive else archive_expired_partitions(
+            db, args.retention_months, args.archive_dir
+        )
+    finally:
+        db.close()
+    print(f"Created {len(created)} partition(s), archived {len(archived)} partition(s)")
+
+
+if __name__ == "__main__":
+    main()
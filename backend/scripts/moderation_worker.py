@@ -0,0 +1,119 @@
+"""Run the out-of-band moderation worker pool
+
+Starts one process per worker, each a consumer in the moderation group
+reading the Redis Stream that handle_new_message appends to. Scale across
+cores (or hosts) by raising --workers or running the command on more
+machines; consumers only share the stream. The parent logs throughput and
+consumer-group lag every --metrics-interval seconds and stops the workers
+cleanly on SIGINT/SIGTERM.
+
+    python -m scripts.moderation_worker
+    python -m scripts.moderation_worker --workers 8 --batch-size 200
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+import redis
+
+from app.core.config import settings
+
+
+logger = logging.getLogger("moderation_worker")
+
+# Worker stats summed into a shared array for the parent's metrics log
+_COUNTER_KEYS = ("processed", "flagged", "deferred", "retried", "dead_lettered")
+
+
+def _worker_main(consumer: str, batch_size: int, stop_event, counters) -> None:
+    # The parent handles signals and sets stop_event; finish the current batch first
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(processName)s %(message)s")
+
+    from app.core.database import engine
+    from app.services.moderation_stream import ModerationWorker
+
+    # Don't reuse connections inherited from the parent process
+    engine.dispose(close=False)
+    worker = ModerationWorker(consumer=consumer, batch_size=batch_size)
+    worker.ensure_group()
+    while not stop_event.is_set():
+        try:
+            worker.run_once()
+        except redis.RedisError as e:
+            logger.error("Redis error: %s", e)
+            time.sleep(1)
+        with counters.get_lock():
+            for index, key in enumerate(_COUNTER_KEYS):
+                counters[index] += worker.stats.pop(key, 0)
+    worker.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=settings.moderation_workers)
+    parser.add_argument("--batch-size", type=int, default=settings.moderation_batch_size)
+    parser.add_argument("--metrics-interval", type=float, default=30.0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(processName)s %(message)s")
+    from app.services.moderation_stream import stream_metrics
+
+    stop_event = multiprocessing.Event()
+    counters = multiprocessing.Array("q", len(_COUNTER_KEYS))
+    prefix = f"{socket.gethostname()}-{os.getpid()}"
+    processes = [
+        multiprocessing.Process(
+            target=_worker_main,
+            args=(f"{prefix}-{index}", args.batch_size, stop_event, counters),
+            name=f"moderation-{index}",
+        )
+        for index in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+
+    def stop(signum, frame):
+        logger.info("Stopping %d moderation workers", len(processes))
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    client = redis.from_url(str(settings.redis_url))
+    last = time.monotonic()
+    previous = [0] * len(_COUNTER_KEYS)
+    while not stop_event.wait(args.metrics_interval):
+        now = time.monotonic()
+        with counters.get_lock():
+            current = list(counters)
+        delta = dict(zip(_COUNTER_KEYS, (c - p for c, p in zip(current, previous))))
+        previous, elapsed, last = current, now - last, now
+        try:
+            metrics = stream_metrics(client)
+        except redis.RedisError as e:
+            logger.error("Could not read stream metrics: %s", e)
+            continue
+        logger.info(
+            "%.0f msgs/s, %d flagged, %d deferred, %d retried, %d dead-lettered | "
+            "pending %d, lag %s, oldest pending %.1fs, delayed %d",
+            delta["processed"] / elapsed, delta["flagged"], delta["deferred"], delta["retried"],
+            delta["dead_lettered"], metrics["pending"], metrics["lag"],
+            metrics["oldest_pending_age_seconds"], metrics["delayed"],
+        )
+        dead = [p for p in processes if not p.is_alive()]
+        if dead:
+            logger.error("%d moderation worker(s) exited unexpectedly; stopping", len(dead))
+            stop_event.set()
+
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
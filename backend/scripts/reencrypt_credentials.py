@@ -0,0 +1,75 @@
+"""Re-encrypt game credentials under the current primary encryption key
+
+Key rotation:
+    1. Move the current ENCRYPTION_KEY into ENCRYPTION_PREVIOUS_KEYS under its
+       ENCRYPTION_KEY_ID, then set a new ENCRYPTION_KEY and ENCRYPTION_KEY_ID.
+       The app keeps decrypting old rows through their stored key id.
+    2. Run this command. It can run while the app is serving traffic.
+    3. Once it reports no rows left, remove the old key.
+
+Press Ctrl-C (or send SIGTERM) to pause: chunks in flight are finished and
+the position is saved to the state file. Run the command again to resume.
+
+    python -m scripts.reencrypt_credentials
+    python -m scripts.reencrypt_credentials --workers 8 --chunk-size 5000
+"""
+import argparse
+import logging
+import os
+import signal
+
+from app.core.config import settings
+from app.services.credential_rotation import ReencryptionJob, RotationState
+
+
+def report(state: RotationState, rows_per_second: float) -> None:
+    print(
+        f"  {state.rotated:,} rotated, {state.skipped:,} skipped, {state.failed:,} failed "
+        f"(up to id {state.last_id}) - {rows_per_second:,.0f} rows/s",
+        flush=True,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=settings.reencrypt_workers)
+    parser.add_argument("--chunk-size", type=int, default=settings.reencrypt_chunk_size)
+    parser.add_argument("--state-file", default="reencrypt_state.json")
+    parser.add_argument("--restart", action="store_true", help="ignore a saved position and scan from the start")
+    parser.add_argument("--progress-interval", type=float, default=5.0, help="seconds between progress lines")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    if args.restart and os.path.exists(args.state_file):
+        os.remove(args.state_file)
+
+    stopping = {"requested": False}
+
+    def pause(signum, frame):
+        if not stopping["requested"]:
+            print("Pausing after chunks in flight; run again to resume", flush=True)
+        stopping["requested"] = True
+
+    job = ReencryptionJob(chunk_size=args.chunk_size, workers=args.workers, state_path=args.state_file)
+    if job.state.last_id:
+        print(f"Resuming after id {job.state.last_id} ({job.state.rotated:,} rows already rotated)")
+    print(f"Re-encrypting game credentials under key {job.primary_key_id!r} with {args.workers} workers")
+
+    signal.signal(signal.SIGINT, pause)
+    signal.signal(signal.SIGTERM, pause)
+    state = job.run(
+        should_stop=lambda: stopping["requested"],
+        progress=report,
+        progress_interval=args.progress_interval,
+    )
+
+    rows_per_second = (state.rotated + state.skipped) / state.elapsed_seconds if state.elapsed_seconds else 0.0
+    report(state, rows_per_second)
+    if stopping["requested"]:
+        print(f"Paused. Position saved to {args.state_file}")
+    else:
+        print("Done." if not state.failed else f"Done with {state.failed:,} rows no configured key can decrypt.")
+
+
+if __name__ == "__main__":
+    main()